@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import logging
 
+import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
 
-from .constants import DOMAIN
+from .constants import DOMAIN, SERVICE_RESTORE_BACKUP, ATTR_FILE, ATTR_ENTRY_ID, DATA_BACKUP_OBSERVERS, BACKUP_DIR
 from .yad import YaDsk, BackupObserver
 
 #
@@ -13,11 +16,25 @@ _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[str] = ["sensor", "button"]
 
+RESTORE_BACKUP_SCHEMA = vol.Schema({
+    vol.Required(ATTR_FILE): cv.string,
+    vol.Optional(ATTR_ENTRY_ID): cv.string
+})
+
 
 async def async_setup(hass, hass_config):
     # used only with GUI setup
     hass.data[DOMAIN] = {}
     _LOGGER.info("async_setup")
+
+    async def restore_backup(call: ServiceCall):
+        entries = {entry_id: ya_dsk for entry_id, ya_dsk in hass.data[DOMAIN].items() if isinstance(ya_dsk, YaDsk)}
+        entry_id = call.data.get(ATTR_ENTRY_ID) or next(iter(entries), None)
+        if entry_id not in entries:
+            raise HomeAssistantError("Integration entry not found")
+        await entries[entry_id].restore_backup(call.data[ATTR_FILE])
+
+    hass.services.async_register(DOMAIN, SERVICE_RESTORE_BACKUP, restore_backup, schema=RESTORE_BACKUP_SCHEMA)
     return True
 
 
@@ -32,20 +49,54 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         hass.config_entries.async_update_entry(entry, data={},
                                                options=entry.data)
 
-    # add options handler
-    entry.add_update_listener(async_update_options)
+    # add options handler, removed when entry unloaded
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
 
-    backup_observer = BackupObserver(hass, "/backup")
-    ya_dsk = YaDsk(hass, backup_observer, entry.options, entry.entry_id)
-    _LOGGER.info("Create YaDisk " + ya_dsk.get_info())
+    backup_observer = _acquire_backup_observer(hass, BACKUP_DIR)
+    try:
+        ya_dsk = YaDsk(hass, backup_observer, entry.options, entry.entry_id)
+        _LOGGER.info("Create YaDisk " + ya_dsk.get_info())
 
-    ya_dsk.add_update_listener(update_yad_option)
+        ya_dsk.add_update_listener(update_yad_option)
+        await ya_dsk.async_load()
+    except Exception:
+        _release_backup_observer(hass, BACKUP_DIR)
+        raise
 
     hass.data[DOMAIN][entry.entry_id] = ya_dsk
     hass.config_entries.async_setup_platforms(entry, PLATFORMS)
     return True
 
 
+async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok:
+        ya_dsk = hass.data[DOMAIN].pop(entry.entry_id)
+        await ya_dsk.async_close()
+        _release_backup_observer(hass, BACKUP_DIR)
+    return unload_ok
+
+
+def _acquire_backup_observer(hass: HomeAssistant, backup_dir: str) -> BackupObserver:
+    """ Get backup observer shared by integration entries with same backup directory """
+    observers = hass.data[DOMAIN].setdefault(DATA_BACKUP_OBSERVERS, {})
+    observer, references = observers.get(backup_dir, (None, 0))
+    if observer is None:
+        observer = BackupObserver(hass, backup_dir)
+    observers[backup_dir] = (observer, references + 1)
+    return observer
+
+
+def _release_backup_observer(hass: HomeAssistant, backup_dir: str):
+    """ Release shared backup observer, observer dropped when last integration entry unloaded """
+    observers = hass.data[DOMAIN][DATA_BACKUP_OBSERVERS]
+    observer, references = observers[backup_dir]
+    if references > 1:
+        observers[backup_dir] = (observer, references - 1)
+    else:
+        del observers[backup_dir]
+
+
 async def async_update_options(hass: HomeAssistant, entry: ConfigEntry):
     # update entity config
     hass.data[DOMAIN][entry.entry_id].update_config(entry.options)
@@ -18,7 +18,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry,
 
     entity1 = UpdateButton(ya_disk)
     entity2 = UploadButton(ya_disk)
-    async_add_entities([entity1, entity2], True)
+    async_add_entities([entity1, entity2])
 
 
 class UpdateButton(ButtonEntity):
@@ -6,12 +6,32 @@ from homeassistant.config_entries import ConfigFlow, OptionsFlow, ConfigEntry
 from homeassistant.core import callback
 
 from .constants import DOMAIN, CONF_PATH, CONF_CHECK_CODE, CONF_CLIENT_ID, CONF_CLIENT_SECRET, URL_GET_CODE, \
-    CONF_ADD_TOKEN, CONF_MAX_REMOTE_FILE, DEFAULT_MAX_REMOTE_FILE
-from .yad import async_get_token
+    CONF_ADD_TOKEN, CONF_MAX_REMOTE_FILE, DEFAULT_MAX_REMOTE_FILE, CONF_UPLOAD_PARALLELISM, \
+    DEFAULT_UPLOAD_PARALLELISM, MAX_UPLOAD_PARALLELISM, CONF_CHUNKED_UPLOAD, DEFAULT_CHUNKED_UPLOAD, \
+    CONF_RECONCILE_INTERVAL, DEFAULT_RECONCILE_INTERVAL, CONF_BANDWIDTH_LIMIT, DEFAULT_BANDWIDTH_LIMIT, \
+    CONF_BANDWIDTH_SCHEDULE, DEFAULT_BANDWIDTH_SCHEDULE, CONF_COMPRESSION, DEFAULT_COMPRESSION, \
+    CONF_DEDUP_UPLOAD, DEFAULT_DEDUP_UPLOAD, CONF_WATCH_BACKUPS, DEFAULT_WATCH_BACKUPS, \
+    CONF_REFRESH_INTERVAL, DEFAULT_REFRESH_INTERVAL, CONF_MIRROR_PATHS, DEFAULT_MIRROR_PATHS, \
+    CONF_ENCRYPTION_KEY, DEFAULT_ENCRYPTION_KEY, CONF_KEEP_DAILY, DEFAULT_KEEP_DAILY, CONF_KEEP_WEEKLY, \
+    DEFAULT_KEEP_WEEKLY, CONF_KEEP_MONTHLY, DEFAULT_KEEP_MONTHLY, CONF_PERMANENT_DELETE, DEFAULT_PERMANENT_DELETE, \
+    CONF_UPLOAD_MEMORY_LIMIT, DEFAULT_UPLOAD_MEMORY_LIMIT
+from .yad import async_get_token, BandwidthSchedule, available_compressions
 
 _LOGGER = logging.getLogger(__name__)
 
 DATA_SCHEMA = vol.Schema({(CONF_PATH): str})
+UPLOAD_PARALLELISM_SCHEMA = vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_UPLOAD_PARALLELISM))
+UPLOAD_MEMORY_LIMIT_SCHEMA = vol.All(vol.Coerce(int), vol.Range(min=1))
+
+
+def bandwidth_schedule(value) -> str:
+    """ Validate bandwidth schedule """
+    value = cv.string(value)
+    try:
+        BandwidthSchedule.parse_windows(value)
+    except ValueError as e:
+        raise vol.Invalid(str(e)) from e
+    return value
 
 SECURITY_KEYS = [CONF_ADD_TOKEN, CONF_CHECK_CODE]
 INTEGRATION_TITLE = 'Backup to YandexDisk'
@@ -42,7 +62,9 @@ class ConfigFlowHandler(ConfigFlow, domain=DOMAIN):
             step_id='user',
             data_schema=vol.Schema({
                 vol.Required(CONF_PATH): cv.string,
-                vol.Required(CONF_MAX_REMOTE_FILE, default=DEFAULT_MAX_REMOTE_FILE): cv.positive_int
+                vol.Required(CONF_MAX_REMOTE_FILE, default=DEFAULT_MAX_REMOTE_FILE): cv.positive_int,
+                vol.Required(CONF_UPLOAD_PARALLELISM, default=DEFAULT_UPLOAD_PARALLELISM): UPLOAD_PARALLELISM_SCHEMA,
+                vol.Required(CONF_CHUNKED_UPLOAD, default=DEFAULT_CHUNKED_UPLOAD): cv.boolean
             })
         )
 
@@ -89,26 +111,63 @@ class ConfigFlowHandler(ConfigFlow, domain=DOMAIN):
 
 class OptionsFlowHandler(OptionsFlow):
     """ Option flow handler. Used when changed parameters of existent integration """
-    _data = {}
 
     def __init__(self, config_entry: ConfigEntry):
         self.config_entry = config_entry
+        self._data = {}
 
     async def async_step_init(self, user_input=None):
         self._data.update(self.config_entry.options)
         path = self._data[CONF_PATH]
         max_remote_file = self._data.setdefault(CONF_MAX_REMOTE_FILE, DEFAULT_MAX_REMOTE_FILE)
+        keep_daily = self._data.setdefault(CONF_KEEP_DAILY, DEFAULT_KEEP_DAILY)
+        keep_weekly = self._data.setdefault(CONF_KEEP_WEEKLY, DEFAULT_KEEP_WEEKLY)
+        keep_monthly = self._data.setdefault(CONF_KEEP_MONTHLY, DEFAULT_KEEP_MONTHLY)
+        permanent_delete = self._data.setdefault(CONF_PERMANENT_DELETE, DEFAULT_PERMANENT_DELETE)
+        upload_parallelism = self._data.setdefault(CONF_UPLOAD_PARALLELISM, DEFAULT_UPLOAD_PARALLELISM)
+        upload_memory_limit = self._data.setdefault(CONF_UPLOAD_MEMORY_LIMIT, DEFAULT_UPLOAD_MEMORY_LIMIT)
+        chunked_upload = self._data.setdefault(CONF_CHUNKED_UPLOAD, DEFAULT_CHUNKED_UPLOAD)
+        reconcile_interval = self._data.setdefault(CONF_RECONCILE_INTERVAL, DEFAULT_RECONCILE_INTERVAL)
+        bandwidth_limit = self._data.setdefault(CONF_BANDWIDTH_LIMIT, DEFAULT_BANDWIDTH_LIMIT)
+        bandwidth_schedule_value = self._data.setdefault(CONF_BANDWIDTH_SCHEDULE, DEFAULT_BANDWIDTH_SCHEDULE)
+        compression = self._data.setdefault(CONF_COMPRESSION, DEFAULT_COMPRESSION)
+        dedup_upload = self._data.setdefault(CONF_DEDUP_UPLOAD, DEFAULT_DEDUP_UPLOAD)
+        watch_backups = self._data.setdefault(CONF_WATCH_BACKUPS, DEFAULT_WATCH_BACKUPS)
+        refresh_interval = self._data.setdefault(CONF_REFRESH_INTERVAL, DEFAULT_REFRESH_INTERVAL)
+        mirror_paths = self._data.setdefault(CONF_MIRROR_PATHS, DEFAULT_MIRROR_PATHS)
+        encryption_key = self._data.setdefault(CONF_ENCRYPTION_KEY, DEFAULT_ENCRYPTION_KEY)
 
         return self.async_show_form(
             step_id='user',
             data_schema=vol.Schema({
                 vol.Required(CONF_PATH, default=path): cv.string,
                 vol.Required(CONF_MAX_REMOTE_FILE, default=max_remote_file): cv.positive_int,
+                vol.Required(CONF_KEEP_DAILY, default=keep_daily): cv.positive_int,
+                vol.Required(CONF_KEEP_WEEKLY, default=keep_weekly): cv.positive_int,
+                vol.Required(CONF_KEEP_MONTHLY, default=keep_monthly): cv.positive_int,
+                vol.Required(CONF_PERMANENT_DELETE, default=permanent_delete): cv.boolean,
+                vol.Required(CONF_UPLOAD_PARALLELISM, default=upload_parallelism): UPLOAD_PARALLELISM_SCHEMA,
+                vol.Required(CONF_UPLOAD_MEMORY_LIMIT, default=upload_memory_limit): UPLOAD_MEMORY_LIMIT_SCHEMA,
+                vol.Required(CONF_CHUNKED_UPLOAD, default=chunked_upload): cv.boolean,
+                vol.Required(CONF_RECONCILE_INTERVAL, default=reconcile_interval): cv.positive_int,
+                vol.Required(CONF_BANDWIDTH_LIMIT, default=bandwidth_limit): cv.positive_int,
+                vol.Optional(CONF_BANDWIDTH_SCHEDULE,
+                             description={"suggested_value": bandwidth_schedule_value}): bandwidth_schedule,
+                vol.Required(CONF_COMPRESSION, default=compression): vol.In(available_compressions()),
+                vol.Required(CONF_DEDUP_UPLOAD, default=dedup_upload): cv.boolean,
+                vol.Required(CONF_WATCH_BACKUPS, default=watch_backups): cv.boolean,
+                vol.Required(CONF_REFRESH_INTERVAL, default=refresh_interval): cv.positive_int,
+                vol.Optional(CONF_MIRROR_PATHS, description={"suggested_value": mirror_paths}): cv.string,
+                vol.Optional(CONF_ENCRYPTION_KEY, description={"suggested_value": encryption_key}): cv.string,
                 vol.Required(CONF_ADD_TOKEN, default=False): cv.boolean
             })
         )
 
     async def async_step_user(self, user_input: dict = None):
+        # cleared optional field is not sent by frontend
+        user_input.setdefault(CONF_BANDWIDTH_SCHEDULE, DEFAULT_BANDWIDTH_SCHEDULE)
+        user_input.setdefault(CONF_MIRROR_PATHS, DEFAULT_MIRROR_PATHS)
+        user_input.setdefault(CONF_ENCRYPTION_KEY, DEFAULT_ENCRYPTION_KEY)
         if user_input[CONF_ADD_TOKEN]:
             self._data = user_input
             return await self.async_step_client()
@@ -12,22 +12,112 @@ CONF_TOKEN = 'token'
 CONF_REFRESH_TOKEN = 'refresh_token'
 CONF_TOKEN_EXPIRES = 'token_expires_date'
 CONF_MAX_REMOTE_FILE = 'max_remote_file'
+CONF_UPLOAD_PARALLELISM = 'upload_parallelism'
+CONF_UPLOAD_MEMORY_LIMIT = 'upload_memory_limit'
+CONF_CHUNKED_UPLOAD = 'chunked_upload'
+CONF_RECONCILE_INTERVAL = 'reconcile_interval'
+CONF_BANDWIDTH_LIMIT = 'bandwidth_limit'
+CONF_BANDWIDTH_SCHEDULE = 'bandwidth_schedule'
+CONF_COMPRESSION = 'compression'
+CONF_DEDUP_UPLOAD = 'dedup_upload'
+CONF_WATCH_BACKUPS = 'watch_backups'
+CONF_REFRESH_INTERVAL = 'refresh_interval'
+CONF_MIRROR_PATHS = 'mirror_paths'
+CONF_ENCRYPTION_KEY = 'encryption_key'
+CONF_KEEP_DAILY = 'keep_daily'
+CONF_KEEP_WEEKLY = 'keep_weekly'
+CONF_KEEP_MONTHLY = 'keep_monthly'
+CONF_PERMANENT_DELETE = 'permanent_delete'
 
 
 DEFAULT_MAX_REMOTE_FILE = 10
+DEFAULT_UPLOAD_PARALLELISM = 1
+MAX_UPLOAD_PARALLELISM = 10
+# Read buffers of all uploads, MB
+DEFAULT_UPLOAD_MEMORY_LIMIT = 8
+UPLOAD_BUFFER_MIN_SIZE = 65536
+DEFAULT_CHUNKED_UPLOAD = False
+DEFAULT_RECONCILE_INTERVAL = 60
+DEFAULT_BANDWIDTH_LIMIT = 0
+DEFAULT_BANDWIDTH_SCHEDULE = ''
+DEFAULT_DEDUP_UPLOAD = False
+DEFAULT_WATCH_BACKUPS = False
+WATCH_SETTLE_SEC = 10
+DEFAULT_REFRESH_INTERVAL = 0
+# Refresh interval grows while directory unchanged, up to factor of option value
+REFRESH_INTERVAL_MAX_FACTOR = 8
+PROGRESS_UPDATE_INTERVAL = datetime.timedelta(seconds=5)
+DEFAULT_MIRROR_PATHS = ''
+# Chunks (UPLOAD_CHUNK_SIZE) buffered for every destination of single read upload
+FANOUT_QUEUE_CHUNKS = 4
+# Empty key - encryption disabled
+DEFAULT_ENCRYPTION_KEY = ''
+# Newest backup of every day, week and month kept in addition to max remote files, 0 - rule disabled
+DEFAULT_KEEP_DAILY = 0
+DEFAULT_KEEP_WEEKLY = 0
+DEFAULT_KEEP_MONTHLY = 0
+DEFAULT_PERMANENT_DELETE = False
+DELETE_PARALLELISM = 8
+
+COMPRESSION_NONE = 'none'
+COMPRESSION_GZIP = 'gzip'
+COMPRESSION_ZSTD = 'zstd'
+DEFAULT_COMPRESSION = COMPRESSION_NONE
+# Files are stored without extension (see README), compression marked by name suffix
+COMPRESSION_SUFFIXES = {COMPRESSION_GZIP: '_gz', COMPRESSION_ZSTD: '_zst'}
+MANIFEST_SUFFIX = '_manifest'
+DEDUP_CHUNK_DIR = 'chunks'
+DEDUP_CHUNK_SIZE = 8 * 1_048_576
+# Encryption marked by name suffix after compression suffix
+ENCRYPTION_SUFFIX = '_enc'
+ENCRYPTION_SEGMENT_SIZE = 1_048_576
+ENCRYPTION_KDF_ITERATIONS = 200_000
+
+SERVICE_RESTORE_BACKUP = 'restore_backup'
+ATTR_FILE = 'file'
+ATTR_ENTRY_ID = 'entry_id'
+
+DATA_BACKUP_OBSERVERS = 'backup_observers'
+BACKUP_DIR = '/backup'
+BACKUP_SCAN_CACHE_SEC = 30
 
 REFRESH_TOKEN_DELTA = datetime.timedelta(days=30)
+REFRESH_TOKEN_RETRY_SEC = 3600
 
 
-HEAD_CONTENT_TYPE = 'Content_Type'
 HEAD_AUTHORIZATION = 'Authorization'
-CONTENT_TYPE_FORM = 'application/x-www-form-urlencoded'
+HEAD_CONTENT_LENGTH = 'Content-Length'
+HEAD_CONTENT_RANGE = 'Content-Range'
+HEAD_RANGE = 'Range'
 
 URL_GET_CODE = 'https://oauth.yandex.ru/authorize?response_type=code&client_id='
 URL_GET_TOKEN = 'https://oauth.yandex.ru/token'
+URL_DISK_API = 'https://cloud-api.yandex.net/v1/disk'
 
 YANDEX_FIELD_ACCESS_TOKEN = 'access_token'
 YANDEX_FIELD_REFRESH_TOKEN = 'refresh_token'
+YANDEX_FIELD_EXPIRES_IN = 'expires_in'
 
 REST_TIMEOUT_SEC = 60
+UPLOAD_CONNECT_TIMEOUT_SEC = 15
+UPLOAD_READ_TIMEOUT_SEC = 250
+UPLOAD_CHUNK_SIZE = 1_048_576
+UPLOAD_RESUME_CHUNK_SIZE = 64 * 1_048_576
+UPLOAD_LINK_LIFETIME = datetime.timedelta(minutes=30)
+DOWNLOAD_PARALLELISM = 4
+DOWNLOAD_RANGE_SIZE = 16 * 1_048_576
+REQUEST_RETRIES = 3
+REQUEST_RETRY_INTERVAL_SEC = 5
+LIST_PAGE_SIZE = 1000
 HTTP_OK = 200
+HTTP_NO_CONTENT = 204
+HTTP_PARTIAL_CONTENT = 206
+HTTP_NOT_FOUND = 404
+HTTP_CONFLICT = 409
+HTTP_TOO_MANY_REQUESTS = 429
+
+STORAGE_VERSION = 1
+STORAGE_BACKUP_INDEX = DOMAIN + '.backup_index'
+STORAGE_UPLOAD_JOURNAL = DOMAIN + '.upload_journal'
+STORAGE_REMOTE_STATE = DOMAIN + '.remote_state'
+STORAGE_SAVE_DELAY_SEC = 10
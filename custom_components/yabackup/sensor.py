@@ -7,13 +7,20 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import UnitOfDataRate, UnitOfInformation, UnitOfTime
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .constants import DOMAIN
-from .yad import YaDsk
+from .yad import YaDsk, YaDskCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 MARKDOWN_FILES = "markdown_file_list"
+UPLOAD_PROGRESS = "upload_progress"
+LIST_JOB = "list_job"
+WATCH_JOB = "watch_job"
+SPANS = "spans"
+FILES = "files"
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry,
@@ -22,12 +29,23 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry,
     ya_disk = hass.data[DOMAIN][entry.entry_id]
 
     entity = DiskInfoSensor(ya_disk)
-    async_add_entities([entity], True)
+    job_entity = JobStateSensor(ya_disk)
+    telemetry_entities = [
+        TelemetrySensor(ya_disk, "last_sync_duration", "duration", UnitOfTime.SECONDS,
+                        SensorDeviceClass.DURATION, (SPANS, FILES, "finished")),
+        TelemetrySensor(ya_disk, "upload_speed", "speed_mb_s", UnitOfDataRate.MEGABYTES_PER_SECOND,
+                        SensorDeviceClass.DATA_RATE),
+        TelemetrySensor(ya_disk, "bytes_sent", "bytes_sent", UnitOfInformation.BYTES,
+                        SensorDeviceClass.DATA_SIZE),
+        TelemetrySensor(ya_disk, "api_calls", "api_calls", None, None, ("api_calls_total",)),
+        TelemetrySensor(ya_disk, "api_retries", "retries", None, None, ("retries_total",))
+    ]
+    async_add_entities([entity, job_entity] + telemetry_entities)
 
     # hass.data[DOMAIN][entry.entry_id] = entity
 
 
-class DiskInfoSensor(SensorEntity):
+class DiskInfoSensor(CoordinatorEntity[YaDskCoordinator], SensorEntity):
     """ Sensor with information about YandexDisk directory """
 
     _attr_name = DOMAIN + "_disk_info"
@@ -35,17 +53,66 @@ class DiskInfoSensor(SensorEntity):
     _attr_device_class = SensorDeviceClass.VOLUME
     _attr_state_class = SensorStateClass.MEASUREMENT
 
-    _attr_extra_state_attributes = {MARKDOWN_FILES: ""}
-    _ya_dsk = None
+    def __init__(self, ya_dsk: YaDsk):
+        super().__init__(ya_dsk.coordinator)
+
+    @property
+    def native_value(self) -> int:
+        """ File amount """
+        return self.coordinator.data["file_amount"]
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """ File list and upload progress """
+        return {MARKDOWN_FILES: self.coordinator.data["markdown_file_list"],
+                UPLOAD_PROGRESS: self.coordinator.data["upload_progress"]}
+
+
+class JobStateSensor(CoordinatorEntity[YaDskCoordinator], SensorEntity):
+    """ Sensor with state of upload job (idle, running, queued) """
+
+    _attr_name = DOMAIN + "_upload_state"
+    _attr_icon = "mdi:cloud-upload"
 
     def __init__(self, ya_dsk: YaDsk):
-        self._ya_dsk = ya_dsk
+        super().__init__(ya_dsk.coordinator)
+
+    @property
+    def native_value(self) -> str:
+        """ Upload job state """
+        return self.coordinator.data["upload_job"]["state"]
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """ Upload job last run, directory listing and new backup upload job states """
+        attributes = {key: value for key, value in self.coordinator.data["upload_job"].items() if key != "state"}
+        attributes[LIST_JOB] = self.coordinator.data["list_job"]
+        attributes[WATCH_JOB] = self.coordinator.data["watch_job"]
+        return attributes
+
+
+class TelemetrySensor(CoordinatorEntity[YaDskCoordinator], SensorEntity):
+    """ Sensor with value of last synchronization telemetry """
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:timer-outline"
+
+    def __init__(self, ya_dsk: YaDsk, name: str, key: str, unit: str | None,
+                 device_class: SensorDeviceClass | None, attributes: tuple[str, ...] = ()):
+        super().__init__(ya_dsk.coordinator)
+        self._key = key
+        self._attributes = attributes
+        self._attr_name = DOMAIN + "_" + name
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
 
-    def update(self) -> None:
-        """Fetch new state data for the sensor.
-        This is the only method that should fetch new data for Home Assistant.
-        """
-        self._attr_native_value = self._ya_dsk.file_amount
-        self._attr_extra_state_attributes[MARKDOWN_FILES] = self._ya_dsk.file_markdown_list
+    @property
+    def native_value(self):
+        """ Telemetry value """
+        return self.coordinator.data["telemetry"].get(self._key)
 
-        _LOGGER.debug("markdown " + self._ya_dsk.file_markdown_list)
+    @property
+    def extra_state_attributes(self) -> dict:
+        """ Telemetry attributes """
+        telemetry = self.coordinator.data["telemetry"]
+        return {key: telemetry.get(key) for key in self._attributes}
@@ -1,51 +1,158 @@
 """ Core integration objects"""
+import asyncio
 import base64
+import contextlib
+import ctypes
 import datetime
+import functools
+import hashlib
+import heapq
 import json
 import logging
-import tarfile
-from dataclasses import dataclass
+import os
+import struct
+import sys
+import time
+import zlib
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Generator
 
-import requests
-import yadisk as yadisk
-from homeassistant.core import HomeAssistant
-from yadisk.objects import ResourceObject
-from yadisk.objects import TokenObject
-
-from .constants import CONF_PATH, HEAD_CONTENT_TYPE, CONTENT_TYPE_FORM, HEAD_AUTHORIZATION, URL_GET_TOKEN, CONF_TOKEN, \
+import aiohttp
+from homeassistant.const import EVENT_HOMEASSISTANT_STARTED
+from homeassistant.core import CoreState, Event, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.aiohttp_client import async_get_clientsession, async_create_clientsession
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util import dt as dt_util
+from homeassistant.util import slugify
+
+from .constants import CONF_PATH, HEAD_AUTHORIZATION, URL_GET_TOKEN, CONF_TOKEN, YANDEX_FIELD_EXPIRES_IN, \
     YANDEX_FIELD_ACCESS_TOKEN, YANDEX_FIELD_REFRESH_TOKEN, CONF_REFRESH_TOKEN, REST_TIMEOUT_SEC, HTTP_OK, \
-    CONF_MAX_REMOTE_FILE, CONF_CLIENT_ID, CONF_CLIENT_SECRET, CONF_TOKEN_EXPIRES, REFRESH_TOKEN_DELTA
+    CONF_MAX_REMOTE_FILE, CONF_CLIENT_ID, CONF_CLIENT_SECRET, CONF_TOKEN_EXPIRES, REFRESH_TOKEN_DELTA, \
+    STORAGE_VERSION, STORAGE_BACKUP_INDEX, URL_DISK_API, UPLOAD_CONNECT_TIMEOUT_SEC, UPLOAD_READ_TIMEOUT_SEC, \
+    UPLOAD_CHUNK_SIZE, REQUEST_RETRIES, REQUEST_RETRY_INTERVAL_SEC, HEAD_CONTENT_LENGTH, HTTP_NO_CONTENT, \
+    HTTP_TOO_MANY_REQUESTS, HTTP_NOT_FOUND, LIST_PAGE_SIZE, CONF_UPLOAD_PARALLELISM, DEFAULT_UPLOAD_PARALLELISM, \
+    CONF_CHUNKED_UPLOAD, DEFAULT_CHUNKED_UPLOAD, HEAD_CONTENT_RANGE, UPLOAD_RESUME_CHUNK_SIZE, UPLOAD_LINK_LIFETIME, \
+    STORAGE_UPLOAD_JOURNAL, STORAGE_REMOTE_STATE, STORAGE_SAVE_DELAY_SEC, CONF_RECONCILE_INTERVAL, \
+    DEFAULT_RECONCILE_INTERVAL, CONF_BANDWIDTH_LIMIT, DEFAULT_BANDWIDTH_LIMIT, CONF_BANDWIDTH_SCHEDULE, \
+    DEFAULT_BANDWIDTH_SCHEDULE, CONF_COMPRESSION, DEFAULT_COMPRESSION, COMPRESSION_NONE, COMPRESSION_GZIP, \
+    COMPRESSION_ZSTD, COMPRESSION_SUFFIXES, CONF_DEDUP_UPLOAD, DEFAULT_DEDUP_UPLOAD, MANIFEST_SUFFIX, DEDUP_CHUNK_DIR, \
+    DEDUP_CHUNK_SIZE, HTTP_CONFLICT, HEAD_RANGE, HTTP_PARTIAL_CONTENT, DOWNLOAD_PARALLELISM, DOWNLOAD_RANGE_SIZE, \
+    CONF_WATCH_BACKUPS, DEFAULT_WATCH_BACKUPS, WATCH_SETTLE_SEC, DOMAIN, CONF_REFRESH_INTERVAL, \
+    DEFAULT_REFRESH_INTERVAL, REFRESH_INTERVAL_MAX_FACTOR, PROGRESS_UPDATE_INTERVAL, BACKUP_SCAN_CACHE_SEC, \
+    CONF_MIRROR_PATHS, DEFAULT_MIRROR_PATHS, FANOUT_QUEUE_CHUNKS, REFRESH_TOKEN_RETRY_SEC, \
+    CONF_ENCRYPTION_KEY, DEFAULT_ENCRYPTION_KEY, ENCRYPTION_SUFFIX, ENCRYPTION_SEGMENT_SIZE, \
+    ENCRYPTION_KDF_ITERATIONS, CONF_KEEP_DAILY, DEFAULT_KEEP_DAILY, CONF_KEEP_WEEKLY, DEFAULT_KEEP_WEEKLY, \
+    CONF_KEEP_MONTHLY, DEFAULT_KEEP_MONTHLY, CONF_PERMANENT_DELETE, DEFAULT_PERMANENT_DELETE, DELETE_PARALLELISM, \
+    CONF_UPLOAD_MEMORY_LIMIT, DEFAULT_UPLOAD_MEMORY_LIMIT, UPLOAD_BUFFER_MIN_SIZE
 
 _LOGGER = logging.getLogger(__name__)
 
 TYPE_FILE = 'file'
 
+LIST_FIELDS = ('name', 'type', 'modified', 'size', 'md5', 'custom_properties')
+MARKDOWN_FILE_AMOUNT = 10
+
+OPERATION_STATUS_SUCCESS = 'success'
+OPERATION_STATUS_FAILED = 'failed'
+OPERATION_POLL_INTERVAL_SEC = 1
+
+PROPERTY_COMPRESSION = 'yabackup_compression'
+PROPERTY_COMPRESSION_RATIO = 'yabackup_compression_ratio'
+PROPERTY_SOURCE_MD5 = 'yabackup_source_md5'
+PROPERTY_SOURCE_SIZE = 'yabackup_source_size'
+PROPERTY_ENCRYPTION = 'yabackup_encryption'
+
+ENCRYPTION_AES_GCM = 'aes-256-gcm'
+ENCRYPTION_MAGIC = b'YABENC'
+ENCRYPTION_VERSION = 1
+ENCRYPTION_SALT_SIZE = 16
+ENCRYPTION_NONCE_PREFIX_SIZE = 8
+ENCRYPTION_TAG_SIZE = 16
+ENCRYPTION_HEADER_SIZE = len(ENCRYPTION_MAGIC) + 1 + ENCRYPTION_SALT_SIZE + ENCRYPTION_NONCE_PREFIX_SIZE
+
+MANIFEST_VERSION = 1
+MANIFEST_FIELD_VERSION = 'version'
+MANIFEST_FIELD_FILE = 'file'
+MANIFEST_FIELD_SIZE = 'size'
+MANIFEST_FIELD_MD5 = 'md5'
+MANIFEST_FIELD_CHUNKS = 'chunks'
+
+GZIP_LEVEL = 6
+GZIP_WBITS = 31
+
+JOB_STATE_IDLE = 'idle'
+JOB_STATE_RUNNING = 'running'
+JOB_STATE_QUEUED = 'queued'
+
+UPLOAD_STATE_WAITING = 'waiting'
+UPLOAD_STATE_RUNNING = 'running'
+UPLOAD_STATE_DONE = 'done'
+UPLOAD_STATE_FAILED = 'failed'
+
+INDEX_FIELD_BACKUPS = 'backups'
+INDEX_FIELD_INODE = 'inode'
+INDEX_FIELD_SIZE = 'size'
+INDEX_FIELD_MTIME = 'mtime'
+INDEX_FIELD_SLUG = 'slug'
+INDEX_FIELD_NAME = 'name'
+INDEX_FIELD_DATE = 'date'
+INDEX_FIELD_MD5 = 'md5'
+
+STATE_FIELD_PATH = 'path'
+STATE_FIELD_RECONCILED = 'reconciled'
+STATE_FIELD_FILES = 'files'
+STATE_FIELD_OVERFLOW = 'overflow'
+
+JOURNAL_FIELD_CHECKPOINTS = 'checkpoints'
+JOURNAL_FIELD_HREF = 'href'
+JOURNAL_FIELD_METHOD = 'method'
+JOURNAL_FIELD_LINK_CREATED = 'link_created'
+JOURNAL_FIELD_INODE = 'inode'
+JOURNAL_FIELD_SIZE = 'size'
+JOURNAL_FIELD_MTIME = 'mtime'
+JOURNAL_FIELD_OFFSET = 'offset'
+JOURNAL_FIELD_CHUNK_START = 'chunk_start'
+JOURNAL_FIELD_CHUNK_HASH = 'chunk_hash'
+
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+IN_CREATE = 0x00000100
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+INOTIFY_EVENT = struct.Struct('iIII')
+INOTIFY_READ_SIZE = 65536
+
+TAR_BLOCK_SIZE = 512
+TAR_EMPTY_BLOCK = bytes(TAR_BLOCK_SIZE)
+TAR_TYPE_REGULAR = (b'0', b'\0')
+TAR_TYPE_GNU_LONG_NAME = b'L'
+TAR_TYPE_PAX_HEADER = b'x'
+BACKUP_JSON_NAMES = ('./backup.json', 'backup.json')
+BACKUP_JSON_MAX_READ = 1_048_576
+
+TRANSFER_TIMEOUT = aiohttp.ClientTimeout(total=None, connect=UPLOAD_CONNECT_TIMEOUT_SEC,
+                                         sock_read=UPLOAD_READ_TIMEOUT_SEC)
+
 
 async def async_get_token(hass: HomeAssistant, client_id, client_secret, check_code) -> dict:
     """ Get token. Async call from hass core."""
-    response = await  hass.async_add_executor_job(_get_token, client_id, client_secret, check_code)
-    return response
-
-
-def _get_token(client_id, client_secret, check_code) -> dict:
-    """ Get token. """
-    headers = {}
-    headers[HEAD_CONTENT_TYPE] = CONTENT_TYPE_FORM
-    headers[HEAD_AUTHORIZATION] = 'Basic ' + str(
-        _get_auth_string(client_id, client_secret))
+    headers = {HEAD_AUTHORIZATION: 'Basic ' + str(_get_auth_string(client_id, client_secret))}
+    session = async_get_clientsession(hass)
 
     try:
-        response = requests.post(URL_GET_TOKEN, headers=headers,
-                                 data='grant_type=authorization_code&code=' + check_code,
-                                 timeout=REST_TIMEOUT_SEC)
-        if response.status_code != HTTP_OK:
-            _LOGGER.error("Status code %s", response.status_code)
-            _LOGGER.error("Request token result %s", response.status_code)
-            raise ValueError
+        async with session.post(URL_GET_TOKEN, headers=headers,
+                                data={'grant_type': 'authorization_code', 'code': check_code},
+                                timeout=aiohttp.ClientTimeout(total=REST_TIMEOUT_SEC)) as response:
+            if response.status != HTTP_OK:
+                _LOGGER.error("Status code %s", response.status)
+                _LOGGER.error("Request token result %s", await response.text())
+                raise ValueError
 
-        json_response = response.json()
+            json_response = await response.json()
 
         result = {CONF_TOKEN: json_response[YANDEX_FIELD_ACCESS_TOKEN],
                   CONF_REFRESH_TOKEN: json_response[YANDEX_FIELD_REFRESH_TOKEN]}
@@ -56,18 +163,27 @@ def _get_token(client_id, client_secret, check_code) -> dict:
         raise e
 
 
-def _refresh_token_request(refresh_token, client_id, client_secret):
+async def async_refresh_token(session: aiohttp.ClientSession, refresh_token, client_id, client_secret) -> dict:
     """ Refresh token. """
     try:
         _LOGGER.debug("Try refresh token")
-        token_object: TokenObject = yadisk.functions.refresh_token(refresh_token, client_id, client_secret)
-
-        expire_seconds = token_object['expires_in']
+        async with session.post(URL_GET_TOKEN,
+                                data={'grant_type': 'refresh_token',
+                                      'refresh_token': refresh_token,
+                                      'client_id': client_id,
+                                      'client_secret': client_secret},
+                                timeout=aiohttp.ClientTimeout(total=REST_TIMEOUT_SEC)) as response:
+            if response.status != HTTP_OK:
+                _LOGGER.error("Status code %s", response.status)
+                raise ValueError("Refresh token result " + await response.text())
+            token_object = await response.json()
+
+        expire_seconds = token_object[YANDEX_FIELD_EXPIRES_IN]
         expire_data = datetime.datetime.now() + datetime.timedelta(seconds=expire_seconds)
         _LOGGER.debug("New token expires in %s", expire_data)
 
-        return {CONF_TOKEN: token_object['access_token'],
-                CONF_REFRESH_TOKEN: token_object['refresh_token'],
+        return {CONF_TOKEN: token_object[YANDEX_FIELD_ACCESS_TOKEN],
+                CONF_REFRESH_TOKEN: token_object[YANDEX_FIELD_REFRESH_TOKEN],
                 CONF_TOKEN_EXPIRES: expire_data.isoformat()}
 
     except Exception as e:
@@ -80,6 +196,465 @@ def _get_auth_string(client_id, client_secret):
     return base64.b64encode(bytes(client_id + ':' + client_secret, 'utf-8')).decode('utf-8')
 
 
+class _CountingReader:
+    """ File wrapper counting really read bytes. Seek over data is free. """
+
+    def __init__(self, file):
+        self._file = file
+        self.bytes_read = 0
+
+    def read(self, size=-1) -> bytes:
+        data = self._file.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+
+def read_backup_json(backup_path: Path, max_bytes: int = BACKUP_JSON_MAX_READ) -> tuple[dict | None, int]:
+    """ Read backup.json from backup tar file.
+
+    Walk tar headers from archive start and skip member data by seek, reading not more than max_bytes.
+    Home Assistant put backup.json first, so usually two blocks read only.
+    When fast path failed, full tarfile scan used (tarfile imported only then).
+    Return backup.json content (None when archive does not contain it) and amount of read bytes.
+    Raise ValueError when file is not valid tar file.
+    """
+    with open(backup_path, 'rb') as file:
+        reader = _CountingReader(file)
+        found, data = _find_backup_json(reader, max_bytes)
+        if found:
+            return data, reader.bytes_read
+
+        _LOGGER.debug("Fast read of %s failed, full scan", backup_path)
+        import tarfile
+        reader.seek(0)
+        try:
+            with tarfile.open(fileobj=reader, mode="r:") as backup_file:
+                try:
+                    data_file = backup_file.extractfile("./backup.json")
+                except KeyError:
+                    data_file = None
+                data = json.loads(data_file.read()) if data_file else None
+        except tarfile.TarError as err:
+            raise ValueError("Invalid tar file: " + str(err)) from err
+        return data, reader.bytes_read
+
+
+def _find_backup_json(reader: _CountingReader, max_bytes: int) -> tuple[bool, dict | None]:
+    """ Find backup.json by tar headers.
+
+    Return found flag and backup.json content. Found flag is True when backup.json read
+    or archive end reached. False means archive must be scanned by tarfile.
+    """
+    long_name = None
+    while reader.bytes_read + TAR_BLOCK_SIZE <= max_bytes:
+        header = reader.read(TAR_BLOCK_SIZE)
+        if len(header) < TAR_BLOCK_SIZE:
+            return False, None
+        if header == TAR_EMPTY_BLOCK:
+            return True, None
+        if not _tar_checksum_valid(header):
+            return False, None
+
+        size = _tar_number(header[124:136])
+        type_flag = header[156:157]
+        data_size = -(-size // TAR_BLOCK_SIZE) * TAR_BLOCK_SIZE
+
+        if type_flag in (TAR_TYPE_GNU_LONG_NAME, TAR_TYPE_PAX_HEADER):
+            if reader.bytes_read + data_size > max_bytes:
+                return False, None
+            long_name = _tar_long_name(type_flag, reader.read(data_size)[:size])
+            continue
+
+        name = long_name if long_name is not None else _tar_member_name(header)
+        long_name = None
+        if name in BACKUP_JSON_NAMES and type_flag in TAR_TYPE_REGULAR:
+            if reader.bytes_read + size > max_bytes:
+                return False, None
+            return True, json.loads(reader.read(size))
+
+        reader.seek(data_size, os.SEEK_CUR)
+
+    return False, None
+
+
+def _tar_number(field: bytes) -> int:
+    """ Parse tar numeric header field (octal or base-256) """
+    if field[0] & 0x80:
+        return int.from_bytes(field[1:], 'big')
+    field = field.strip(b'\0 ')
+    return int(field, 8) if field else 0
+
+
+def _tar_checksum_valid(header: bytes) -> bool:
+    """ Check tar header checksum """
+    try:
+        checksum = _tar_number(header[148:156])
+    except ValueError:
+        return False
+    return checksum == sum(header[:148]) + sum(header[156:]) + 8 * ord(' ')
+
+
+def _tar_member_name(header: bytes) -> str:
+    """ Get member name from ustar header """
+    name = header[0:100].split(b'\0', 1)[0].decode('utf-8', 'replace')
+    if header[257:263] == b'ustar\0':
+        prefix = header[345:500].split(b'\0', 1)[0].decode('utf-8', 'replace')
+        if prefix:
+            name = prefix + '/' + name
+    return name
+
+
+def _tar_long_name(type_flag: bytes, data: bytes) -> str | None:
+    """ Get member name from GNU long name or pax extended header """
+    if type_flag == TAR_TYPE_GNU_LONG_NAME:
+        return data.split(b'\0', 1)[0].decode('utf-8', 'replace')
+
+    for record in data.split(b'\n'):
+        _, _, key_value = record.partition(b' ')
+        key, _, value = key_value.partition(b'=')
+        if key == b'path':
+            return value.decode('utf-8', 'replace')
+    return None
+
+
+def _advise(fd: int, offset: int, length: int, advice: str):
+    """ Advise kernel about file access (posix_fadvise). Ignored where not supported """
+    if hasattr(os, 'posix_fadvise') and hasattr(os, advice):
+        with contextlib.suppress(OSError):
+            os.posix_fadvise(fd, offset, length, getattr(os, advice))
+
+
+def _read_into(file, buffer: memoryview, offset: int, hasher=None) -> int:
+    """ Read file from offset into buffer, update hash and drop read pages from page cache.
+    Return size of read data
+    """
+    read = 0
+    while read < len(buffer) and (size := file.readinto(buffer[read:])):
+        read += size
+    if hasher is not None:
+        hasher.update(buffer[:read])
+    if read:
+        _advise(file.fileno(), offset, read, 'POSIX_FADV_DONTNEED')
+    return read
+
+
+def _open_sequential(source_file: str, start: int):
+    """ Open file without buffering for sequential read from start """
+    file = open(source_file, 'rb', buffering=0)
+    _advise(file.fileno(), start, 0, 'POSIX_FADV_SEQUENTIAL')
+    file.seek(start)
+    return file
+
+
+def _check_chunk_hash(source_file: str, checkpoint: dict) -> bool:
+    """ Check last confirmed chunk of source file is not changed """
+    if checkpoint[JOURNAL_FIELD_CHUNK_HASH] is None:
+        return True
+    hasher = hashlib.sha256()
+    with open(source_file, 'rb') as file:
+        file.seek(checkpoint[JOURNAL_FIELD_CHUNK_START])
+        remain = checkpoint[JOURNAL_FIELD_OFFSET] - checkpoint[JOURNAL_FIELD_CHUNK_START]
+        while remain > 0 and (chunk := file.read(min(UPLOAD_CHUNK_SIZE, remain))):
+            hasher.update(chunk)
+            remain -= len(chunk)
+    return hasher.hexdigest() == checkpoint[JOURNAL_FIELD_CHUNK_HASH]
+
+
+def _write_chunk(file, chunk: bytes, hasher=None):
+    """ Write chunk to file and update hash """
+    file.write(chunk)
+    if hasher is not None:
+        hasher.update(chunk)
+
+
+def _write_chunk_at(fd: int, chunk: bytes, offset: int, hasher=None):
+    """ Write chunk to file descriptor at offset and update hash """
+    view = memoryview(chunk)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+    if hasher is not None:
+        hasher.update(chunk)
+
+
+def _hash_file_range(fd: int, offset: int, size: int, hasher):
+    """ Update hash by file range """
+    end = offset + size
+    while offset < end:
+        chunk = os.pread(fd, min(UPLOAD_CHUNK_SIZE, end - offset), offset)
+        if not chunk:
+            raise OSError("Unexpected end of file")
+        hasher.update(chunk)
+        offset += len(chunk)
+
+
+def _preallocate(fd: int, size: int):
+    """ Allocate file space before parallel writes """
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except (AttributeError, OSError):
+        # Not supported by platform or file system
+        os.ftruncate(fd, size)
+
+
+def _tar_member_ends(file, file_size: int) -> list[int]:
+    """ Get offsets of tar member ends. Only headers read, member data skipped """
+    ends = []
+    position = 0
+    while position + TAR_BLOCK_SIZE <= file_size:
+        file.seek(position)
+        header = file.read(TAR_BLOCK_SIZE)
+        if header == TAR_EMPTY_BLOCK or not _tar_checksum_valid(header):
+            break
+        try:
+            size = _tar_number(header[124:136])
+        except ValueError:
+            break
+        position += TAR_BLOCK_SIZE + -(-size // TAR_BLOCK_SIZE) * TAR_BLOCK_SIZE
+        ends.append(min(position, file_size))
+    return ends
+
+
+def split_backup_chunks(backup_path: Path, max_size: int = DEDUP_CHUNK_SIZE) -> list[tuple[str, int]]:
+    """ Split backup tar to chunks. Return SHA256 and size of every chunk.
+
+    Chunk boundaries defined by archive content: every tar member starts new chunk,
+    so changed member does not shift chunks of other members. Member split by max size from member start,
+    so changed member header or archive header (backup date, gzip time) changes only first chunk of member.
+    """
+    with open(backup_path, 'rb') as file:
+        file_size = os.fstat(file.fileno()).st_size
+        boundaries = []
+        start = 0
+        for end in _tar_member_ends(file, file_size) + [file_size]:
+            while end - start > max_size:
+                start += max_size
+                boundaries.append(start)
+            if end > start:
+                boundaries.append(end)
+                start = end
+
+        chunks = []
+        file.seek(0)
+        position = 0
+        for end in boundaries:
+            hasher = hashlib.sha256()
+            size = end - position
+            while position < end:
+                data = file.read(min(UPLOAD_CHUNK_SIZE, end - position))
+                if not data:
+                    raise OSError("File changed while splitting " + str(backup_path))
+                hasher.update(data)
+                position += len(data)
+            chunks.append((hasher.hexdigest(), size))
+    return chunks
+
+
+@functools.cache
+def _get_zstandard():
+    """ Optional zstandard module, imported on first use """
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def available_compressions() -> list[str]:
+    """ Compressions supported in current environment """
+    result = [COMPRESSION_NONE, COMPRESSION_GZIP]
+    if _get_zstandard() is not None:
+        result.append(COMPRESSION_ZSTD)
+    return result
+
+
+class StreamCompressor:
+    """ Streaming compressor of upload body. Keep input and output sizes """
+
+    def __init__(self, compression: str):
+        self.compression = compression
+        if compression == COMPRESSION_ZSTD:
+            self._compressor = _get_zstandard().ZstdCompressor().compressobj()
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+        self.input_size = 0
+        self.output_size = 0
+
+    @property
+    def ratio(self) -> float:
+        """ Output size to input size """
+        return round(self.output_size / self.input_size, 3) if self.input_size else 1.0
+
+    def compress(self, data: bytes) -> bytes:
+        """ Compress data chunk """
+        self.input_size += len(data)
+        result = self._compressor.compress(data)
+        self.output_size += len(result)
+        return result
+
+    def flush(self) -> bytes:
+        """ Finish compression """
+        result = self._compressor.flush()
+        self.output_size += len(result)
+        return result
+
+
+class StreamDecompressor:
+    """ Streaming decompressor of downloaded file """
+
+    def __init__(self, compression: str):
+        if compression == COMPRESSION_ZSTD:
+            zstandard = _get_zstandard()
+            if zstandard is None:
+                raise HomeAssistantError("zstandard package required for decompression")
+            self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+        else:
+            self._decompressor = zlib.decompressobj(GZIP_WBITS)
+
+    def decompress(self, data: bytes) -> bytes:
+        """ Decompress data chunk """
+        return self._decompressor.decompress(data)
+
+    def flush(self) -> bytes:
+        """ Finish decompression """
+        return self._decompressor.flush()
+
+
+class _SegmentCipher:
+    """ AES-256-GCM cipher of numbered file segments.
+
+    Key derived from passphrase and file salt with PBKDF2. Segment nonce is file nonce prefix and segment number,
+    authenticated data is file header and last segment flag, so reordered, dropped or appended segments
+    and truncated file are detected.
+    """
+
+    def __init__(self, passphrase: str, header: bytes):
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+        salt = header[len(ENCRYPTION_MAGIC) + 1:len(ENCRYPTION_MAGIC) + 1 + ENCRYPTION_SALT_SIZE]
+        key = PBKDF2HMAC(hashes.SHA256(), 32, salt, ENCRYPTION_KDF_ITERATIONS).derive(passphrase.encode())
+        self._aes_gcm = AESGCM(key)
+        self._header = header
+        self._segment = 0
+
+    def _next_nonce(self, last: bool) -> tuple[bytes, bytes]:
+        """ Nonce and authenticated data of next segment """
+        nonce = self._header[-ENCRYPTION_NONCE_PREFIX_SIZE:] + struct.pack('>I', self._segment)
+        self._segment += 1
+        return nonce, self._header + (b'\x01' if last else b'\x00')
+
+    def seal(self, data: bytes, last: bool) -> bytes:
+        """ Encrypt segment, tag appended """
+        nonce, associated_data = self._next_nonce(last)
+        return self._aes_gcm.encrypt(nonce, data, associated_data)
+
+    def open(self, data: bytes, last: bool) -> bytes:
+        """ Decrypt segment and check its tag """
+        from cryptography.exceptions import InvalidTag
+
+        nonce, associated_data = self._next_nonce(last)
+        try:
+            return self._aes_gcm.decrypt(nonce, data, associated_data)
+        except InvalidTag:
+            raise HomeAssistantError("Backup decryption failed: wrong encryption key or damaged file") from None
+
+
+class StreamEncryptor:
+    """ Streaming encryption of upload body.
+
+    Body is header (magic, version, salt, nonce prefix) and segments of ENCRYPTION_SEGMENT_SIZE bytes
+    encrypted with AES-256-GCM, each with tag. Last segment kept until flush, so it is marked as last
+    even when it is empty. Key derivation is slow, create in executor.
+    """
+
+    def __init__(self, passphrase: str):
+        header = (ENCRYPTION_MAGIC + bytes([ENCRYPTION_VERSION]) + os.urandom(ENCRYPTION_SALT_SIZE)
+                  + os.urandom(ENCRYPTION_NONCE_PREFIX_SIZE))
+        self._cipher = _SegmentCipher(passphrase, header)
+        self._pending_header = header
+        self._buffer = bytearray()
+
+    @staticmethod
+    def encrypted_size(size: int) -> int:
+        """ Size of encrypted data of given size """
+        segments = max(1, -(-size // ENCRYPTION_SEGMENT_SIZE))
+        return ENCRYPTION_HEADER_SIZE + size + segments * ENCRYPTION_TAG_SIZE
+
+    def encrypt(self, data: bytes) -> bytes:
+        """ Encrypt data chunk. Return header and completed segments """
+        self._buffer += data
+        result = bytearray(self._pending_header)
+        self._pending_header = b''
+        while len(self._buffer) > ENCRYPTION_SEGMENT_SIZE:
+            result += self._cipher.seal(bytes(self._buffer[:ENCRYPTION_SEGMENT_SIZE]), False)
+            del self._buffer[:ENCRYPTION_SEGMENT_SIZE]
+        return bytes(result)
+
+    def flush(self) -> bytes:
+        """ Finish encryption. Return last segment """
+        result = self._pending_header + self._cipher.seal(bytes(self._buffer), True)
+        self._pending_header = b''
+        self._buffer = bytearray()
+        return result
+
+
+class StreamDecryptor:
+    """ Streaming decryption of downloaded file encrypted by StreamEncryptor.
+
+    Key derived when header received, so decrypt in executor.
+    """
+
+    def __init__(self, passphrase: str):
+        self._passphrase = passphrase
+        self._cipher: _SegmentCipher | None = None
+        self._buffer = bytearray()
+
+    def decrypt(self, data: bytes) -> bytes:
+        """ Decrypt data chunk. Return data of completed segments except last one """
+        self._buffer += data
+        if self._cipher is None:
+            if len(self._buffer) < ENCRYPTION_HEADER_SIZE:
+                return b''
+            header = bytes(self._buffer[:ENCRYPTION_HEADER_SIZE])
+            if not header.startswith(ENCRYPTION_MAGIC + bytes([ENCRYPTION_VERSION])):
+                raise HomeAssistantError("Unsupported encrypted file format")
+            self._cipher = _SegmentCipher(self._passphrase, header)
+            del self._buffer[:ENCRYPTION_HEADER_SIZE]
+        result = bytearray()
+        segment_size = ENCRYPTION_SEGMENT_SIZE + ENCRYPTION_TAG_SIZE
+        while len(self._buffer) > segment_size:
+            result += self._cipher.open(bytes(self._buffer[:segment_size]), False)
+            del self._buffer[:segment_size]
+        return bytes(result)
+
+    def flush(self) -> bytes:
+        """ Finish decryption. Return data of last segment """
+        if self._cipher is None:
+            raise HomeAssistantError("Backup decryption failed: encrypted file truncated")
+        result = self._cipher.open(bytes(self._buffer), True)
+        self._buffer = bytearray()
+        return result
+
+
+@dataclass
+class DownloadPart:
+    """ Part of restored file: whole remote file or range of remote file, written at offset """
+    path: str
+    offset: int
+    size: int
+    start: int | None = None
+    sha256: str | None = None
+
+
 @dataclass
 class Backup:
     """Backup class."""
@@ -94,47 +669,1633 @@ class Backup:
 class BackupObserver:
     """Backup observer.
     Base on core BackupManager
+
+    Backup metadata is cached in persistent index keyed by file path.
+    Index entry is valid while inode, size and mtime of file not changed,
+    so tar file opened only when it is new or changed.
+
+    One observer shared by all integration entries with same backup directory.
+    Concurrent scans and hash calculations of same file are coalesced, scan result cached
+    while backup directory not changed.
     """
 
     def __init__(self, hass: HomeAssistant, backup_dir: str) -> None:
         """ Initialize the backup observer."""
         self.hass = hass
         self.backup_dir = Path(hass.config.path("backups")) if backup_dir is None else Path(backup_dir)
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_BACKUP_INDEX + '.' + slugify(str(self.backup_dir)))
+        self._index: dict[str, dict] | None = None
+        self._last_scan_bytes_read = 0
+        self._scan: asyncio.Task | None = None
+        self._cached_backups: dict[str, Backup] | None = None
+        self._cached_dir_mtime: int | None = None
+        self._cached_time = 0.0
+        self._hashing: dict[Path, asyncio.Task] = {}
+
+    @property
+    def last_scan_bytes_read(self) -> int:
+        """ Amount of bytes read from backup files by last scan """
+        return self._last_scan_bytes_read
 
     async def get_backups(self) -> dict[str, Backup]:
-        """ Get data of stored backup files."""
-        backups = await self.hass.async_add_executor_job(self._read_backups)
+        """ Get data of stored backup files.
+
+        Concurrent calls share one scan. Result cached while backup directory mtime not changed,
+        but not longer than BACKUP_SCAN_CACHE_SEC (changes inside existing file do not change directory mtime).
+        """
+        if self._scan is None:
+            self._scan = asyncio.create_task(self._async_scan())
+        scan = self._scan
+        try:
+            backups = await asyncio.shield(scan)
+        finally:
+            if self._scan is scan and scan.done():
+                self._scan = None
+        return dict(backups)
+
+    def invalidate(self):
+        """ Drop cached scan result """
+        self._cached_backups = None
+
+    async def _async_scan(self) -> dict[str, Backup]:
+        """ Scan backup directory or return cached result """
+        if self._index is None:
+            self._index = await self._async_load_index()
+
+        dir_mtime = await self.hass.async_add_executor_job(self._get_dir_mtime)
+        if (self._cached_backups is not None and dir_mtime is not None and dir_mtime == self._cached_dir_mtime
+                and time.monotonic() - self._cached_time < BACKUP_SCAN_CACHE_SEC):
+            _LOGGER.debug("Use cached scan of %s", self.backup_dir)
+            return self._cached_backups
+
+        backups, index_changed = await self.hass.async_add_executor_job(self._read_backups)
+
+        if index_changed:
+            await self._async_save_index()
 
         _LOGGER.debug("Loaded %s backups", len(backups))
 
+        self._cached_backups = backups
+        self._cached_dir_mtime = dir_mtime
+        self._cached_time = time.monotonic()
         return backups
 
-    def _read_backups(self) -> dict[str, Backup]:
-        """Read backups from disk."""
-        _LOGGER.debug("Check %s path", self.backup_dir)
+    def _get_dir_mtime(self) -> int | None:
+        try:
+            return self.backup_dir.stat().st_mtime_ns
+        except OSError:
+            return None
 
-        _LOGGER.debug("Size %s", len(list(self.backup_dir.glob("*"))))
+    async def get_backup(self, backup_path: Path) -> Backup | None:
+        """ Get data of one backup file without directory scan """
+        if self._index is None:
+            self._index = await self._async_load_index()
 
-        for backup_path in self.backup_dir.glob("*"):
-            _LOGGER.debug("backup_path %s", backup_path)
+        backup, index_changed = await self.hass.async_add_executor_job(self._read_one_backup, backup_path)
 
+        if index_changed:
+            await self._async_save_index()
+
+        return backup
+
+    async def get_backup_hashes(self, backups: list[Backup]) -> dict[Path, str]:
+        """ Get MD5 of backup files.
+
+        Hash cached in backup index, so file read only when it is new or changed.
+        Files which can not be read are absent in result.
+        """
+        result = {}
+        index_changed = False
+        for backup in backups:
+            index_entry = self._index.get(str(backup.path)) if self._index is not None else None
+            if index_entry is None:
+                continue
+            if index_entry.get(INDEX_FIELD_MD5) is None:
+                md5 = await self._async_calculate_md5(backup.path, index_entry)
+                if md5 is None:
+                    continue
+                index_entry[INDEX_FIELD_MD5] = md5
+                index_changed = True
+            result[backup.path] = index_entry[INDEX_FIELD_MD5]
+
+        if index_changed:
+            await self._async_save_index()
+
+        return result
+
+    async def _async_calculate_md5(self, backup_path: Path, index_entry: dict) -> str | None:
+        """ Calculate MD5 of file, concurrent calls for same file share one calculation """
+        task = self._hashing.get(backup_path)
+        if task is None:
+            task = self.hass.async_add_executor_job(self._calculate_md5, backup_path, index_entry)
+            self._hashing[backup_path] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if task.done() and self._hashing.get(backup_path) is task:
+                del self._hashing[backup_path]
+
+    def _calculate_md5(self, backup_path: Path, index_entry: dict) -> str | None:
+        """ Calculate MD5 of file. Return None when file changed after scan or can not be read """
+        _LOGGER.debug("Calculate MD5 of %s", backup_path)
+        try:
+            hasher = hashlib.md5()
+            with open(backup_path, 'rb') as file:
+                while chunk := file.read(UPLOAD_CHUNK_SIZE):
+                    hasher.update(chunk)
+            if not self._is_index_entry_valid(index_entry, backup_path.stat()):
+                _LOGGER.debug("Backup %s changed while hashing", backup_path)
+                return None
+        except OSError as err:
+            _LOGGER.warning("Unable to read backup %s: %s", backup_path, err)
+            return None
+        return hasher.hexdigest()
+
+    async def _async_save_index(self):
+        """ Save copy of backup index. Index changed by scans in executor while store serializes saved data """
+        await self._store.async_save({INDEX_FIELD_BACKUPS: {path: dict(index_entry)
+                                                            for path, index_entry in self._index.items()}})
+
+    async def _async_load_index(self) -> dict[str, dict]:
+        """ Load backup index from storage """
+        try:
+            data = await self._store.async_load()
+        except Exception:
+            _LOGGER.warning("Unable to load backup index, full scan required", exc_info=True)
+            data = None
+
+        if not data:
+            return {}
+        return data.get(INDEX_FIELD_BACKUPS, {})
+
+    def _read_backups(self) -> tuple[dict[str, Backup], bool]:
+        """Read backups from disk.
+
+        Only new or changed tar files are opened. Index entries for deleted files are evicted,
+        missing backup directory (e.g. unmounted storage) read as empty with index kept.
+        Return backups and index changed flag.
+        """
+        _LOGGER.debug("Check %s path", self.backup_dir)
+
+        index_changed = False
+        bytes_read = 0
+        seen_paths = set()
         backups: dict[str, Backup] = {}
-        for backup_path in self.backup_dir.glob("*.tar"):
-            try:
-                with tarfile.open(backup_path, "r:") as backup_file:
-                    if data_file := backup_file.extractfile("./backup.json"):
-                        data = json.loads(data_file.read())
-                        backup = Backup(
-                            slug=data["slug"],
-                            name=data["name"],
-                            date=data["date"],
-                            path=backup_path,
-                            size=round(backup_path.stat().st_size / 1_048_576, 2),
-                        )
+
+        try:
+            with os.scandir(self.backup_dir) as dir_entries:
+                for dir_entry in dir_entries:
+                    if not dir_entry.name.endswith(".tar"):
+                        continue
+                    try:
+                        if not dir_entry.is_file():
+                            continue
+                        stat = dir_entry.stat()
+                    except OSError as err:
+                        _LOGGER.warning("Unable to stat backup %s: %s", dir_entry.path, err)
+                        continue
+
+                    seen_paths.add(dir_entry.path)
+                    backup, entry_changed, entry_bytes_read = self._get_indexed_backup(dir_entry.path, stat)
+                    index_changed |= entry_changed
+                    bytes_read += entry_bytes_read
+                    if backup is not None:
                         backups[backup.slug] = backup
-            except (OSError, tarfile.TarError, json.JSONDecodeError, KeyError) as err:
-                _LOGGER.warning("Unable to read backup %s: %s", backup_path, err)
-        return backups
+        except FileNotFoundError:
+            _LOGGER.warning("Backup directory %s not found", self.backup_dir)
+            self._last_scan_bytes_read = 0
+            return {}, False
+
+        for deleted_path in [path for path in self._index if path not in seen_paths]:
+            _LOGGER.debug("Evict deleted backup %s from index", deleted_path)
+            del self._index[deleted_path]
+            index_changed = True
+
+        self._last_scan_bytes_read = bytes_read
+        _LOGGER.debug("Scan read %d bytes from backup files", bytes_read)
+
+        return backups, index_changed
+
+    def _read_one_backup(self, backup_path: Path) -> tuple[Backup | None, bool]:
+        """ Read one backup from disk. Return backup and index changed flag """
+        try:
+            stat = backup_path.stat()
+        except OSError as err:
+            _LOGGER.warning("Unable to stat backup %s: %s", backup_path, err)
+            return None, False
+        backup, index_changed, _ = self._get_indexed_backup(str(backup_path), stat)
+        return backup, index_changed
+
+    def _get_indexed_backup(self, path: str, stat: os.stat_result) -> tuple[Backup | None, bool, int]:
+        """ Get backup by index entry. Entry updated when file is new or changed.
+
+        Return backup, index changed flag and amount of read bytes.
+        """
+        index_changed = False
+        bytes_read = 0
+        index_entry = self._index.get(path)
+        if not self._is_index_entry_valid(index_entry, stat):
+            index_entry, bytes_read = self._read_backup_info(Path(path), stat)
+            if index_entry is None:
+                return None, False, bytes_read
+            self._index[path] = index_entry
+            index_changed = True
+
+        if index_entry[INDEX_FIELD_SLUG] is None:
+            # Tar file without backup.json
+            return None, index_changed, bytes_read
+
+        backup = Backup(
+            slug=index_entry[INDEX_FIELD_SLUG],
+            name=index_entry[INDEX_FIELD_NAME],
+            date=index_entry[INDEX_FIELD_DATE],
+            path=Path(path),
+            size=round(stat.st_size / 1_048_576, 2),
+        )
+        return backup, index_changed, bytes_read
+
+    @staticmethod
+    def _is_index_entry_valid(index_entry: dict | None, stat: os.stat_result) -> bool:
+        """ Check index entry is actual for file """
+        return (index_entry is not None
+                and index_entry[INDEX_FIELD_INODE] == stat.st_ino
+                and index_entry[INDEX_FIELD_SIZE] == stat.st_size
+                and index_entry[INDEX_FIELD_MTIME] == stat.st_mtime_ns)
+
+    @staticmethod
+    def _read_backup_info(backup_path: Path, stat: os.stat_result) -> tuple[dict | None, int]:
+        """ Read backup.json from tar file and form index entry.
+
+        Return index entry and amount of read bytes.
+        Index entry is None when file can not be read. Such file will be checked on next scan.
+        """
+        _LOGGER.debug("Read backup info %s", backup_path)
+        index_entry = {INDEX_FIELD_INODE: stat.st_ino,
+                       INDEX_FIELD_SIZE: stat.st_size,
+                       INDEX_FIELD_MTIME: stat.st_mtime_ns,
+                       INDEX_FIELD_SLUG: None,
+                       INDEX_FIELD_NAME: None,
+                       INDEX_FIELD_DATE: None}
+        try:
+            data, bytes_read = read_backup_json(backup_path)
+            if data is not None:
+                index_entry[INDEX_FIELD_SLUG] = data["slug"]
+                index_entry[INDEX_FIELD_NAME] = data["name"]
+                index_entry[INDEX_FIELD_DATE] = data["date"]
+        except (OSError, ValueError, KeyError) as err:
+            _LOGGER.warning("Unable to read backup %s: %s", backup_path, err)
+            return None, 0
+        return index_entry, bytes_read
+
+
+class BackupWatcher:
+    """ Watch backup directory with inotify (Linux only).
+
+    Events read on event loop from non-blocking inotify descriptor.
+    New backup reported when its size and mtime not changed during settle time,
+    so backup still written by Home Assistant is not reported.
+    """
+
+    def __init__(self, hass: HomeAssistant, backup_dir: Path, callback):
+        self._hass = hass
+        self._backup_dir = backup_dir
+        self._callback = callback
+        self._fd: int | None = None
+        self._pending: dict[str, asyncio.TimerHandle] = {}
+        self._checks: set[asyncio.Task] = set()
+
+    @property
+    def is_started(self) -> bool:
+        """ Watcher started """
+        return self._fd is not None
+
+    def start(self) -> bool:
+        """ Start watching. Return False when inotify is not available """
+        if self._fd is not None:
+            return True
+        try:
+            # Symbols of running process include libc, find_library would run external tools
+            libc = ctypes.CDLL(None, use_errno=True)
+            inotify_init1 = libc.inotify_init1
+            inotify_add_watch = libc.inotify_add_watch
+        except (OSError, AttributeError):
+            _LOGGER.warning("inotify is not available, backup directory is not watched")
+            return False
+
+        fd = inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            _LOGGER.warning("Unable to init inotify: %s", os.strerror(ctypes.get_errno()))
+            return False
+        if inotify_add_watch(fd, os.fsencode(self._backup_dir), IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            _LOGGER.warning("Unable to watch %s: %s", self._backup_dir, os.strerror(ctypes.get_errno()))
+            os.close(fd)
+            return False
+
+        self._fd = fd
+        self._hass.loop.add_reader(fd, self._read_events)
+        _LOGGER.info("Watch backup directory %s", self._backup_dir)
+        return True
+
+    def stop(self):
+        """ Stop watching """
+        for handle in self._pending.values():
+            handle.cancel()
+        self._pending = {}
+        for task in self._checks:
+            task.cancel()
+        self._checks = set()
+        if self._fd is not None:
+            self._hass.loop.remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = None
+
+    def _read_events(self):
+        """ Read inotify events and schedule check of changed backup files """
+        try:
+            data = os.read(self._fd, INOTIFY_READ_SIZE)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(data):
+            _, mask, _, name_length = INOTIFY_EVENT.unpack_from(data, offset)
+            name = data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + name_length].rstrip(b'\0')
+            offset += INOTIFY_EVENT.size + name_length
+            if mask & IN_Q_OVERFLOW:
+                _LOGGER.warning("Backup directory events lost, new backups uploaded on next synchronization")
+                continue
+            file_name = os.fsdecode(name)
+            if file_name.endswith('.tar') and not file_name.startswith('.'):
+                self._schedule_check(str(self._backup_dir / file_name), None)
+
+    def _schedule_check(self, path: str, last_stat: tuple[int, int] | None):
+        """ Check file after settle time """
+        if (handle := self._pending.pop(path, None)) is not None:
+            handle.cancel()
+        self._pending[path] = self._hass.loop.call_later(WATCH_SETTLE_SEC, self._start_check, path, last_stat)
+
+    def _start_check(self, path: str, last_stat: tuple[int, int] | None):
+        """ Run check task, running checks cancelled on stop """
+        task = self._hass.async_create_task(self._async_check(path, last_stat))
+        self._checks.add(task)
+        task.add_done_callback(self._checks.discard)
+
+    async def _async_check(self, path: str, last_stat: tuple[int, int] | None):
+        """ Report file when it is not changed since last check """
+        try:
+            stat = await self._hass.async_add_executor_job(os.stat, path)
+        except FileNotFoundError:
+            self._pending.pop(path, None)
+            return
+        current_stat = (stat.st_size, stat.st_mtime_ns)
+        if current_stat != last_stat:
+            self._schedule_check(path, current_stat)
+            return
+        self._pending.pop(path, None)
+        _LOGGER.debug("New backup %s", path)
+        self._callback(Path(path))
+
+
+@dataclass
+class RemoteFile:
+    """Yandex Disk resource."""
+
+    name: str
+    type: str
+    modified: datetime.datetime
+    size: int = 0
+    md5: str | None = None
+    sha256: str | None = None
+    custom_properties: dict | None = None
+
+    @property
+    def content_md5(self) -> str | None:
+        """ MD5 of local file content. For compressed or encrypted file MD5 of source file """
+        if self.custom_properties and PROPERTY_SOURCE_MD5 in self.custom_properties:
+            return self.custom_properties[PROPERTY_SOURCE_MD5]
+        if self.name.endswith((*COMPRESSION_SUFFIXES.values(), MANIFEST_SUFFIX, ENCRYPTION_SUFFIX)):
+            return None
+        return self.md5
+
+    @property
+    def compression_ratio(self) -> float | None:
+        """ Compression ratio of compressed file """
+        return self.custom_properties.get(PROPERTY_COMPRESSION_RATIO) if self.custom_properties else None
+
+    @classmethod
+    def from_resource(cls, resource: dict) -> "RemoteFile":
+        """ Create from Yandex Disk REST API resource """
+        return cls(name=resource["name"],
+                   type=resource["type"],
+                   modified=dt_util.parse_datetime(resource["modified"]),
+                   size=resource.get("size", 0),
+                   md5=resource.get("md5"),
+                   sha256=resource.get("sha256"),
+                   custom_properties=resource.get("custom_properties"))
+
+    def as_resource(self) -> dict:
+        """ Convert to Yandex Disk REST API resource """
+        return {"name": self.name,
+                "type": self.type,
+                "modified": self.modified.isoformat(),
+                "size": self.size,
+                "md5": self.md5,
+                "sha256": self.sha256,
+                "custom_properties": self.custom_properties}
+
+
+class RemoteFolderState:
+    """ Local model of remote Yandex Disk directory.
+
+    Model updated by successful uploads, copies and deletes and persisted in storage.
+    Full directory listing needed only when model is stale or mismatch detected.
+    Only newest files kept with all fields, older files (overflow) kept by name.
+    """
+
+    def __init__(self, hass: HomeAssistant, unique_id):
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_REMOTE_STATE + '.' + str(unique_id))
+        self._loaded = False
+        self._path = None
+        self._reconciled: datetime.datetime | None = None
+        self._files: dict[str, RemoteFile] = {}
+        self._overflow: list[str] = []
+
+    @property
+    def files(self) -> list[RemoteFile]:
+        """ Newest files sorted from newest to oldest """
+        return sorted(self._files.values(), key=lambda file: file.modified, reverse=True)
+
+    @property
+    def names(self) -> list[str]:
+        """ All file names, newest files first """
+        return [file.name for file in self.files] + self._overflow
+
+    @property
+    def overflow(self) -> list[str]:
+        """ Names of older files, kept without dates """
+        return self._overflow
+
+    @property
+    def file_amount(self) -> int:
+        """ Amount of all files """
+        return len(self._files) + len(self._overflow)
+
+    async def async_load(self):
+        """ Load model from storage """
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            data = await self._store.async_load()
+            if not data:
+                return
+            path = data[STATE_FIELD_PATH]
+            # Invalidated model saved without reconcile date, it needs reconcile
+            reconciled = data.get(STATE_FIELD_RECONCILED)
+            reconciled = dt_util.parse_datetime(reconciled) if reconciled else None
+            files = {resource["name"]: RemoteFile.from_resource(resource) for resource in data[STATE_FIELD_FILES]}
+            overflow = data.get(STATE_FIELD_OVERFLOW, [])
+        except Exception:
+            _LOGGER.warning("Unable to load remote directory state", exc_info=True)
+            return
+        self._path = path
+        self._reconciled = reconciled
+        self._files = files
+        self._overflow = overflow
+
+    def needs_reconcile(self, path: str, interval: datetime.timedelta) -> bool:
+        """ Check model is stale, invalidated or belongs to another directory """
+        return (self._reconciled is None
+                or self._path != path
+                or dt_util.utcnow() - self._reconciled > interval)
+
+    def invalidate(self):
+        """ Mark model mismatched with remote directory """
+        _LOGGER.debug("Remote directory state invalidated")
+        self._reconciled = None
+
+    @property
+    def is_invalidated(self) -> bool:
+        """ Model mismatched with remote directory """
+        return self._reconciled is None
+
+    def replace(self, path: str, files: list[RemoteFile], overflow: list[str]):
+        """ Replace model by full directory listing """
+        self._path = path
+        self._reconciled = dt_util.utcnow()
+        self._files = {file.name: file for file in files}
+        self._overflow = overflow
+        self._schedule_save()
+
+    def add(self, file: RemoteFile):
+        """ Add uploaded or copied file """
+        self._files[file.name] = file
+        if file.name in self._overflow:
+            self._overflow.remove(file.name)
+        self._schedule_save()
+
+    def remove(self, name: str):
+        """ Remove deleted file """
+        if self._files.pop(name, None) is None and name in self._overflow:
+            self._overflow.remove(name)
+        self._schedule_save()
+
+    def get(self, name: str) -> RemoteFile | None:
+        """ Get file by name """
+        return self._files.get(name)
+
+    def _schedule_save(self):
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY_SEC)
+
+    def _data_to_save(self) -> dict:
+        return {STATE_FIELD_PATH: self._path,
+                STATE_FIELD_RECONCILED: self._reconciled.isoformat() if self._reconciled else None,
+                STATE_FIELD_FILES: [file.as_resource() for file in self._files.values()],
+                STATE_FIELD_OVERFLOW: self._overflow}
+
+
+class RetentionPolicy:
+    """ Which remote files kept: newest files and grandfather-father-son rules.
+
+    Daily, weekly and monthly rules keep newest file of every of last N days, ISO weeks and months
+    having files (local time). File kept when any rule keeps it.
+    """
+
+    def __init__(self, keep_last: int, keep_daily: int = 0, keep_weekly: int = 0, keep_monthly: int = 0):
+        self.keep_last = keep_last
+        self._rules = [(keep, period) for keep, period in ((keep_daily, self._day),
+                                                           (keep_weekly, self._week),
+                                                           (keep_monthly, self._month)) if keep > 0]
+
+    @staticmethod
+    def _day(modified: datetime.datetime):
+        return modified.date()
+
+    @staticmethod
+    def _week(modified: datetime.datetime):
+        return modified.isocalendar()[:2]
+
+    @staticmethod
+    def _month(modified: datetime.datetime):
+        return modified.year, modified.month
+
+    @property
+    def has_calendar_rules(self) -> bool:
+        """ Daily, weekly or monthly rule set, so modification dates of all files needed """
+        return bool(self._rules)
+
+    def plan(self, files: list[RemoteFile], overflow: list[str], protected=()) -> list[str]:
+        """ Get names of files to delete in one pass over directory state.
+
+        files - files sorted from newest to oldest, overflow - names of older files without dates,
+        protected - names of files which are kept anyway (just uploaded).
+        With calendar rules files without dates are kept. Files without dates are older than all files,
+        but are not ordered, so they deleted only when all kept newest files are among files.
+        """
+        kept_periods = [set() for _ in self._rules]
+        result = []
+        for index, file in enumerate(files):
+            keep = index < self.keep_last or file.name in protected
+            modified = dt_util.as_local(file.modified)
+            for (amount, period), periods in zip(self._rules, kept_periods):
+                key = period(modified)
+                if key not in periods and len(periods) < amount:
+                    periods.add(key)
+                    keep = True
+            if not keep:
+                result.append(file.name)
+        if not self._rules and self.keep_last <= len(files):
+            result += [name for name in overflow if name not in protected]
+        return result
+
+
+@dataclass
+class UploadProgress:
+    """Upload progress of one file."""
+
+    name: str
+    size: int
+    sent: int = 0
+    state: str = UPLOAD_STATE_WAITING
+    error: str | None = None
+    uploaded_size: int | None = None
+    compression_ratio: float | None = None
+    skipped: int = 0
+    properties: dict | None = None
+    destinations: dict[str, "UploadProgress"] = field(default_factory=dict)
+
+    @property
+    def percent(self) -> float:
+        """ Sent percent """
+        return round(self.sent * 100 / self.size, 1) if self.size else 100.0
+
+
+class YandexDiskApiError(Exception):
+    """ Yandex Disk REST API error """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+    @property
+    def is_not_found(self) -> bool:
+        """ Resource not found """
+        return self.status == HTTP_NOT_FOUND
+
+    @property
+    def is_retryable(self) -> bool:
+        """ Server side or throttling error """
+        return self.status >= 500 or self.status == HTTP_TOO_MANY_REQUESTS
+
+
+class UploadVerificationError(HomeAssistantError):
+    """ Uploaded file does not match source file """
+
+
+class BandwidthSchedule:
+    """ Upload bandwidth limit by time of day.
+
+    Windows written as "HH:MM-HH:MM=KB;..." with limit in KB/s, 0 means unlimited.
+    Window can cross midnight. Default limit used out of windows.
+    """
+
+    def __init__(self, default_limit: int, windows: str = ''):
+        self._default_rate = default_limit * 1024
+        self._windows = [(start, end, limit * 1024) for start, end, limit in self.parse_windows(windows)]
+
+    @staticmethod
+    def parse_windows(windows: str) -> list[tuple[datetime.time, datetime.time, int]]:
+        """ Parse windows. Raise ValueError when windows format is wrong """
+        result = []
+        for window in windows.split(';'):
+            window = window.strip()
+            if not window:
+                continue
+            try:
+                period, limit = window.split('=')
+                start, end = period.split('-')
+                result.append((datetime.time.fromisoformat(start.strip()),
+                               datetime.time.fromisoformat(end.strip()),
+                               int(limit)))
+            except ValueError as e:
+                raise ValueError(f"Wrong bandwidth window '{window}', expected HH:MM-HH:MM=KB") from e
+            if result[-1][2] < 0:
+                raise ValueError(f"Wrong bandwidth limit in window '{window}'")
+        return result
+
+    def rate(self, now: datetime.time) -> int:
+        """ Limit in bytes per second for time of day, 0 means unlimited """
+        for start, end, rate in self._windows:
+            if start <= end:
+                if start <= now < end:
+                    return rate
+            elif now >= start or now < end:
+                return rate
+        return self._default_rate
+
+
+class TokenBucket:
+    """ Token bucket rate limiter for uploads.
+
+    Shared by all uploads of integration entry, so limit applies to sum of concurrent uploads.
+    Bucket capacity is one second of traffic. Consumer goes into debt and sleeps until debt repaid.
+    """
+
+    def __init__(self, schedule: BandwidthSchedule):
+        self._schedule = schedule
+        self._tokens = 0.0
+        self._updated: float | None = None
+        self._started: float | None = None
+        self._finished: float | None = None
+        self._bytes = 0
+
+    @property
+    def effective_throughput(self) -> float:
+        """ Reached throughput in bytes per second since reset """
+        if self._started is None or self._finished is None or self._finished <= self._started:
+            return 0.0
+        return self._bytes / (self._finished - self._started)
+
+    @property
+    def current_limit(self) -> int:
+        """ Current limit in bytes per second, 0 means unlimited """
+        return self._schedule.rate(dt_util.now().time())
+
+    def set_schedule(self, schedule: BandwidthSchedule):
+        """ Change bandwidth schedule, running uploads use new limit """
+        self._schedule = schedule
+
+    def reset_statistics(self):
+        """ Reset throughput statistics before new upload run """
+        self._started = None
+        self._finished = None
+        self._bytes = 0
+
+    async def async_consume(self, amount: int):
+        """ Take tokens for amount of bytes, wait when bucket is empty """
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self._started is None:
+            self._started = now
+
+        rate = self.current_limit
+        if rate:
+            if self._updated is not None:
+                self._tokens = min(float(rate), self._tokens + (now - self._updated) * rate)
+            self._updated = now
+            self._tokens -= amount
+            if self._tokens < 0:
+                await asyncio.sleep(-self._tokens / rate)
+        else:
+            self._tokens = 0.0
+            self._updated = now
+
+        self._bytes += amount
+        self._finished = loop.time()
+
+
+class BufferPool:
+    """ Reusable read buffers of uploads with hard memory ceiling.
+
+    Shared by all uploads of integration entry. Reader holds at most two buffers (chunk being sent and next chunk),
+    so pool has two buffers for every parallel reader, buffer size reduced to fit memory limit
+    (not below UPLOAD_BUFFER_MIN_SIZE). When limit is too small for all readers, readers reduced,
+    uploads run with at most readers parallel uploads. Pool has at least two buffers.
+    Buffers allocated on first use and reused, reader waits for free buffer when all buffers in use.
+    """
+
+    def __init__(self, memory_limit: int, readers: int = 1):
+        self.memory_limit = memory_limit
+        self.requested_readers = readers
+        self.readers = max(1, min(readers, memory_limit // (2 * UPLOAD_BUFFER_MIN_SIZE)))
+        self.buffer_size = max(UPLOAD_BUFFER_MIN_SIZE, min(UPLOAD_CHUNK_SIZE, memory_limit // (2 * self.readers)))
+        self._max_buffers = max(2 * self.readers, memory_limit // self.buffer_size)
+        self._semaphore = asyncio.Semaphore(self._max_buffers)
+        self._free: list[bytearray] = []
+        self._in_use = 0
+        self.peak_bytes = 0
+
+    @property
+    def limit(self) -> int:
+        """ Memory ceiling of buffers, bytes """
+        return self._max_buffers * self.buffer_size
+
+    @property
+    def in_use_bytes(self) -> int:
+        """ Size of buffers in use """
+        return self._in_use * self.buffer_size
+
+    def reset_statistics(self):
+        """ Reset peak use before new upload run """
+        self.peak_bytes = self.in_use_bytes
+
+    async def acquire(self) -> bytearray:
+        """ Get free buffer, wait when all buffers in use """
+        await self._semaphore.acquire()
+        buffer = self._free.pop() if self._free else bytearray(self.buffer_size)
+        self._in_use += 1
+        self.peak_bytes = max(self.peak_bytes, self.in_use_bytes)
+        return buffer
+
+    def release(self, buffer: bytearray):
+        """ Return buffer to pool """
+        self._in_use -= 1
+        self._free.append(buffer)
+        self._semaphore.release()
+
+
+class SyncTelemetry:
+    """ Timing spans and counters of synchronization runs.
+
+    Counters of running synchronization reset on run start, result of last finished run kept for sensors.
+    API calls made outside of synchronization (directory listing by button) counted in totals only.
+    """
+
+    def __init__(self):
+        self.spans: dict[str, float] = {}
+        self.file_durations: dict[str, float] = {}
+        self.api_calls = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self.api_calls_total = 0
+        self.retries_total = 0
+        self.last_run: dict = {}
+
+    def count_api_call(self):
+        """ Count REST API request """
+        self.api_calls += 1
+        self.api_calls_total += 1
+
+    def count_retry(self):
+        """ Count request retry """
+        self.retries += 1
+        self.retries_total += 1
+
+    @contextlib.contextmanager
+    def span(self, name: str):
+        """ Measure duration of synchronization stage """
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.spans[name] = round(time.monotonic() - started, 3)
+
+    @contextlib.contextmanager
+    def run(self):
+        """ Measure synchronization run. Result kept in last run """
+        self.spans = {}
+        self.file_durations = {}
+        self.api_calls = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            upload_duration = self.spans.get('upload', 0)
+            self.last_run = {
+                "finished": dt_util.utcnow().isoformat(),
+                "duration": round(time.monotonic() - started, 3),
+                "bytes_sent": self.bytes_sent,
+                "speed_mb_s": round(self.bytes_sent / 1_048_576 / upload_duration, 2) if upload_duration else 0.0,
+                "api_calls": self.api_calls,
+                "retries": self.retries,
+                "spans": dict(self.spans),
+                "files": dict(self.file_durations)
+            }
+
+
+class UploadJournal:
+    """ Checkpoint journal of chunked uploads.
+
+    Keep upload link, confirmed offset and hash of last confirmed chunk for every destination file,
+    so interrupted upload resumed from last confirmed chunk, also after Home Assistant restart.
+    """
+
+    def __init__(self, hass: HomeAssistant, unique_id):
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_UPLOAD_JOURNAL + '.' + str(unique_id))
+        self._checkpoints: dict[str, dict] | None = None
+
+    async def async_load(self):
+        """ Load journal from storage """
+        if self._checkpoints is not None:
+            return
+        data = await self._store.async_load()
+        self._checkpoints = data.get(JOURNAL_FIELD_CHECKPOINTS, {}) if data else {}
+
+    def get_checkpoint(self, destination_file: str, stat: os.stat_result) -> dict | None:
+        """ Get checkpoint when it is actual for source file and upload link is not expired """
+        checkpoint = self._checkpoints.get(destination_file)
+        if checkpoint is None:
+            return None
+        if (checkpoint[JOURNAL_FIELD_INODE] != stat.st_ino
+                or checkpoint[JOURNAL_FIELD_SIZE] != stat.st_size
+                or checkpoint[JOURNAL_FIELD_MTIME] != stat.st_mtime_ns):
+            _LOGGER.debug("Source file of %s changed, checkpoint dropped", destination_file)
+            return None
+        link_created = dt_util.parse_datetime(checkpoint[JOURNAL_FIELD_LINK_CREATED])
+        if dt_util.utcnow() - link_created > UPLOAD_LINK_LIFETIME:
+            _LOGGER.debug("Upload link of %s expired, checkpoint dropped", destination_file)
+            return None
+        return checkpoint
+
+    @staticmethod
+    def new_checkpoint(link: dict, stat: os.stat_result) -> dict:
+        """ Create checkpoint for new upload link """
+        return {JOURNAL_FIELD_HREF: link['href'],
+                JOURNAL_FIELD_METHOD: link.get('method', 'PUT'),
+                JOURNAL_FIELD_LINK_CREATED: dt_util.utcnow().isoformat(),
+                JOURNAL_FIELD_INODE: stat.st_ino,
+                JOURNAL_FIELD_SIZE: stat.st_size,
+                JOURNAL_FIELD_MTIME: stat.st_mtime_ns,
+                JOURNAL_FIELD_OFFSET: 0,
+                JOURNAL_FIELD_CHUNK_START: 0,
+                JOURNAL_FIELD_CHUNK_HASH: None}
+
+    async def async_save_checkpoint(self, destination_file: str, checkpoint: dict):
+        """ Save checkpoint """
+        self._checkpoints[destination_file] = checkpoint
+        await self._store.async_save({JOURNAL_FIELD_CHECKPOINTS: self._checkpoints})
+
+    async def async_remove_checkpoint(self, destination_file: str):
+        """ Remove checkpoint of finished or failed upload """
+        if self._checkpoints.pop(destination_file, None) is not None:
+            await self._store.async_save({JOURNAL_FIELD_CHECKPOINTS: self._checkpoints})
+
+
+class TokenManager:
+    """ OAuth token of integration entry.
+
+    Token refreshed in background REFRESH_TOKEN_DELTA before expiry (failed refresh retried every
+    REFRESH_TOKEN_RETRY_SEC), so callers get cached token without waiting.
+    Caller waits only when token already expired. Concurrent refreshes serialized by lock.
+    """
+
+    def __init__(self, hass: HomeAssistant, get_session, config: dict, on_refresh):
+        self._hass = hass
+        self._get_session = get_session
+        self._on_refresh = on_refresh
+        self._lock = asyncio.Lock()
+        self._cancel_refresh = None
+        self._started = False
+        self._expires: datetime.datetime | None = None
+        self.set_config(config)
+
+    @property
+    def token(self) -> str:
+        """ Cached token """
+        return self._token
+
+    @property
+    def expires(self) -> datetime.datetime:
+        """ Token expiry date (local time) """
+        return self._expires
+
+    def set_config(self, config: dict):
+        """ Set token info from integration config. Expiry date parsed once, refresh rescheduled when it changed """
+        expires = datetime.datetime.fromisoformat(config.get(CONF_TOKEN_EXPIRES, datetime.datetime.now().isoformat()))
+        expires_changed = expires != self._expires
+        self._token = config[CONF_TOKEN]
+        self._refresh_token = config[CONF_REFRESH_TOKEN]
+        self._expires = expires
+        self._client_id = config[CONF_CLIENT_ID]
+        self._client_secret = config[CONF_CLIENT_SECRET]
+        if self._started and expires_changed:
+            self._schedule_refresh()
+
+    def start(self):
+        """ Start background refresh """
+        self._started = True
+        self._schedule_refresh()
+
+    def stop(self):
+        """ Stop background refresh """
+        self._started = False
+        if self._cancel_refresh is not None:
+            self._cancel_refresh()
+            self._cancel_refresh = None
+
+    def needs_refresh(self) -> bool:
+        """ Token lifetime go out bound """
+        return datetime.datetime.now() + REFRESH_TOKEN_DELTA > self._expires
+
+    async def async_ensure_valid(self):
+        """ Refresh token when it is expired, valid token returned without waiting """
+        if datetime.datetime.now() >= self._expires:
+            _LOGGER.debug("Token expired, wait refresh")
+            await self.async_refresh()
+
+    async def async_refresh(self):
+        """ Refresh token when needed. Token refreshed by concurrent call is not refreshed again """
+        async with self._lock:
+            if not self.needs_refresh():
+                _LOGGER.debug("Refresh token not needed")
+                return
+            result = await async_refresh_token(self._get_session(), self._refresh_token,
+                                               self._client_id, self._client_secret)
+            self._token = result[CONF_TOKEN]
+            self._refresh_token = result[CONF_REFRESH_TOKEN]
+            self._expires = datetime.datetime.fromisoformat(result[CONF_TOKEN_EXPIRES])
+            await self._on_refresh(result)
+
+    def _schedule_refresh(self, min_delay: float = 0):
+        """ Schedule background refresh at REFRESH_TOKEN_DELTA before expiry, not earlier than min delay """
+        if self._cancel_refresh is not None:
+            self._cancel_refresh()
+        delay = max((self._expires - REFRESH_TOKEN_DELTA - datetime.datetime.now()).total_seconds(), min_delay)
+        _LOGGER.debug("Token refresh scheduled in %d sec", delay)
+        self._cancel_refresh = async_call_later(self._hass, delay, self._handle_refresh_time)
+
+    async def _handle_refresh_time(self, _now):
+        self._cancel_refresh = None
+        try:
+            await self.async_refresh()
+        except Exception:
+            _LOGGER.warning("Background token refresh failed, retry in %d sec", REFRESH_TOKEN_RETRY_SEC)
+            self._schedule_refresh(REFRESH_TOKEN_RETRY_SEC)
+            return
+        # New token lifetime may be shorter than REFRESH_TOKEN_DELTA
+        self._schedule_refresh(REFRESH_TOKEN_RETRY_SEC)
+
+
+class YandexDiskClient:
+    """ Async Yandex Disk REST API client.
+
+    All requests run on event loop. Upload body streamed from disk by chunks,
+    executor used only for short file reads.
+    """
+
+    def __init__(self, hass: HomeAssistant, session: aiohttp.ClientSession, token: str,
+                 base_url: str = URL_DISK_API, rate_limiter: TokenBucket | None = None,
+                 telemetry: SyncTelemetry | None = None, buffer_pool: BufferPool | None = None):
+        self._hass = hass
+        self._session = session
+        self._rate_limiter = rate_limiter
+        self._telemetry = telemetry
+        self._buffer_pool = buffer_pool or BufferPool(DEFAULT_UPLOAD_MEMORY_LIMIT * 1_048_576)
+        self._token = token
+        self._headers = {HEAD_AUTHORIZATION: 'OAuth ' + token}
+        self._base_url = base_url
+
+    @property
+    def token(self) -> str:
+        """ Token used by client """
+        return self._token
+
+    async def iter_dir(self, path: str, page_size: int = LIST_PAGE_SIZE):
+        """ Iterate directory page by page. Only used resource fields requested """
+        fields = ','.join('_embedded.items.' + field for field in LIST_FIELDS)
+        offset = 0
+        while True:
+            resource = await self._with_retries(self._api_request, 'GET', '/resources',
+                                                {'path': path, 'limit': page_size, 'offset': offset,
+                                                 'fields': fields})
+            items = resource.get('_embedded', {}).get('items', [])
+            for item in items:
+                yield RemoteFile.from_resource(item)
+            offset += len(items)
+            if len(items) < page_size:
+                return
+
+    async def upload(self, source_file: str, destination_file: str, progress: UploadProgress | None = None,
+                     compression: str = COMPRESSION_NONE, encryption_key: str = '') -> StreamCompressor | None:
+        """ Upload file with overwrite, file encrypted when encryption key set.
+        Return compressor with compression statistic for compressed upload
+        """
+        return await self._with_retries(self._upload, source_file, destination_file, progress, compression,
+                                        encryption_key)
+
+    async def upload_fanout(self, source_file: str, destinations: dict[str, UploadProgress],
+                            progress: UploadProgress | None = None, compression: str = COMPRESSION_NONE,
+                            encryption_key: str = '') -> tuple[StreamCompressor | None, dict[str, Exception]]:
+        """ Upload file with overwrite to several destinations with one read of file.
+
+        File read (compressed and encrypted) once, every chunk put to bounded queue of every destination,
+        so slowest destination sets read speed. Queued chunks kept in buffers of buffer pool.
+        Destination failed during shared read uploaded again separately with retries.
+        Return compressor with compression statistic for compressed upload and errors of failed destinations.
+        """
+        failed: dict[str, Exception] = {}
+        links = {}
+        for destination_file in destinations:
+            try:
+                links[destination_file] = await self._with_retries(
+                    self._api_request, 'GET', '/resources/upload', {'path': destination_file, 'overwrite': 'true'})
+            except Exception as e:
+                failed[destination_file] = e
+
+        compressor = None
+        read_complete = False
+        if links:
+            compressor, read_complete = await self._fanout_shared_read(source_file, destinations, links, failed,
+                                                                       progress, compression, encryption_key)
+
+        for destination_file in list(failed):
+            if self._telemetry is not None:
+                self._telemetry.count_retry()
+            try:
+                retry_compressor = await self._with_retries(self._upload, source_file, destination_file,
+                                                            destinations[destination_file], compression,
+                                                            encryption_key)
+                del failed[destination_file]
+                if not read_complete:
+                    compressor = retry_compressor
+            except Exception as e:
+                failed[destination_file] = e
+        return compressor, failed
+
+    async def _fanout_shared_read(self, source_file: str, destinations: dict[str, UploadProgress], links: dict,
+                                  failed: dict[str, Exception], progress: UploadProgress | None, compression: str,
+                                  encryption_key: str) -> tuple[StreamCompressor | None, bool]:
+        """ Read file once and put it to upload links of destinations, failed destinations added to failed.
+
+        Chunk copied into buffers of buffer pool (by buffer size pieces), piece shared by queues of all destinations
+        and buffer returned to pool when every destination sent it or stopped.
+        Read stopped when every destination failed. Return compressor and whole file read flag.
+        """
+        pool = self._buffer_pool
+        position = 0
+
+        async def count_chunks(chunks):
+            nonlocal position
+            async for chunk in chunks:
+                position += len(chunk)
+                yield chunk
+
+        def release(holder: list):
+            """ Drop reference to queued piece buffer, last reference returns buffer to pool """
+            holder[1] -= 1
+            if not holder[1]:
+                pool.release(holder[0])
+
+        def drain(queue: asyncio.Queue):
+            while not queue.empty():
+                if isinstance(item := queue.get_nowait(), tuple):
+                    release(item[2])
+
+        # Chunks copied at once, so file reader returns buffer before next read
+        reader = self._read_file_chunks(source_file, progress, hold_previous=False)
+        body, compressor, headers = await self._prepare_body(count_chunks(reader), source_file, compression,
+                                                             encryption_key)
+        queues = {destination_file: asyncio.Queue(FANOUT_QUEUE_CHUNKS) for destination_file in links}
+        read_error: Exception | None = None
+        read_complete = False
+
+        async def read():
+            nonlocal read_error, read_complete
+            try:
+                async for chunk in body:
+                    chunk = memoryview(chunk)
+                    for start in range(0, len(chunk), pool.buffer_size):
+                        piece = chunk[start:start + pool.buffer_size]
+                        buffer = await pool.acquire()
+                        buffer[:len(piece)] = piece
+                        # Reader keeps reference while piece put to queues
+                        holder = [buffer, 1]
+                        for destination_file, queue in list(queues.items()):
+                            holder[1] += 1
+                            await queue.put((memoryview(buffer)[:len(piece)], position, holder))
+                            if destination_file not in queues:
+                                # Destination stopped while reader waited for free place in its queue
+                                drain(queue)
+                        release(holder)
+                    if not queues:
+                        # Every destination failed, rest of file not needed
+                        break
+                else:
+                    read_complete = True
+            except Exception as e:
+                read_error = e
+            finally:
+                # Stopped reader returns its buffers to pool at once
+                await body.aclose()
+                await reader.aclose()
+            for queue in list(queues.values()):
+                await queue.put(read_error)
+
+        async def send(destination_file: str):
+            queue = queues[destination_file]
+
+            async def stream():
+                while (item := await queue.get()) is not None:
+                    if isinstance(item, Exception):
+                        raise item
+                    piece, sent, holder = item
+                    try:
+                        yield piece
+                    finally:
+                        # Piece written to connection when next piece requested
+                        release(holder)
+                    destinations[destination_file].sent = sent
+
+            link = links[destination_file]
+            pieces = stream()
+            try:
+                await self._put(link['href'], link.get('method', 'PUT'), self._throttle_chunks(pieces), headers)
+            except Exception as e:
+                _LOGGER.warning("Error upload file %s to %s: %s", source_file, destination_file, e)
+                failed[destination_file] = e
+            finally:
+                # Piece being sent returned to pool. Request writer still waiting for next piece
+                # is cancelled by response release
+                if not pieces.ag_running:
+                    await pieces.aclose()
+                # Stop feeding destination. Reader waits for free place in its queue at most once
+                del queues[destination_file]
+                drain(queue)
+
+        await asyncio.gather(read(), *[send(destination_file) for destination_file in links])
+        return compressor, read_complete
+
+    async def upload_range(self, source_file: str, destination_file: str, start: int, end: int,
+                           progress: UploadProgress | None = None):
+        """ Upload file range as separate file with overwrite """
+        await self._with_retries(self._upload_range, source_file, destination_file, start, end, progress)
+
+    async def upload_data(self, data: bytes, destination_file: str):
+        """ Upload small data as file with overwrite """
+        await self._with_retries(self._upload_data, data, destination_file)
+
+    async def get_download_link(self, path: str) -> dict:
+        """ Get file download link """
+        return await self._with_retries(self._api_request, 'GET', '/resources/download', {'path': path})
+
+    async def download(self, path: str):
+        """ Download file by chunks """
+        link = await self.get_download_link(path)
+        async with self._session.request(link.get('method', 'GET'), link['href'],
+                                         timeout=TRANSFER_TIMEOUT) as response:
+            if response.status >= 400:
+                raise YandexDiskApiError(response.status, await response.text())
+            async for chunk in response.content.iter_chunked(UPLOAD_CHUNK_SIZE):
+                yield chunk
+
+    async def download_part(self, fd: int, part: DownloadPart, link: dict | None = None) -> str:
+        """ Download file part and write it to file at part offset. Return SHA256 of part.
+
+        Part downloaded again from start on retry, so partial write is overwritten.
+        """
+        return await self._with_retries(self._download_part, fd, part, link)
+
+    async def download_data(self, path: str) -> bytes:
+        """ Download small file """
+        return await self._with_retries(self._download_data, path)
+
+    async def get_resource(self, path: str) -> RemoteFile:
+        """ Get file information """
+        return RemoteFile.from_resource(await self._with_retries(self._api_request, 'GET', '/resources',
+                                                                 {'path': path, 'fields': ','.join(LIST_FIELDS)}))
+
+    async def make_dir(self, path: str):
+        """ Create directory when it does not exist """
+        try:
+            await self._with_retries(self._api_request, 'PUT', '/resources', {'path': path})
+        except YandexDiskApiError as e:
+            if e.status != HTTP_CONFLICT:
+                raise
+
+    async def set_properties(self, path: str, properties: dict):
+        """ Set custom properties of resource """
+        await self._with_retries(self._api_request, 'PATCH', '/resources', {'path': path},
+                                 {'custom_properties': properties})
+
+    async def copy(self, from_path: str, path: str):
+        """ Copy file on server side with overwrite. Wait for asynchronous operation """
+        link = await self._with_retries(self._api_request, 'POST', '/resources/copy',
+                                        {'from': from_path, 'path': path, 'overwrite': 'true'})
+        if '/operations/' in link.get('href', ''):
+            await self._wait_operation(link['href'])
+
+    async def _wait_operation(self, href: str):
+        """ Wait for asynchronous operation finish """
+        while True:
+            operation = await self._with_retries(self._api_request, 'GET', href, {})
+            status = operation.get('status')
+            if status == OPERATION_STATUS_SUCCESS:
+                return
+            if status == OPERATION_STATUS_FAILED:
+                raise YandexDiskApiError(HTTP_OK, "Operation failed " + href)
+            await asyncio.sleep(OPERATION_POLL_INTERVAL_SEC)
+
+    async def remove(self, path: str, permanently: bool = False) -> str | None:
+        """ Remove file. Operation is not waited when Yandex Disk process it asynchronously,
+        link of asynchronous operation returned
+        """
+        link = await self._with_retries(self._api_request, 'DELETE', '/resources',
+                                        {'path': path, 'permanently': str(permanently).lower()})
+        href = link.get('href', '')
+        return href if '/operations/' in href else None
+
+    async def wait_operations(self, hrefs: list[str]) -> dict[str, Exception]:
+        """ Wait for asynchronous operations finish. All unfinished operations polled every interval,
+        not more than DELETE_PARALLELISM requests at once.
+
+        Return errors of failed operations.
+        """
+        pending = list(hrefs)
+        errors = {}
+        semaphore = asyncio.Semaphore(DELETE_PARALLELISM)
+
+        async def poll(href: str) -> dict:
+            async with semaphore:
+                return await self._with_retries(self._api_request, 'GET', href, {})
+
+        while pending:
+            results = await asyncio.gather(*[poll(href) for href in pending], return_exceptions=True)
+            unfinished = []
+            for href, result in zip(pending, results):
+                if isinstance(result, Exception):
+                    errors[href] = result
+                elif result.get('status') == OPERATION_STATUS_FAILED:
+                    errors[href] = YandexDiskApiError(HTTP_OK, "Operation failed " + href)
+                elif result.get('status') != OPERATION_STATUS_SUCCESS:
+                    unfinished.append(href)
+            pending = unfinished
+            if pending:
+                await asyncio.sleep(OPERATION_POLL_INTERVAL_SEC)
+        return errors
+
+    async def upload_chunked(self, source_file: str, destination_file: str, journal: UploadJournal,
+                             progress: UploadProgress | None = None, md5: str | None = None):
+        """ Upload file with overwrite by chunks.
+
+        Every confirmed chunk saved in journal. Retry and next call resume upload from last confirmed chunk.
+        File assembled by server from chunks checked by size and MD5 (when set).
+        """
+        await journal.async_load()
+        await self._with_retries(self._upload_chunked, source_file, destination_file, journal, progress)
+        size = (await self._hass.async_add_executor_job(os.stat, source_file)).st_size
+        resource = await self.get_resource(destination_file)
+        if resource.size != size or (md5 is not None and resource.md5 != md5):
+            await journal.async_remove_checkpoint(destination_file)
+            raise UploadVerificationError(f"Uploaded file {destination_file} does not match source file: "
+                                          f"size {resource.size} of {size}, MD5 {resource.md5} instead of {md5}")
+
+    async def _upload(self, source_file: str, destination_file: str, progress: UploadProgress | None,
+                      compression: str = COMPRESSION_NONE, encryption_key: str = '') -> StreamCompressor | None:
+        """ Get upload link and put file """
+        link = await self._api_request('GET', '/resources/upload', {'path': destination_file, 'overwrite': 'true'})
+
+        body, compressor, headers = await self._prepare_body(self._read_file_chunks(source_file, progress),
+                                                             source_file, compression, encryption_key)
+        await self._put(link['href'], link.get('method', 'PUT'), self._throttle_chunks(body), headers)
+        return compressor
+
+    async def _prepare_body(self, body, source_file: str, compression: str, encryption_key: str
+                            ) -> tuple[object, StreamCompressor | None, dict]:
+        """ Add compression and encryption stages to upload body. Return body, compressor and headers.
+
+        Compressed file size is unknown, so compressed body sent with chunked transfer encoding.
+        Encrypted file size calculated from source file size.
+        """
+        compressor = None
+        headers = {}
+        if compression == COMPRESSION_NONE:
+            size = (await self._hass.async_add_executor_job(os.stat, source_file)).st_size
+            headers[HEAD_CONTENT_LENGTH] = str(StreamEncryptor.encrypted_size(size) if encryption_key else size)
+        else:
+            compressor = StreamCompressor(compression)
+            body = self._compress_chunks(body, compressor)
+        if encryption_key:
+            encryptor = await self._hass.async_add_executor_job(StreamEncryptor, encryption_key)
+            body = self._encrypt_chunks(body, encryptor)
+        return body, compressor, headers
+
+    async def _upload_range(self, source_file: str, destination_file: str, start: int, end: int,
+                            progress: UploadProgress | None):
+        """ Get upload link and put file range """
+        link = await self._api_request('GET', '/resources/upload', {'path': destination_file, 'overwrite': 'true'})
+        await self._put(link['href'], link.get('method', 'PUT'),
+                        self._throttle_chunks(self._read_file_chunks(source_file, progress, start, end)),
+                        {HEAD_CONTENT_LENGTH: str(end - start)})
+
+    async def _upload_data(self, data: bytes, destination_file: str):
+        """ Get upload link and put data """
+        link = await self._api_request('GET', '/resources/upload', {'path': destination_file, 'overwrite': 'true'})
+        await self._put(link['href'], link.get('method', 'PUT'), data, {HEAD_CONTENT_LENGTH: str(len(data))})
+
+    async def _download_part(self, fd: int, part: DownloadPart, link: dict | None) -> str:
+        """ Get download link when it is not set and write file or file range to file """
+        if link is None:
+            link = await self._api_request('GET', '/resources/download', {'path': part.path})
+        headers = {} if part.start is None else {HEAD_RANGE: f'bytes={part.start}-{part.start + part.size - 1}'}
+        hasher = hashlib.sha256()
+        offset = part.offset
+        async with self._session.request(link.get('method', 'GET'), link['href'], headers=headers,
+                                         timeout=TRANSFER_TIMEOUT) as response:
+            if response.status >= 400:
+                raise YandexDiskApiError(response.status, await response.text())
+            if part.start is not None and response.status != HTTP_PARTIAL_CONTENT:
+                raise YandexDiskApiError(response.status, "Range request not supported")
+            async for chunk in response.content.iter_chunked(UPLOAD_CHUNK_SIZE):
+                await self._hass.async_add_executor_job(_write_chunk_at, fd, chunk, offset, hasher)
+                offset += len(chunk)
+        if offset - part.offset != part.size:
+            raise aiohttp.ClientPayloadError(f"Received {offset - part.offset} of {part.size} bytes of {part.path}")
+        return hasher.hexdigest()
+
+    async def _download_data(self, path: str) -> bytes:
+        """ Download file to memory """
+        return b''.join([chunk async for chunk in self.download(path)])
+
+    async def _upload_chunked(self, source_file: str, destination_file: str, journal: UploadJournal,
+                              progress: UploadProgress | None):
+        """ Resume upload from journal checkpoint or start new upload, put file by chunks """
+        stat = await self._hass.async_add_executor_job(os.stat, source_file)
+        if stat.st_size == 0:
+            await self._upload(source_file, destination_file, progress)
+            return
+
+        checkpoint = journal.get_checkpoint(destination_file, stat)
+        if checkpoint is not None and not await self._hass.async_add_executor_job(_check_chunk_hash, source_file,
+                                                                                   checkpoint):
+            _LOGGER.debug("Last confirmed chunk of %s changed, checkpoint dropped", destination_file)
+            checkpoint = None
+
+        if checkpoint is None:
+            link = await self._api_request('GET', '/resources/upload',
+                                           {'path': destination_file, 'overwrite': 'true'})
+            checkpoint = journal.new_checkpoint(link, stat)
+            await journal.async_save_checkpoint(destination_file, checkpoint)
+        else:
+            _LOGGER.info("Resume upload %s from %d bytes", destination_file, checkpoint[JOURNAL_FIELD_OFFSET])
+
+        try:
+            while checkpoint[JOURNAL_FIELD_OFFSET] < stat.st_size:
+                start = checkpoint[JOURNAL_FIELD_OFFSET]
+                end = min(start + UPLOAD_RESUME_CHUNK_SIZE, stat.st_size)
+                hasher = hashlib.sha256()
+                await self._put(checkpoint[JOURNAL_FIELD_HREF], checkpoint[JOURNAL_FIELD_METHOD],
+                                self._throttle_chunks(
+                                    self._read_file_chunks(source_file, progress, start, end, hasher)),
+                                {HEAD_CONTENT_LENGTH: str(end - start),
+                                 HEAD_CONTENT_RANGE: f'bytes {start}-{end - 1}/{stat.st_size}'})
+                checkpoint[JOURNAL_FIELD_OFFSET] = end
+                checkpoint[JOURNAL_FIELD_CHUNK_START] = start
+                checkpoint[JOURNAL_FIELD_CHUNK_HASH] = hasher.hexdigest()
+                await journal.async_save_checkpoint(destination_file, checkpoint)
+        except YandexDiskApiError as e:
+            if not e.is_retryable:
+                # Upload link rejected, next upload starts from beginning
+                await journal.async_remove_checkpoint(destination_file)
+            raise
+
+        await journal.async_remove_checkpoint(destination_file)
+
+    async def _put(self, href: str, method: str, data, headers: dict):
+        """ Put data to upload link """
+        async with self._session.request(method, href, data=data, headers=headers,
+                                         timeout=TRANSFER_TIMEOUT) as response:
+            if response.status >= 400:
+                raise YandexDiskApiError(response.status, await response.text())
+
+    async def _read_file_chunks(self, source_file: str, progress: UploadProgress | None,
+                                start: int = 0, end: int | None = None, hasher=None, hold_previous: bool = True):
+        """ Read file range by chunks into buffers of buffer pool. Every read is short executor job.
+
+        Chunk is memoryview of pool buffer, buffer returned to pool after next chunk consumed,
+        so consumer keeping chunk longer copies it. Consumer copying chunk at once sets hold_previous to False,
+        so buffer returned to pool before next chunk read. Kernel advised about sequential read,
+        read pages dropped from page cache.
+        """
+        if progress is not None:
+            progress.sent = start
+        file = await self._hass.async_add_executor_job(_open_sequential, source_file, start)
+        held: list[bytearray] = []
+        try:
+            position = start
+            while end is None or position < end:
+                buffer = await self._buffer_pool.acquire()
+                held.append(buffer)
+                view = memoryview(buffer)
+                if end is not None:
+                    view = view[:end - position]
+                size = await self._hass.async_add_executor_job(_read_into, file, view, position, hasher)
+                if not size:
+                    break
+                yield view[:size]
+                position += size
+                if progress is not None:
+                    progress.sent += size
+                if len(held) > (1 if hold_previous else 0):
+                    self._buffer_pool.release(held.pop(0))
+        finally:
+            for buffer in held:
+                self._buffer_pool.release(buffer)
+            await self._hass.async_add_executor_job(file.close)
+
+    async def _compress_chunks(self, chunks, compressor: StreamCompressor):
+        """ Compress chunks in executor """
+        async for chunk in chunks:
+            if data := await self._hass.async_add_executor_job(compressor.compress, chunk):
+                yield data
+        if data := await self._hass.async_add_executor_job(compressor.flush):
+            yield data
+
+    async def _encrypt_chunks(self, chunks, encryptor: StreamEncryptor):
+        """ Encrypt chunks in executor """
+        async for chunk in chunks:
+            if data := await self._hass.async_add_executor_job(encryptor.encrypt, chunk):
+                yield data
+        if data := await self._hass.async_add_executor_job(encryptor.flush):
+            yield data
+
+    async def _throttle_chunks(self, chunks):
+        """ Limit upload bandwidth and count sent bytes """
+        async for chunk in chunks:
+            if self._rate_limiter is not None:
+                await self._rate_limiter.async_consume(len(chunk))
+            if self._telemetry is not None:
+                self._telemetry.bytes_sent += len(chunk)
+            yield chunk
+
+    async def _api_request(self, method: str, url: str, params: dict, json_data: dict | None = None) -> dict:
+        """ Call REST API method """
+        if not url.startswith('http'):
+            url = self._base_url + url
+        if self._telemetry is not None:
+            self._telemetry.count_api_call()
+        async with self._session.request(method, url, params=params, json=json_data, headers=self._headers,
+                                         timeout=aiohttp.ClientTimeout(total=REST_TIMEOUT_SEC)) as response:
+            if response.status >= 400:
+                try:
+                    message = (await response.json()).get('message', response.reason)
+                except (aiohttp.ContentTypeError, ValueError):
+                    message = response.reason
+                raise YandexDiskApiError(response.status, message)
+            if response.status == HTTP_NO_CONTENT:
+                return {}
+            return await response.json()
+
+    async def _with_retries(self, func, *args):
+        """ Call request function with retries on network and server errors """
+        attempt = 0
+        while True:
+            try:
+                return await func(*args)
+            except (aiohttp.ClientError, asyncio.TimeoutError, YandexDiskApiError) as e:
+                attempt += 1
+                if attempt > REQUEST_RETRIES or (isinstance(e, YandexDiskApiError) and not e.is_retryable):
+                    raise
+                _LOGGER.debug("Request failed (%s), retry %d", e, attempt)
+                if self._telemetry is not None:
+                    self._telemetry.count_retry()
+                await asyncio.sleep(REQUEST_RETRY_INTERVAL_SEC)
+
+
+class SingleFlightJob:
+    """ Job which runs not more than once at a time.
+
+    Request during run merged into one queued follow-up run, requests during queued run
+    merged into this queued run. Every caller gets result of run it was merged into.
+    on_change callback called when job state changed.
+    """
+
+    def __init__(self, func, on_change=None):
+        self._func = func
+        self._on_change = on_change
+        self._running: asyncio.Task | None = None
+        self._queued: asyncio.Task | None = None
+        self._last_started: datetime.datetime | None = None
+        self._last_finished: datetime.datetime | None = None
+        self._last_error: str | None = None
+
+    @property
+    def state(self) -> str:
+        """ Job state """
+        if self._queued is not None:
+            return JOB_STATE_QUEUED
+        if self._running is not None:
+            return JOB_STATE_RUNNING
+        return JOB_STATE_IDLE
+
+    @property
+    def info(self) -> dict:
+        """ Job state, last run time and result """
+        return {"state": self.state,
+                "last_started": self._last_started.isoformat() if self._last_started else None,
+                "last_finished": self._last_finished.isoformat() if self._last_finished else None,
+                "last_error": self._last_error}
+
+    async def async_run(self):
+        """ Run job or join running/queued run """
+        if self._queued is None:
+            if self._running is None:
+                self._running = asyncio.create_task(self._run())
+                self._notify()
+                return await asyncio.shield(self._running)
+            _LOGGER.debug("Job is running, queue follow-up run")
+            self._queued = asyncio.create_task(self._run_after(self._running))
+            self._notify()
+        else:
+            _LOGGER.debug("Job follow-up run already queued")
+        return await asyncio.shield(self._queued)
+
+    async def _run_after(self, previous: asyncio.Task):
+        """ Run job after previous run finished """
+        await asyncio.wait([previous])
+        self._queued = None
+        self._running = asyncio.current_task()
+        return await self._run()
+
+    async def _run(self):
+        self._last_started = dt_util.utcnow()
+        try:
+            result = await self._func()
+            self._last_error = None
+            return result
+        except Exception as e:
+            self._last_error = str(e)
+            raise
+        finally:
+            self._last_finished = dt_util.utcnow()
+            if self._running is asyncio.current_task():
+                self._running = None
+            self._notify()
+
+    def _notify(self):
+        if self._on_change is not None:
+            self._on_change()
+
+
+class YaDskCoordinator(DataUpdateCoordinator[dict]):
+    """ Coordinator of integration entry state for entities.
+
+    Data (yandex disk directory, jobs, upload progress, telemetry) is built by YaDsk and pushed on every change,
+    scheduled refresh lists yandex disk directory by refresh interval. Listeners notified only when data changed.
+    """
+
+    def __init__(self, hass: HomeAssistant, update_method):
+        super().__init__(hass, _LOGGER, name=DOMAIN, update_method=update_method)
+        self._notified_state = None
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """ Update listeners when data or update result changed """
+        state = (self.data, self.last_update_success)
+        if state == self._notified_state:
+            return
+        self._notified_state = state
+        super().async_update_listeners()
 
 
 class YaDsk:
@@ -142,14 +2303,11 @@ class YaDsk:
     Contains all method for YandexDisk communication.
     """
     _backup_observer = None
-    _token = None
     _path = None
     _upload_without_suffix = True
     _max_remote_file_amount = 5
     _file_amount = 0
     _file_markdown_list = ""
-    _file_list = []
-    _update_listeners = []
 
     @property
     def file_amount(self):
@@ -161,34 +2319,158 @@ class YaDsk:
         """ File list in Markdown format """
         return self._file_markdown_list
 
+    @property
+    def upload_job_info(self) -> dict:
+        """ Upload job state """
+        return self._upload_job.info
+
+    @property
+    def list_job_info(self) -> dict:
+        """ Directory listing job state """
+        return self._list_job.info
+
+    @property
+    def telemetry(self) -> dict:
+        """ Result of last synchronization run and total API call counters """
+        return dict(self._telemetry.last_run,
+                    api_calls_total=self._telemetry.api_calls_total,
+                    retries_total=self._telemetry.retries_total)
+
+    @property
+    def watch_job_info(self) -> dict:
+        """ New backup upload job state """
+        return self._watch_job.info
+
+    @property
+    def upload_progress(self) -> dict:
+        """ Per file and aggregate progress of last upload """
+        total = sum(progress.size for progress in self._upload_progress.values())
+        sent = sum(progress.sent for progress in self._upload_progress.values())
+        return {
+            "files": {name: {"state": progress.state, "percent": progress.percent, "error": progress.error,
+                             "compression_ratio": progress.compression_ratio,
+                             "skipped_mb": round(progress.skipped / 1_048_576, 2),
+                             "destinations": {path: {"state": destination.state, "percent": destination.percent,
+                                                     "error": destination.error}
+                                              for path, destination in progress.destinations.items()}}
+                      for name, progress in self._upload_progress.items()},
+            "sent_mb": round(sent / 1_048_576, 2),
+            "total_mb": round(total / 1_048_576, 2),
+            "percent": round(sent * 100 / total, 1) if total else 100.0,
+            "throughput_kb_s": round(self._rate_limiter.effective_throughput / 1024, 1),
+            "limit_kb_s": self._rate_limiter.current_limit // 1024,
+            "buffer_peak_kb": self._buffer_pool.peak_bytes // 1024,
+            "buffer_limit_kb": self._buffer_pool.limit // 1024
+        }
+
     def __init__(self, hass: HomeAssistant, backup_observer: BackupObserver, config: dict, unique_id=None):
         self._options = {}
         self._options.update(config)
-        self._token = config[CONF_TOKEN]
-        self._refresh_token_value = config[CONF_REFRESH_TOKEN]
-        self._token_expire_date: datetime.datetime = config.get(CONF_TOKEN_EXPIRES, datetime.datetime.now().isoformat())
         self._path = config[CONF_PATH]
         self._max_remote_file_amount = config[CONF_MAX_REMOTE_FILE]
-        self._client_id = config[CONF_CLIENT_ID]
-        self._client_s = config[CONF_CLIENT_SECRET]
+        # Options saved before validation fix could contain 0
+        self._upload_parallelism = max(1, config.get(CONF_UPLOAD_PARALLELISM, DEFAULT_UPLOAD_PARALLELISM))
+        self._chunked_upload = config.get(CONF_CHUNKED_UPLOAD, DEFAULT_CHUNKED_UPLOAD)
+        self._reconcile_interval = datetime.timedelta(
+            minutes=config.get(CONF_RECONCILE_INTERVAL, DEFAULT_RECONCILE_INTERVAL))
+        self._rate_limiter = TokenBucket(self._get_bandwidth_schedule(config))
+        self._buffer_pool = BufferPool(config.get(CONF_UPLOAD_MEMORY_LIMIT, DEFAULT_UPLOAD_MEMORY_LIMIT) * 1_048_576,
+                                       self._upload_parallelism)
+        self._compression = config.get(CONF_COMPRESSION, DEFAULT_COMPRESSION)
+        self._encryption_key = config.get(CONF_ENCRYPTION_KEY, DEFAULT_ENCRYPTION_KEY)
+        # Deduplicated chunks are not encrypted, so deduplication is not used with encryption
+        self._dedup_upload = config.get(CONF_DEDUP_UPLOAD, DEFAULT_DEDUP_UPLOAD) and not self._encryption_key
+        self._watch_backups = config.get(CONF_WATCH_BACKUPS, DEFAULT_WATCH_BACKUPS)
+        self._mirror_paths = self._get_mirror_paths(config)
+        self._retention = self._get_retention_policy(config)
+        self._permanent_delete = config.get(CONF_PERMANENT_DELETE, DEFAULT_PERMANENT_DELETE)
+        self._refresh_interval = datetime.timedelta(minutes=config.get(CONF_REFRESH_INTERVAL, DEFAULT_REFRESH_INTERVAL))
+        self._current_refresh_interval = self._refresh_interval
         self._hass = hass
+        self._token_manager = TokenManager(hass, self._get_session, config, self._handle_token_refresh)
+        self._file_list: list[str] = []
+        self._file_hashes: dict[str, str] = {}
+        self._update_listeners = []
+        self._upload_progress: dict[str, UploadProgress] = {}
         self._backup_observer = backup_observer
+        self._upload_journal = UploadJournal(hass, unique_id)
+        self._remote_state = RemoteFolderState(hass, unique_id)
+        self._session: aiohttp.ClientSession | None = None
+        self._client: YandexDiskClient | None = None
+        self._operation_lock = asyncio.Lock()
+        self._remote_chunks: set[str] = set()
+        self._telemetry = SyncTelemetry()
+        self._upload_job = SingleFlightJob(self._upload_files, self._publish)
+        self._list_job = SingleFlightJob(self._list_yandex_disk, self._publish)
+        self._pending_backups: set[Path] = set()
+        self._watch_job = SingleFlightJob(self._upload_pending_backups, self._publish)
+        self._watcher = BackupWatcher(hass, backup_observer.backup_dir, self._handle_new_backup)
+        self.coordinator = YaDskCoordinator(hass, self._async_update_data)
+        self._cancel_first_listing = None
+
+    @staticmethod
+    def _get_bandwidth_schedule(config: dict) -> BandwidthSchedule:
+        """ Get upload bandwidth schedule from config """
+        return BandwidthSchedule(config.get(CONF_BANDWIDTH_LIMIT, DEFAULT_BANDWIDTH_LIMIT),
+                                 config.get(CONF_BANDWIDTH_SCHEDULE, DEFAULT_BANDWIDTH_SCHEDULE))
+
+    @staticmethod
+    def _get_retention_policy(config: dict) -> RetentionPolicy:
+        """ Get retention policy from config """
+        return RetentionPolicy(config[CONF_MAX_REMOTE_FILE],
+                               config.get(CONF_KEEP_DAILY, DEFAULT_KEEP_DAILY),
+                               config.get(CONF_KEEP_WEEKLY, DEFAULT_KEEP_WEEKLY),
+                               config.get(CONF_KEEP_MONTHLY, DEFAULT_KEEP_MONTHLY))
+
+    @staticmethod
+    def _get_mirror_paths(config: dict) -> list[str]:
+        """ Get mirror folders from config, folders separated by ';' """
+        return [path.strip() for path in config.get(CONF_MIRROR_PATHS, DEFAULT_MIRROR_PATHS).split(';')
+                if path.strip() and path.strip() != config[CONF_PATH]]
 
     def get_info(self):
         """ Get class info """
-        return "path: " + self._path
+        return "path: " + ", ".join([self._path] + self._mirror_paths)
 
     def update_config(self, config: dict):
         """ Update class when integration config updated """
         self._options = {}
         self._options.update(config)
         self._path = config[CONF_PATH]
+        retention = self._get_retention_policy(config)
+        if (config[CONF_MAX_REMOTE_FILE] != self._max_remote_file_amount
+                or retention.has_calendar_rules != self._retention.has_calendar_rules):
+            # Remote directory state keeps dates of newest files only, their amount depends on these options
+            self._remote_state.invalidate()
         self._max_remote_file_amount = config[CONF_MAX_REMOTE_FILE]
-        self._token = config[CONF_TOKEN]
-        self._refresh_token_value = config[CONF_REFRESH_TOKEN]
-        self._token_expire_date = config.get(CONF_TOKEN_EXPIRES, datetime.datetime.now().isoformat())
-        self._client_id = config[CONF_CLIENT_ID]
-        self._client_s = config[CONF_CLIENT_SECRET]
+        # Options saved before validation fix could contain 0
+        self._upload_parallelism = max(1, config.get(CONF_UPLOAD_PARALLELISM, DEFAULT_UPLOAD_PARALLELISM))
+        self._chunked_upload = config.get(CONF_CHUNKED_UPLOAD, DEFAULT_CHUNKED_UPLOAD)
+        self._reconcile_interval = datetime.timedelta(
+            minutes=config.get(CONF_RECONCILE_INTERVAL, DEFAULT_RECONCILE_INTERVAL))
+        # Called also after background token refresh, running upload keeps limiter and buffer pool
+        self._rate_limiter.set_schedule(self._get_bandwidth_schedule(config))
+        memory_limit = config.get(CONF_UPLOAD_MEMORY_LIMIT, DEFAULT_UPLOAD_MEMORY_LIMIT) * 1_048_576
+        if (memory_limit != self._buffer_pool.memory_limit
+                or self._upload_parallelism != self._buffer_pool.requested_readers):
+            self._buffer_pool = BufferPool(memory_limit, self._upload_parallelism)
+            self._client = None
+        self._compression = config.get(CONF_COMPRESSION, DEFAULT_COMPRESSION)
+        self._encryption_key = config.get(CONF_ENCRYPTION_KEY, DEFAULT_ENCRYPTION_KEY)
+        # Deduplicated chunks are not encrypted, so deduplication is not used with encryption
+        self._dedup_upload = config.get(CONF_DEDUP_UPLOAD, DEFAULT_DEDUP_UPLOAD) and not self._encryption_key
+        self._watch_backups = config.get(CONF_WATCH_BACKUPS, DEFAULT_WATCH_BACKUPS)
+        self._mirror_paths = self._get_mirror_paths(config)
+        self._retention = retention
+        self._permanent_delete = config.get(CONF_PERMANENT_DELETE, DEFAULT_PERMANENT_DELETE)
+        refresh_interval = datetime.timedelta(minutes=config.get(CONF_REFRESH_INTERVAL, DEFAULT_REFRESH_INTERVAL))
+        if refresh_interval != self._refresh_interval:
+            self._refresh_interval = refresh_interval
+            self._current_refresh_interval = refresh_interval
+        # Client rebuilt on token change by _get_client
+        self._token_manager.set_config(config)
+        self._update_watcher()
+        self._publish()
 
         _LOGGER.info("Config updated to %s", self.get_info())
 
@@ -196,120 +2478,773 @@ class YaDsk:
         """Listeners to handle automatic data update."""
         self._update_listeners.append(coro)
 
-    async def list_yandex_disk(self):
-        """ List yandex disk directory. Async call from hass core/ """
+    def _get_session(self) -> aiohttp.ClientSession:
+        """ Get long-lived HTTP session of integration entry """
+        if self._session is None:
+            self._session = async_create_clientsession(self._hass, auto_cleanup=False)
+        return self._session
+
+    def _get_client(self) -> YandexDiskClient:
+        """ Get Yandex Disk client. Client rebuilt only when token changed """
+        if self._client is None or self._client.token != self._token_manager.token:
+            self._client = YandexDiskClient(self._hass, self._get_session(), self._token_manager.token,
+                                            rate_limiter=self._rate_limiter, telemetry=self._telemetry,
+                                            buffer_pool=self._buffer_pool)
+        return self._client
+
+    async def async_close(self):
+        """ Close HTTP session, stop backup directory watching, coordinator and token refresh
+        when integration entry unloaded """
+        self._watcher.stop()
+        self._token_manager.stop()
+        if self._cancel_first_listing is not None:
+            self._cancel_first_listing()
+            self._cancel_first_listing = None
+        await self.coordinator.async_shutdown()
+        self._client = None
+        if self._session is not None:
+            self._session.detach()
+            self._session = None
+
+    async def async_load(self):
+        """ Load persisted state of yandex disk directory and start background token refresh.
+
+        Network is not used during integration setup, first directory listing runs after Home Assistant started.
+        """
+        await self._remote_state.async_load()
+        self._apply_remote_state()
+        self._update_watcher()
+        self._token_manager.start()
+        if self._hass.state == CoreState.running:
+            self._hass.async_create_task(self._async_first_listing())
+        else:
+            self._cancel_first_listing = self._hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STARTED,
+                                                                          self._async_first_listing)
 
-        await self._hass.async_add_executor_job(self._list_yandex_disk)
-        _LOGGER.debug("Count files result: %s", self.file_amount)
+    async def _async_first_listing(self, _event: Event | None = None):
+        """ List yandex disk directory when persisted directory state is stale """
+        self._cancel_first_listing = None
+        if self._remote_state.needs_reconcile(self._path, self._reconcile_interval):
+            await self.list_yandex_disk()
 
-    def _list_yandex_disk(self):
-        """ List yandex disk directory.
+    def get_data(self) -> dict:
+        """ Entity data: yandex disk directory, job states, upload progress and telemetry """
+        return {"file_amount": self.file_amount,
+                "markdown_file_list": self.file_markdown_list,
+                "upload_progress": self.upload_progress,
+                "upload_job": self.upload_job_info,
+                "list_job": self.list_job_info,
+                "watch_job": self.watch_job_info,
+                "telemetry": self.telemetry}
+
+    @callback
+    def _publish(self):
+        """ Push entity data to coordinator """
+        self.coordinator.update_interval = self._get_update_interval()
+        self.coordinator.async_set_updated_data(self.get_data())
+
+    def _get_update_interval(self) -> datetime.timedelta | None:
+        """ Coordinator refresh interval.
+
+        Short interval while job running (upload progress), else current adaptive refresh interval.
+        """
+        if any(job.state != JOB_STATE_IDLE for job in (self._upload_job, self._list_job, self._watch_job)):
+            return PROGRESS_UPDATE_INTERVAL
+        return self._current_refresh_interval or None
 
-        Fill file amount< file Markdown list and file simple list.
+    async def _async_update_data(self) -> dict:
+        """ Coordinator refresh. List yandex disk directory when refresh interval passed.
 
+        Interval doubles (up to REFRESH_INTERVAL_MAX_FACTOR times of option) while directory unchanged
+        and resets to option value when directory changed.
+        Listing skipped while upload runs, upload updates directory state itself.
         """
+        if (self._refresh_interval and not self._operation_lock.locked()
+                and self._remote_state.needs_reconcile(self._path, self._current_refresh_interval)):
+            file_list = self._file_list
+            await self.list_yandex_disk()
+            if self._file_list == file_list:
+                self._current_refresh_interval = min(self._current_refresh_interval * 2,
+                                                     self._refresh_interval * REFRESH_INTERVAL_MAX_FACTOR)
+            else:
+                self._current_refresh_interval = self._refresh_interval
+            _LOGGER.debug("Refresh interval %s", self._current_refresh_interval)
+        self.coordinator.update_interval = self._get_update_interval()
+        return self.get_data()
+
+    def _update_watcher(self):
+        """ Start or stop backup directory watching by option """
+        if self._watch_backups and not self._watcher.is_started:
+            self._watcher.start()
+        elif not self._watch_backups and self._watcher.is_started:
+            self._watcher.stop()
+
+    def _handle_new_backup(self, backup_path: Path):
+        """ Queue upload of new backup found by watcher """
+        self._pending_backups.add(backup_path)
+        self._hass.async_create_task(self._async_run_watch_job())
+
+    async def _async_run_watch_job(self):
+        """ Run new backup upload job. Errors are logged and kept in job state """
         try:
-            y = yadisk.YaDisk(token=self._token)
-            files = self._file_list_processing(y.listdir(self._path))
-            self._file_amount = len(files)
-            self._file_markdown_list = self._get_markdown_files(files, 10)
-            self._file_list = [file.name for file in files]
-            _LOGGER.debug("Count files result: %s", self.file_amount)
+            await self._watch_job.async_run()
         except Exception as e:
-            _LOGGER.error("Error get directory info. Path: %s", self._path, exc_info=True)
+            _LOGGER.warning("Error upload new backups: %s", e)
+
+    async def _upload_pending_backups(self):
+        """ Upload backups found by watcher without backup directory scan and remote directory listing """
+        async with self._operation_lock:
+            backup_paths = self._pending_backups
+            self._pending_backups = set()
+            if backup_paths:
+                with self._telemetry.run():
+                    await self._synchronize_files(backup_paths)
+
+    async def list_yandex_disk(self):
+        """ List yandex disk directory. Async call from hass core.
+
+        Fill file amount, file Markdown list and file simple list.
+        Concurrent calls merged into one run.
+
+        """
+        await self._list_job.async_run()
+
+    async def _list_yandex_disk(self):
+        """ List yandex disk directory """
+        async with self._operation_lock:
+            try:
+                await self._token_manager.async_ensure_valid()
+                await self._reconcile_remote_state()
+            except Exception as e:
+                _LOGGER.error("Error get directory info. Path: %s", self._path, exc_info=True)
+
+    async def _reconcile_remote_state(self):
+        """ Replace remote directory state by full directory listing """
+        await self._remote_state.async_load()
+        # Calendar retention rules need dates of all files
+        files, overflow = await self._file_list_processing(
+            self._get_client().iter_dir(self._path),
+            sys.maxsize if self._retention.has_calendar_rules
+            else max(MARKDOWN_FILE_AMOUNT, self._max_remote_file_amount))
+        self._remote_state.replace(self._path, files, overflow)
+        self._apply_remote_state()
+
+    async def _ensure_remote_state(self, interval: datetime.timedelta | None = None):
+        """ List yandex disk directory only when remote directory state is stale """
+        await self._remote_state.async_load()
+        if self._remote_state.needs_reconcile(self._path, interval or self._reconcile_interval):
+            _LOGGER.debug("Reconcile remote directory state")
+            await self._reconcile_remote_state()
+        else:
+            self._apply_remote_state()
+
+    def _apply_remote_state(self):
+        """ Fill file amount, file Markdown list and file simple list by remote directory state """
+        files = self._remote_state.files
+        self._file_amount = self._remote_state.file_amount
+        self._file_markdown_list = self._get_markdown_files(files, MARKDOWN_FILE_AMOUNT)
+        self._file_list = self._remote_state.names
+        self._file_hashes = {file.name: file.content_md5 for file in files if file.content_md5}
+        _LOGGER.debug("Count files result: %s", self.file_amount)
+        self._publish()
 
     async def upload_files(self):
         """ Upload files to yandex. Assync call with hass core.
 
-            Refresh token.
-            Upload new files and delete old files from yandex disk.
-            Refresh yandex disk directory information
+            Only one upload runs at a time. Call during upload queues one follow-up upload,
+            all calls during queued upload merged into it.
         """
-        await self._refresh_token_if_need(REFRESH_TOKEN_DELTA)
+        await self._upload_job.async_run()
 
-        local_backups = await self.get_local_files_list()
-        await self.list_yandex_disk()
+    async def _upload_files(self):
+        """ Upload files to yandex. Upload and directory listing do not run at same time """
+        async with self._operation_lock:
+            with self._telemetry.run():
+                await self._synchronize_files()
 
-        new_files = [file for file in local_backups.keys() if file not in self._file_list]
+    async def _synchronize_files(self, backup_paths: set[Path] | None = None):
+        """ Upload files to yandex.
 
-        _LOGGER.info("Need backup %d files", len(new_files))
+            When backup paths set, only these backups uploaded. Backup directory is not scanned and
+            yandex disk directory listed only when remote directory state is unknown or invalidated.
 
-        y = yadisk.YaDisk(token=self._token)
-        for file in new_files:
-            await self._hass.async_add_executor_job(self._upload_file,
-                                                    y, str(local_backups[file]), self._path + '/' + file)
-        is_deleted = False
-        # Delete files from remote directory
-        if (self._file_amount + len(new_files)) > self._max_remote_file_amount:
-            is_deleted = True
-            old_file_count = (self._file_amount + len(new_files)) - self._max_remote_file_amount
-            if old_file_count > self._file_amount:
-                old_file_count = self._file_amount
+            Refresh token when it is expired (token refreshed in background before expiry).
+            Upload new files and delete old files from yandex disk.
+            Refresh yandex disk directory information
 
-            _LOGGER.debug("Need delete %d files", old_file_count)
+            Yandex disk directory listed only when remote directory state is stale,
+            uploads and deletes update state directly.
 
-            old_files = self._file_list[-old_file_count:]
+            Files compared with remote files by MD5. File with same content and another name
+            copied on server side, file with same name and changed content uploaded again.
 
-            for old_file in old_files:
-                await self._hass.async_add_executor_job(self._remove_file,
-                                                        y, self._path + '/' + old_file)
+            Files uploaded concurrently, not more than upload parallelism option at once.
+            Failed upload does not abort other uploads, error raised after old files deleted.
+            Old files chosen by retention policy and deleted concurrently.
+        """
+        await self._token_manager.async_ensure_valid()
+
+        with self._telemetry.span('scan'):
+            local_backups = await self.get_local_files_list(backup_paths)
+        with self._telemetry.span('listing'):
+            await self._ensure_remote_state(None if backup_paths is None else datetime.timedelta.max)
+
+        with self._telemetry.span('hashing'):
+            local_hashes = await self._backup_observer.get_backup_hashes(list(local_backups.values()))
+        file_hashes = {file: local_hashes.get(backup.path) for file, backup in local_backups.items()}
+        new_files, copied_files = self._compare_files(file_hashes)
+
+        _LOGGER.info("Need backup %d files, copy %d files", len(new_files), len(copied_files))
+
+        client = self._get_client()
+        with self._telemetry.span('copy'):
+            copied_files, copy_failed_files = await self._copy_files(client, copied_files)
+        new_files += copy_failed_files
+        with self._telemetry.span('upload'):
+            uploaded_files = await self._upload_new_files(client,
+                                                          {file: local_backups[file].path for file in new_files},
+                                                          file_hashes)
+        failed_files = [file for file in new_files if file not in uploaded_files]
+        failed_files += [file + " (" + path + ")" for file in uploaded_files
+                         for path, destination in self._upload_progress[file].destinations.items()
+                         if destination.state == UPLOAD_STATE_FAILED]
+
+        for file in uploaded_files:
+            progress = self._upload_progress[file]
+            if progress.properties is None:
+                remote_file = RemoteFile(name=file, type=TYPE_FILE, modified=dt_util.utcnow(), size=progress.size,
+                                         md5=file_hashes.get(file))
+            else:
+                remote_file = RemoteFile(name=file, type=TYPE_FILE, modified=dt_util.utcnow(),
+                                         size=progress.uploaded_size, custom_properties=progress.properties)
+            self._remote_state.add(remote_file)
+        for file, source_file in copied_files.items():
+            source = self._remote_state.get(source_file)
+            if source is not None:
+                self._remote_state.add(replace(source, name=file, modified=dt_util.utcnow()))
+
+        # Delete files from remote directory, uploaded and copied files are kept
+        if self._retention.has_calendar_rules and self._remote_state.overflow:
+            await self._reconcile_remote_state()
+        old_files = self._retention.plan(self._remote_state.files, self._remote_state.overflow,
+                                         set(uploaded_files) | set(copied_files))
+        if old_files:
+            _LOGGER.debug("Need delete %d files", len(old_files))
+
+            with self._telemetry.span('delete'):
+                await self._remove_old_files(client, old_files)
+
+                if any(old_file.endswith(MANIFEST_SUFFIX) for old_file in old_files):
+                    await self._remove_unused_chunks(client)
+
+        if self._remote_state.is_invalidated:
+            await self._reconcile_remote_state()
+        else:
+            self._apply_remote_state()
 
-        if new_files or is_deleted:
-            await self.list_yandex_disk()
+        if failed_files:
+            raise HomeAssistantError("Error upload files " + ", ".join(failed_files))
 
-    async def get_local_files_list(self):
-        """ Get list of home assistant backups """
+    def _compare_files(self, local_hashes: dict[str, str | None]) -> tuple[list[str], dict[str, str]]:
+        """ Compare local files with remote files.
 
-        backups = await self._backup_observer.get_backups()
+        Return files for upload and files for server side copy (with copy source).
+        """
+        remote_files_by_hash = {md5: file for file, md5 in self._file_hashes.items()}
+        new_files = []
+        copied_files = {}
+        for file, md5 in local_hashes.items():
+            if file in self._file_list:
+                remote_md5 = self._file_hashes.get(file)
+                if md5 is not None and remote_md5 is not None and md5 != remote_md5:
+                    _LOGGER.debug("File %s changed", file)
+                    new_files.append(file)
+            elif md5 is not None and md5 in remote_files_by_hash:
+                copied_files[file] = remote_files_by_hash[md5]
+            else:
+                new_files.append(file)
+        return new_files, copied_files
+
+    async def _copy_files(self, client: YandexDiskClient,
+                          files: dict[str, str]) -> tuple[dict[str, str], list[str]]:
+        """ Copy files with same content on server side. Return copied (with copy source) and failed files """
+        copied_files = {}
+        failed_files = []
+        for file, source_file in files.items():
+            try:
+                _LOGGER.info('Copy file %s to %s', source_file, file)
+                await client.copy(self._path + '/' + source_file, self._path + '/' + file)
+                copied_files[file] = source_file
+                for path in self._mirror_paths:
+                    try:
+                        await client.copy(path + '/' + source_file, path + '/' + file)
+                    except Exception as e:
+                        _LOGGER.warning("Error copy file %s in mirror folder %s: %s", source_file, path, e)
+            except Exception as e:
+                if isinstance(e, YandexDiskApiError) and e.is_not_found:
+                    self._remote_state.invalidate()
+                _LOGGER.warning("Error copy file %s, file will be uploaded", source_file, exc_info=True)
+                failed_files.append(file)
+        return copied_files, failed_files
+
+    async def _upload_new_files(self, client: YandexDiskClient, files: dict[str, Path],
+                                file_hashes: dict[str, str | None]) -> list[str]:
+        """ Upload files concurrently. Return list of uploaded files.
+
+        File deleted or unreadable before upload marked failed, other files uploaded.
+        """
+        self._upload_progress = {file: UploadProgress(file, 0) for file in files}
+        self._rate_limiter.reset_statistics()
+        self._buffer_pool.reset_statistics()
+
+        if self._dedup_upload and files:
+            self._remote_chunks = await self._get_remote_chunks(client)
+        elif self._mirror_paths and files:
+            for path in self._mirror_paths:
+                try:
+                    await client.make_dir(path)
+                except Exception as e:
+                    _LOGGER.warning("Error create mirror folder %s: %s", path, e)
+
+        parallelism = min(self._upload_parallelism, self._buffer_pool.readers)
+        if parallelism < self._upload_parallelism:
+            _LOGGER.info("Upload parallelism reduced to %d by upload memory limit", parallelism)
+        semaphore = asyncio.Semaphore(parallelism)
+
+        async def upload(file: str):
+            progress = self._upload_progress[file]
+            try:
+                progress.size = (await self._hass.async_add_executor_job(files[file].stat)).st_size
+            except OSError as e:
+                progress.state = UPLOAD_STATE_FAILED
+                progress.error = str(e)
+                _LOGGER.error("Unable to stat backup %s: %s", files[file], e)
+                return
+            async with semaphore:
+                await self._upload_file(client, str(files[file]), self._path + '/' + file, progress,
+                                        file_hashes.get(file))
+
+        await asyncio.gather(*[upload(file) for file in files], return_exceptions=True)
+
+        _LOGGER.debug("Upload progress %s", self.upload_progress)
+        _LOGGER.info("Upload throughput %.1f KB/s", self._rate_limiter.effective_throughput / 1024)
+        _LOGGER.info("Upload buffers peak %d KB of %d KB", self._buffer_pool.peak_bytes // 1024,
+                     self._buffer_pool.limit // 1024)
+        return [file for file, progress in self._upload_progress.items() if progress.state == UPLOAD_STATE_DONE]
+
+    async def get_local_files_list(self, backup_paths: set[Path] | None = None):
+        """ Get list of home assistant backups. When backup paths set, only these backups read """
+
+        if backup_paths is None:
+            backups = list((await self._backup_observer.get_backups()).values())
+        else:
+            backups = [backup for backup_path in backup_paths
+                       if (backup := await self._backup_observer.get_backup(backup_path)) is not None]
 
         result = {}
-        for backup in backups.values():
+        for backup in backups:
             key = (backup.name + '_' + backup.slug).replace(" ","-").replace(":","_")
             if not self._upload_without_suffix:
                 key += '.tar'
-            result[key] = backup.path
+            if self._dedup_upload:
+                key += MANIFEST_SUFFIX
+            elif self._compression != COMPRESSION_NONE:
+                key += COMPRESSION_SUFFIXES[self._compression]
+            if self._encryption_key:
+                key += ENCRYPTION_SUFFIX
+            result[key] = backup
 
         return result
 
-    def _upload_file(self, y: yadisk.YaDisk, source_file, destination_file):
-        """ Upload files to yandex disk """
+    async def _upload_file(self, client: YandexDiskClient, source_file, destination_file,
+                           progress: UploadProgress | None = None, source_md5: str | None = None):
+        """ Upload files to yandex disk.
+
+        Deduplicated backup uploaded as new chunks and manifest, compression and mirror folders are not used for it.
+        With mirror folders file read once and uploaded to all folders at same time, chunked upload is not used.
+        Compressed and encrypted file uploaded as stream, so chunked upload is not used for it.
+        Source file MD5 and compression ratio saved in custom properties of compressed or encrypted file.
+        """
+        started = time.monotonic()
         try:
             _LOGGER.info('Upload file %s to %s', source_file, destination_file)
-            y.upload(source_file, destination_file, overwrite=True, n_retries=3, retry_interval=5,
-                     timeout=(15.0, 250.0))
+            if progress is not None:
+                progress.state = UPLOAD_STATE_RUNNING
+            if self._dedup_upload:
+                await self._upload_deduplicated(client, source_file, destination_file, progress, source_md5)
+            elif self._mirror_paths:
+                await self._upload_fanout(client, source_file, destination_file, progress, source_md5)
+            elif self._compression != COMPRESSION_NONE or self._encryption_key:
+                compressor = await client.upload(source_file, destination_file, progress, self._compression,
+                                                 self._encryption_key)
+                properties = await self._stream_properties(source_file, compressor, progress, source_md5)
+                await self._set_properties(client, destination_file, properties)
+            elif self._chunked_upload:
+                try:
+                    await client.upload_chunked(source_file, destination_file, self._upload_journal, progress,
+                                                source_md5)
+                except UploadVerificationError:
+                    # Damaged file is on server, remote directory state does not match it
+                    self._remote_state.invalidate()
+                    raise
+            else:
+                await client.upload(source_file, destination_file, progress)
+            if progress is not None:
+                progress.state = UPLOAD_STATE_DONE
             _LOGGER.info('File %s uploaded to %s', source_file, destination_file)
         except Exception as e:
+            if progress is not None:
+                progress.state = UPLOAD_STATE_FAILED
+                progress.error = str(e)
             _LOGGER.error("Error upload file %s", source_file, exc_info=True)
             raise e
+        finally:
+            self._telemetry.file_durations[destination_file.rsplit('/', 1)[-1]] = \
+                round(time.monotonic() - started, 3)
+
+    async def _upload_fanout(self, client: YandexDiskClient, source_file, destination_file,
+                             progress: UploadProgress | None, source_md5: str | None):
+        """ Upload file to yandex disk folder and mirror folders with one read of file.
 
-    def _remove_file(self, y: yadisk.YaDisk, deleted_file):
-        """ Remove files from yandex disk """
+        Upload to mirror folder which failed recorded in destination progress, error raised only when
+        upload to main folder failed.
+        """
+        if progress is None:
+            size = (await self._hass.async_add_executor_job(os.stat, source_file)).st_size
+            progress = UploadProgress(destination_file, size)
+        name = destination_file.rsplit('/', 1)[-1]
+        progress.destinations = {path: UploadProgress(name, progress.size, state=UPLOAD_STATE_RUNNING)
+                                 for path in [self._path] + self._mirror_paths}
+        compressor, failed = await client.upload_fanout(
+            source_file, {path + '/' + name: destination for path, destination in progress.destinations.items()},
+            progress, self._compression, self._encryption_key)
+
+        properties = None
+        if compressor is not None or self._encryption_key:
+            properties = await self._stream_properties(source_file, compressor, progress, source_md5)
+        for path, destination in progress.destinations.items():
+            error = failed.get(path + '/' + name)
+            if error is None:
+                destination.state = UPLOAD_STATE_DONE
+                if properties is not None:
+                    await self._set_properties(client, path + '/' + name, properties)
+            else:
+                destination.state = UPLOAD_STATE_FAILED
+                destination.error = str(error)
+        if destination_file in failed:
+            raise failed[destination_file]
+
+    async def _upload_deduplicated(self, client: YandexDiskClient, source_file, destination_file,
+                                   progress: UploadProgress | None, source_md5: str | None):
+        """ Upload backup chunks which are not stored on yandex disk, then upload backup manifest """
+        chunks = await self._hass.async_add_executor_job(split_backup_chunks, Path(source_file))
+        chunk_dir = self._path + '/' + DEDUP_CHUNK_DIR
+        uploaded_size = 0
+        start = 0
+        for chunk_hash, size in chunks:
+            if chunk_hash in self._remote_chunks:
+                if progress is not None:
+                    progress.sent = start + size
+                    progress.skipped += size
+            else:
+                await client.upload_range(source_file, chunk_dir + '/' + chunk_hash, start, start + size, progress)
+                self._remote_chunks.add(chunk_hash)
+                uploaded_size += size
+            start += size
+
+        manifest = json.dumps({MANIFEST_FIELD_VERSION: MANIFEST_VERSION,
+                               MANIFEST_FIELD_FILE: Path(source_file).name,
+                               MANIFEST_FIELD_SIZE: start,
+                               MANIFEST_FIELD_MD5: source_md5,
+                               MANIFEST_FIELD_CHUNKS: chunks}).encode()
+        await client.upload_data(manifest, destination_file)
+        _LOGGER.info('File %s deduplicated, %d of %d bytes uploaded', source_file, uploaded_size, start)
+
+        properties = {PROPERTY_SOURCE_SIZE: start}
+        if source_md5 is not None:
+            properties[PROPERTY_SOURCE_MD5] = source_md5
+        if progress is not None:
+            progress.uploaded_size = len(manifest)
+            progress.properties = properties
+        await self._set_properties(client, destination_file, properties)
+
+    async def _get_remote_chunks(self, client: YandexDiskClient) -> set[str]:
+        """ Get names of chunks stored on yandex disk. Chunk directory created when it does not exist """
+        chunk_dir = self._path + '/' + DEDUP_CHUNK_DIR
+        await client.make_dir(chunk_dir)
+        return {chunk.name async for chunk in client.iter_dir(chunk_dir) if chunk.type == TYPE_FILE}
+
+    async def _remove_unused_chunks(self, client: YandexDiskClient):
+        """ Remove chunks not referenced by manifests on yandex disk.
+
+        Directory listed again, so chunks of manifest absent in local directory state are not removed.
+        """
+        used_chunks = set()
+        async for file in client.iter_dir(self._path):
+            if file.type != TYPE_FILE or not file.name.endswith(MANIFEST_SUFFIX):
+                continue
+            try:
+                manifest = json.loads(await client.download_data(self._path + '/' + file.name))
+                used_chunks.update(chunk_hash for chunk_hash, _ in manifest[MANIFEST_FIELD_CHUNKS])
+            except Exception:
+                _LOGGER.warning("Error read manifest %s, unused chunks not removed", file.name, exc_info=True)
+                return
+
+        chunk_dir = self._path + '/' + DEDUP_CHUNK_DIR
+        unused_chunks = [chunk for chunk in await self._get_remote_chunks(client) if chunk not in used_chunks]
+        _LOGGER.info("Remove %d unused chunks", len(unused_chunks))
+        errors = await self._remove_paths(client, [chunk_dir + '/' + chunk for chunk in unused_chunks])
+        error = None
+        for chunk in unused_chunks:
+            e = errors.get(chunk_dir + '/' + chunk)
+            if e is None or (isinstance(e, YandexDiskApiError) and e.is_not_found):
+                self._remote_chunks.discard(chunk)
+            elif error is None:
+                error = e
+        if error is not None:
+            raise error
+
+    @staticmethod
+    async def _set_properties(client: YandexDiskClient, destination_file, properties: dict):
+        """ Set custom properties of uploaded file. Error is not fatal, file compared by name only """
         try:
-            _LOGGER.info('Remove file %s', deleted_file)
-            y.remove(deleted_file, n_retries=3, retry_interval=5)
-            _LOGGER.info('File %s removed', deleted_file)
-        except Exception as e:
-            _LOGGER.error("Error when remove file %s", deleted_file, exc_info=True)
-            raise e
+            await client.set_properties(destination_file, properties)
+        except Exception:
+            _LOGGER.warning("Error set properties of file %s", destination_file, exc_info=True)
 
-    async def _refresh_token_if_need(self, delta: datetime.timedelta):
-        """ Refresh token when token lifetime go out bound """
-        if (datetime.datetime.now() + delta) > datetime.datetime.fromisoformat(self._token_expire_date):
-            _LOGGER.debug("Need refresh token")
-            await self._refresh_token()
-        else:
-            _LOGGER.debug("Refresh token not needed")
+    async def restore_backup(self, file: str) -> Path:
+        """ Restore backup from yandex disk to backup directory and refresh backup index.
 
-    async def _refresh_token(self):
-        """ Refresh token and save new token info in integration configuration """
-        result = await self._hass.async_add_executor_job(_refresh_token_request, self._refresh_token_value,
-                                                         self._client_id, self._client_s)
+        Backup downloaded to temporary file in backup directory and renamed after MD5 check.
+        File downloaded by parallel range requests, deduplicated backup assembled from chunks by manifest
+        with parallel chunk downloads. Compressed and encrypted backup streamed, decrypted and decompressed on the fly.
+        """
+        if file in ('', '.', '..') or Path(file).name != file or '\\' in file:
+            raise HomeAssistantError("Wrong backup file name " + file)
+        async with self._operation_lock:
+            await self._token_manager.async_ensure_valid()
+            client = self._get_client()
+            remote_file = self._path + '/' + file
+            started = time.monotonic()
+            if file.endswith(MANIFEST_SUFFIX):
+                manifest = json.loads(await client.download_data(remote_file))
+                local_file = Path(manifest[MANIFEST_FIELD_FILE]).name
+                _LOGGER.info('Restore file %s to %s', remote_file, local_file)
+                parts = []
+                offset = 0
+                for chunk_hash, size in manifest[MANIFEST_FIELD_CHUNKS]:
+                    parts.append(DownloadPart(self._path + '/' + DEDUP_CHUNK_DIR + '/' + chunk_hash, offset, size,
+                                              sha256=chunk_hash))
+                    offset += size
+                path = await self._download_backup_file(client, local_file, manifest[MANIFEST_FIELD_SIZE], parts,
+                                                        manifest.get(MANIFEST_FIELD_MD5))
+            else:
+                resource = await client.get_resource(remote_file)
+                local_file = self._get_local_file_name(file)
+                _LOGGER.info('Restore file %s to %s', remote_file, local_file)
+                properties = resource.custom_properties or {}
+                compression = properties.get(PROPERTY_COMPRESSION, COMPRESSION_NONE)
+                encrypted = PROPERTY_ENCRYPTION in properties or file.endswith(ENCRYPTION_SUFFIX)
+                if encrypted and not self._encryption_key:
+                    raise HomeAssistantError("Encryption key required to restore file " + file)
+                if compression != COMPRESSION_NONE or encrypted:
+                    data = client.download(remote_file)
+                    if encrypted:
+                        data = self._decrypt_chunks(data, StreamDecryptor(self._encryption_key))
+                    if compression != COMPRESSION_NONE:
+                        data = self._decompress_chunks(data, StreamDecompressor(compression))
+                    path = await self._write_backup_file(local_file, data, resource.content_md5)
+                else:
+                    parts = [DownloadPart(remote_file, start, min(DOWNLOAD_RANGE_SIZE, resource.size - start),
+                                          start=start)
+                             for start in range(0, resource.size, DOWNLOAD_RANGE_SIZE)]
+                    path = await self._download_backup_file(client, local_file, resource.size, parts,
+                                                            resource.md5, await client.get_download_link(remote_file))
+
+        size = (await self._hass.async_add_executor_job(path.stat)).st_size
+        _LOGGER.info('File %s restored, %.1f MB/s', path,
+                     size / 1_048_576 / max(time.monotonic() - started, 0.001))
+        self._backup_observer.invalidate()
+        await self._backup_observer.get_backups()
+        return path
+
+    def _get_restore_path(self, name: str) -> tuple[Path, Path]:
+        """ Get backup file path and temporary file path. Existing backup file is not overwritten """
+        path = self._backup_observer.backup_dir / name
+        if path.exists():
+            raise HomeAssistantError("Backup file " + str(path) + " already exists")
+        return path, path.with_name('.' + name + '.part')
+
+    async def _download_backup_file(self, client: YandexDiskClient, name: str, size: int,
+                                    parts: list[DownloadPart], md5: str | None, link: dict | None = None) -> Path:
+        """ Download file parts in parallel to preallocated temporary file and rename it to backup file.
+
+        MD5 calculated during download: completed parts hashed in file order, while next parts downloaded.
+        """
+        path, temp_path = await self._hass.async_add_executor_job(self._get_restore_path, name)
+        fd = await self._hass.async_add_executor_job(os.open, temp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            await self._hass.async_add_executor_job(_preallocate, fd, size)
+            semaphore = asyncio.Semaphore(DOWNLOAD_PARALLELISM)
+            hasher = hashlib.md5()
+            hash_lock = asyncio.Lock()
+            completed = set()
+            hashed = 0
+
+            async def download(index: int, part: DownloadPart):
+                async with semaphore:
+                    part_hash = await client.download_part(fd, part, link)
+                if part.sha256 is not None and part_hash != part.sha256:
+                    raise HomeAssistantError("Chunk " + part.path + " damaged")
+                completed.add(index)
+                async with hash_lock:
+                    nonlocal hashed
+                    while hashed in completed:
+                        await self._hass.async_add_executor_job(_hash_file_range, fd, parts[hashed].offset,
+                                                                parts[hashed].size, hasher)
+                        hashed += 1
+
+            tasks = [asyncio.create_task(download(index, part)) for index, part in enumerate(parts)]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+
+            if md5 is not None and hasher.hexdigest() != md5:
+                raise HomeAssistantError("MD5 of restored file " + name + " does not match")
+            await self._hass.async_add_executor_job(os.close, fd)
+            fd = None
+            await self._hass.async_add_executor_job(os.replace, temp_path, path)
+        except BaseException:
+            if fd is not None:
+                await self._hass.async_add_executor_job(os.close, fd)
+            await self._hass.async_add_executor_job(functools.partial(temp_path.unlink, missing_ok=True))
+            raise
+        return path
+
+    async def _decompress_chunks(self, chunks, decompressor: StreamDecompressor):
+        """ Decompress chunks in executor """
+        async for chunk in chunks:
+            if data := await self._hass.async_add_executor_job(decompressor.decompress, chunk):
+                yield data
+        if data := await self._hass.async_add_executor_job(decompressor.flush):
+            yield data
+
+    async def _decrypt_chunks(self, chunks, decryptor: StreamDecryptor):
+        """ Decrypt chunks in executor """
+        async for chunk in chunks:
+            if data := await self._hass.async_add_executor_job(decryptor.decrypt, chunk):
+                yield data
+        if data := await self._hass.async_add_executor_job(decryptor.flush):
+            yield data
+
+    async def _write_backup_file(self, name: str, chunks, md5: str | None) -> Path:
+        """ Write downloaded backup to temporary file, check MD5 and rename to backup file """
+        path, temp_path = await self._hass.async_add_executor_job(self._get_restore_path, name)
+        hasher = hashlib.md5()
+        file = await self._hass.async_add_executor_job(open, temp_path, 'wb')
+        try:
+            async for chunk in chunks:
+                await self._hass.async_add_executor_job(_write_chunk, file, chunk, hasher)
+            await self._hass.async_add_executor_job(file.close)
+            if md5 is not None and hasher.hexdigest() != md5:
+                raise HomeAssistantError("MD5 of restored file " + name + " does not match")
+            await self._hass.async_add_executor_job(os.replace, temp_path, path)
+        except BaseException:
+            await self._hass.async_add_executor_job(file.close)
+            await self._hass.async_add_executor_job(functools.partial(temp_path.unlink, missing_ok=True))
+            raise
+        return path
 
-        self._refresh_token_value = result[CONF_REFRESH_TOKEN]
-        self._token = result[CONF_TOKEN]
-        self._token_expire_date = result[CONF_TOKEN_EXPIRES]
+    @staticmethod
+    def _get_local_file_name(file: str) -> str:
+        """ Get backup file name for remote file """
+        for suffix in (ENCRYPTION_SUFFIX, *COMPRESSION_SUFFIXES.values()):
+            if file.endswith(suffix):
+                file = file[:-len(suffix)]
+        return file if file.endswith('.tar') else file + '.tar'
+
+    async def _stream_properties(self, source_file, compressor: StreamCompressor | None,
+                                 progress: UploadProgress | None, source_md5: str | None) -> dict:
+        """ Custom properties of compressed or encrypted file. Uploaded size and compression ratio saved to progress """
+        if compressor is None:
+            source_size = uploaded_size = (await self._hass.async_add_executor_job(os.stat, source_file)).st_size
+        else:
+            _LOGGER.info('File %s compressed with ratio %.3f', source_file, compressor.ratio)
+            source_size, uploaded_size = compressor.input_size, compressor.output_size
+        properties = {PROPERTY_SOURCE_SIZE: source_size}
+        if compressor is not None:
+            properties[PROPERTY_COMPRESSION] = self._compression
+            properties[PROPERTY_COMPRESSION_RATIO] = compressor.ratio
+        if self._encryption_key:
+            properties[PROPERTY_ENCRYPTION] = ENCRYPTION_AES_GCM
+            uploaded_size = StreamEncryptor.encrypted_size(uploaded_size)
+        if source_md5 is not None:
+            properties[PROPERTY_SOURCE_MD5] = source_md5
+        if progress is not None:
+            progress.uploaded_size = uploaded_size
+            if compressor is not None:
+                progress.compression_ratio = compressor.ratio
+            progress.properties = properties
+        return properties
+
+    async def _remove_old_files(self, client: YandexDiskClient, files: list[str]):
+        """ Remove old files from yandex disk folder and mirror folders.
+
+        All files removed at once. Errors of mirror folders are logged only,
+        first error of main folder raised after all files processed.
+        """
+        mirror_files = [path + '/' + file for path in self._mirror_paths for file in files]
+        errors = await self._remove_paths(client, [self._path + '/' + file for file in files] + mirror_files)
+        error = None
+        for file in files:
+            deleted_file = self._path + '/' + file
+            e = errors.get(deleted_file)
+            if e is None:
+                self._remote_state.remove(file)
+                _LOGGER.info('File %s removed', deleted_file)
+            elif isinstance(e, YandexDiskApiError) and e.is_not_found:
+                _LOGGER.warning("File %s already removed", deleted_file)
+                self._remote_state.remove(file)
+                self._remote_state.invalidate()
+            else:
+                _LOGGER.error("Error when remove file %s", deleted_file, exc_info=e)
+                error = error or e
+        for mirror_file in mirror_files:
+            e = errors.get(mirror_file)
+            if e is not None and not (isinstance(e, YandexDiskApiError) and e.is_not_found):
+                _LOGGER.warning("Error when remove file %s from mirror folder: %s", mirror_file, e)
+        if error is not None:
+            raise error
+
+    async def _remove_paths(self, client: YandexDiskClient, paths: list[str]) -> dict[str, Exception]:
+        """ Remove files concurrently, not more than DELETE_PARALLELISM at once, and wait asynchronous removes
+        together. Trash is not used with permanent delete option. Return errors of failed removes
+        """
+        semaphore = asyncio.Semaphore(DELETE_PARALLELISM)
+        operations = {}
+        errors = {}
+
+        async def remove(path: str):
+            async with semaphore:
+                _LOGGER.info('Remove file %s', path)
+                try:
+                    if (href := await client.remove(path, self._permanent_delete)) is not None:
+                        operations[href] = path
+                except Exception as e:
+                    errors[path] = e
+
+        await asyncio.gather(*[remove(path) for path in paths])
+        for href, e in (await client.wait_operations(list(operations))).items():
+            errors[operations[href]] = e
+        return errors
+
+    async def _handle_token_refresh(self, result: dict):
+        """ Save new token info in integration configuration """
         self._options.update(result)
-
         await self._handle_update()
 
     async def _handle_update(self):
@@ -320,14 +3255,29 @@ class YaDsk:
             )
 
     @staticmethod
-    def _file_list_processing(objects: Generator[any, any, ResourceObject]) -> list:
-        """ Processing file list, received from Yandex Disk """
-        files = [obj for obj in objects if obj.type == TYPE_FILE]
-        result = sorted(files, key=lambda obj: obj.modified, reverse=True)
-        return result
+    async def _file_list_processing(objects, max_items: int) -> tuple[list[RemoteFile], list[str]]:
+        """ Processing file list, received from Yandex Disk.
+
+        Keep only max_items newest files in heap.
+        Return newest files sorted from newest to oldest and names of older files.
+        """
+        heap = []
+        overflow = []
+        count = 0
+        async for obj in objects:
+            if obj.type != TYPE_FILE:
+                continue
+            count += 1
+            item = (obj.modified, count, obj)
+            if len(heap) < max_items:
+                heapq.heappush(heap, item)
+            else:
+                overflow.append(heapq.heappushpop(heap, item)[2].name)
+        result = [item[2] for item in sorted(heap, reverse=True)]
+        return result, overflow
 
     @staticmethod
-    def _get_markdown_files(files: list[ResourceObject], max_items: int):
+    def _get_markdown_files(files: list[RemoteFile], max_items: int):
         """ Processing file list and form markdown formatting file list """
         if len(files) == 0:
             return ""
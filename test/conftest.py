@@ -0,0 +1,43 @@
+""" Shared test fixtures """
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from custom_components.yabackup import yad
+
+
+class MemoryStore:
+    """ Store replacement without files and delays """
+    data = {}
+
+    def __init__(self, hass, version, key, *args, **kwargs):
+        self._key = key
+
+    async def async_load(self):
+        return self.data.get(self._key)
+
+    async def async_save(self, data):
+        self.data[self._key] = data
+
+    def async_delay_save(self, data_func, delay=0):
+        self.data[self._key] = data_func()
+
+
+@pytest.fixture
+async def hass():
+    """ Home Assistant mock, executor jobs run in default executor of running loop """
+    loop = asyncio.get_running_loop()
+    hass = MagicMock()
+    hass.loop = loop
+    hass.async_add_executor_job = lambda func, *args: loop.run_in_executor(None, func, *args)
+    hass.async_create_task = loop.create_task
+    return hass
+
+
+@pytest.fixture
+def memory_store():
+    """ Storage in memory, data kept in MemoryStore.data by storage key """
+    MemoryStore.data = {}
+    with patch.object(yad, "Store", MemoryStore):
+        yield MemoryStore
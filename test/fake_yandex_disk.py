@@ -0,0 +1,230 @@
+""" Local fake of Yandex Disk REST API for benchmarks """
+import asyncio
+import datetime
+import hashlib
+import random
+from collections import Counter
+
+from aiohttp import web
+
+API_PREFIX = '/v1/disk'
+TRANSFER_CHUNK = 65536
+
+
+class FakeYandexDisk:
+    """ Fake Yandex Disk REST API server.
+
+    Serves directory listing, file info, upload and download links, upload, download (with ranges),
+    copy, delete, directory creation and custom properties. Files kept in memory with MD5.
+
+    latency - delay of every request, sec
+    bandwidth - upload and download speed of one connection, bytes/sec, 0 - unlimited
+    error_rate - share of API requests and uploads answered with 503
+    fail_uploads - paths which uploads always answered with 503
+    async_deletes - deletes answered as asynchronous operations, finished on second poll
+    max_active_polls - most operation polls served at once
+    upload_limit - uploads of ranges (Content-Range) starting from this offset answered with 503
+    Upload with Content-Range appended to partial upload, file created when last range received.
+    Files deleted not permanently moved to trash.
+    """
+
+    def __init__(self, latency: float = 0, bandwidth: int = 0, error_rate: float = 0, seed: int = 0):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.files: dict[str, dict] = {}
+        self.dirs: set[str] = {'/'}
+        self.requests = Counter()
+        self.errors = 0
+        self.fail_uploads: set[str] = set()
+        self.async_deletes = False
+        self.upload_limit: int | None = None
+        self.upload_ranges: list[tuple[str, int]] = []
+        self.partial_uploads: dict[str, bytearray] = {}
+        self.trash: dict[str, dict] = {}
+        self._operations: dict[str, int] = {}
+        self._active_polls = 0
+        self.max_active_polls = 0
+        self.bytes_received = 0
+        self._random = random.Random(seed)
+        self._runner: web.AppRunner | None = None
+        self._port = None
+
+    @property
+    def url(self) -> str:
+        """ API base url """
+        return f'http://127.0.0.1:{self._port}{API_PREFIX}'
+
+    async def start(self):
+        """ Start server on free port """
+        app = web.Application(client_max_size=2 ** 40)
+        app.router.add_route('*', API_PREFIX + '/resources', self._resources)
+        app.router.add_get(API_PREFIX + '/resources/upload', self._upload_link)
+        app.router.add_get(API_PREFIX + '/resources/download', self._download_link)
+        app.router.add_post(API_PREFIX + '/resources/copy', self._copy)
+        app.router.add_get(API_PREFIX + '/operations/{id}', self._operation)
+        app.router.add_put('/upload', self._upload)
+        app.router.add_get('/download', self._download)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, '127.0.0.1', 0).start()
+        self._port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        """ Stop server """
+        await self._runner.cleanup()
+
+    def add_file(self, path: str, data: bytes, modified: datetime.datetime | None = None):
+        """ Put file to fake disk """
+        path = self._normalize(path)
+        self.dirs.add(path.rsplit('/', 1)[0] or '/')
+        self.files[path] = {'data': data,
+                            'md5': hashlib.md5(data).hexdigest(),
+                            'modified': (modified or datetime.datetime.now(datetime.timezone.utc)).isoformat(),
+                            'custom_properties': None}
+
+    @staticmethod
+    def _normalize(path: str) -> str:
+        return '/' + path.removeprefix('disk:').strip('/')
+
+    async def _delay(self, request: web.Request, size: int = 0):
+        """ Count request and emulate latency and bandwidth """
+        self.requests[request.method + ' ' + request.path] += 1
+        delay = self.latency + (size / self.bandwidth if self.bandwidth else 0)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def _fail(self) -> bool:
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            return True
+        return False
+
+    def _resource(self, path: str) -> dict:
+        file = self.files[path]
+        return {'name': path.rsplit('/', 1)[1], 'path': 'disk:' + path, 'type': 'file',
+                'modified': file['modified'], 'size': len(file['data']), 'md5': file['md5'],
+                'custom_properties': file['custom_properties']}
+
+    async def _resources(self, request: web.Request) -> web.Response:
+        await self._delay(request)
+        if self._fail():
+            return web.json_response({'message': 'Service unavailable'}, status=503)
+        path = self._normalize(request.query['path'])
+
+        if request.method == 'PUT':
+            if path in self.dirs:
+                return web.json_response({'message': 'Exists'}, status=409)
+            self.dirs.add(path)
+            return web.json_response({'href': request.url.path}, status=201)
+        if request.method == 'DELETE':
+            file = self.files.pop(path, None)
+            if file is None:
+                return web.json_response({'message': 'Not found'}, status=404)
+            if request.query.get('permanently') != 'true':
+                self.trash[path] = file
+            if self.async_deletes:
+                operation = str(len(self._operations))
+                self._operations[operation] = 0
+                href = request.url.with_path(API_PREFIX + '/operations/' + operation).with_query({})
+                return web.json_response({'href': str(href), 'method': 'GET', 'templated': False}, status=202)
+            return web.Response(status=204)
+        if request.method == 'PATCH':
+            if path not in self.files:
+                return web.json_response({'message': 'Not found'}, status=404)
+            self.files[path]['custom_properties'] = (await request.json())['custom_properties']
+            return web.json_response(self._resource(path))
+
+        if path in self.files:
+            return web.json_response(self._resource(path))
+        if path not in self.dirs:
+            return web.json_response({'message': 'Not found'}, status=404)
+        offset = int(request.query.get('offset', 0))
+        limit = int(request.query.get('limit', 20))
+        items = [self._resource(file) for file in sorted(self.files) if file.rsplit('/', 1)[0] == path]
+        return web.json_response({'_embedded': {'items': items[offset:offset + limit], 'total': len(items),
+                                                'limit': limit, 'offset': offset}})
+
+    async def _operation(self, request: web.Request) -> web.Response:
+        operation = request.match_info['id']
+        self._operations[operation] += 1
+        self._active_polls += 1
+        self.max_active_polls = max(self.max_active_polls, self._active_polls)
+        try:
+            await self._delay(request)
+        finally:
+            self._active_polls -= 1
+        return web.json_response({'status': 'success' if self._operations[operation] > 1 else 'in-progress'})
+
+    async def _upload_link(self, request: web.Request) -> web.Response:
+        await self._delay(request)
+        if self._fail():
+            return web.json_response({'message': 'Service unavailable'}, status=503)
+        href = request.url.with_path('/upload').with_query({'path': self._normalize(request.query['path'])})
+        return web.json_response({'href': str(href), 'method': 'PUT', 'templated': False})
+
+    async def _download_link(self, request: web.Request) -> web.Response:
+        await self._delay(request)
+        path = self._normalize(request.query['path'])
+        if path not in self.files:
+            return web.json_response({'message': 'Not found'}, status=404)
+        href = request.url.with_path('/download').with_query({'path': path})
+        return web.json_response({'href': str(href), 'method': 'GET', 'templated': False})
+
+    async def _upload(self, request: web.Request) -> web.Response:
+        await self._delay(request)
+        body = bytearray()
+        async for chunk in request.content.iter_chunked(TRANSFER_CHUNK):
+            body += chunk
+            if self.bandwidth:
+                await asyncio.sleep(len(chunk) / self.bandwidth)
+        self.bytes_received += len(body)
+        path = request.query['path']
+        content_range = request.headers.get('Content-Range')
+        if content_range is None:
+            if self._fail() or path in self.fail_uploads:
+                return web.Response(status=503)
+            self.add_file(path, bytes(body))
+            return web.Response(status=201)
+
+        first_last, _, total = content_range.removeprefix('bytes ').partition('/')
+        first, last = (int(value) for value in first_last.split('-'))
+        self.upload_ranges.append((path, first))
+        if (self._fail() or path in self.fail_uploads
+                or (self.upload_limit is not None and first >= self.upload_limit)):
+            return web.Response(status=503)
+        partial = self.partial_uploads.get(path, bytearray()) if first else bytearray()
+        if first != len(partial) or last - first + 1 != len(body):
+            return web.Response(status=416)
+        partial += body
+        if last + 1 == int(total):
+            self.partial_uploads.pop(path, None)
+            self.add_file(path, bytes(partial))
+            return web.Response(status=201)
+        self.partial_uploads[path] = partial
+        return web.Response(status=202)
+
+    async def _download(self, request: web.Request) -> web.StreamResponse:
+        file = self.files.get(request.query['path'])
+        if file is None:
+            return web.Response(status=404)
+        data = file['data']
+        start, end, status = 0, len(data), 200
+        if (range_header := request.headers.get('Range')) is not None:
+            first, _, last = range_header.removeprefix('bytes=').partition('-')
+            start, end, status = int(first), min(int(last) + 1 if last else len(data), len(data)), 206
+        await self._delay(request, end - start)
+        headers = {'Content-Range': f'bytes {start}-{end - 1}/{len(data)}'} if status == 206 else {}
+        return web.Response(status=status, body=data[start:end], headers=headers)
+
+    async def _copy(self, request: web.Request) -> web.Response:
+        await self._delay(request)
+        if self._fail():
+            return web.json_response({'message': 'Service unavailable'}, status=503)
+        source = self._normalize(request.query['from'])
+        if source not in self.files:
+            return web.json_response({'message': 'Not found'}, status=404)
+        self.add_file(request.query['path'], self.files[source]['data'])
+        self.files[self._normalize(request.query['path'])]['custom_properties'] = \
+            self.files[source]['custom_properties']
+        return web.json_response({'href': request.url.path + '?path=' + request.query['path']}, status=201)
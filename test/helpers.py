@@ -0,0 +1,45 @@
+""" Shared test helpers: integration config, backup files and YaDsk connected to fake Yandex Disk """
+import datetime
+import hashlib
+import io
+import json
+import os
+import tarfile
+
+import aiohttp
+
+from custom_components.yabackup.constants import CONF_TOKEN, CONF_REFRESH_TOKEN, CONF_PATH, CONF_MAX_REMOTE_FILE, \
+    CONF_CLIENT_ID, CONF_CLIENT_SECRET, CONF_TOKEN_EXPIRES
+from custom_components.yabackup.yad import BackupObserver, YaDsk, YandexDiskClient
+from fake_yandex_disk import FakeYandexDisk
+
+CONFIG = {CONF_TOKEN: "token",
+          CONF_REFRESH_TOKEN: "refresh_token",
+          CONF_PATH: "/backup",
+          CONF_MAX_REMOTE_FILE: 10,
+          CONF_CLIENT_ID: "client_id",
+          CONF_CLIENT_SECRET: "client_secret",
+          CONF_TOKEN_EXPIRES: (datetime.datetime.now() + datetime.timedelta(days=365)).isoformat()}
+
+
+def make_backup(path, slug: str, size: int = 1000) -> str:
+    """ Create backup file with random payload, return its MD5 """
+    data = json.dumps({"slug": slug, "name": "Backup " + slug, "date": "2023-01-01T00:00:00+00:00"}).encode()
+    with tarfile.open(path, "w:") as backup_file:
+        for name, content in (("./backup.json", data), ("./homeassistant.tar.gz", os.urandom(size))):
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            backup_file.addfile(info, io.BytesIO(content))
+    with open(path, "rb") as backup_file:
+        return hashlib.md5(backup_file.read()).hexdigest()
+
+
+def make_ya_dsk(hass, backup_dir, server: FakeYandexDisk, session: aiohttp.ClientSession,
+                entry_id: str = "entry", **options) -> YaDsk:
+    """ YaDsk for backup directory with client connected to fake Yandex Disk """
+    ya_dsk = YaDsk(hass, BackupObserver(hass, str(backup_dir)), dict(CONFIG, **options), entry_id)
+    ya_dsk._session = session
+    ya_dsk._client = YandexDiskClient(hass, session, CONFIG[CONF_TOKEN], base_url=server.url,
+                                      rate_limiter=ya_dsk._rate_limiter, telemetry=ya_dsk._telemetry,
+                                      buffer_pool=ya_dsk._buffer_pool)
+    return ya_dsk
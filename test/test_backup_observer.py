@@ -0,0 +1,209 @@
+import asyncio
+import io
+import json
+import tarfile
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from custom_components.yabackup import _acquire_backup_observer, _release_backup_observer, async_setup_entry
+from custom_components.yabackup.constants import DOMAIN, DATA_BACKUP_OBSERVERS
+from custom_components.yabackup.yad import BackupObserver, YaDsk, read_backup_json
+
+
+def _add_member(backup_file, name, data):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    backup_file.addfile(info, io.BytesIO(data))
+
+
+def _make_backup(path, slug, name="Backup", payload_size=0, backup_json_first=True):
+    data = json.dumps({"slug": slug, "name": name, "date": "2023-01-01T00:00:00+00:00"}).encode()
+    with tarfile.open(path, "w:") as backup_file:
+        if backup_json_first:
+            _add_member(backup_file, "./backup.json", data)
+        _add_member(backup_file, "./homeassistant.tar.gz", bytes(payload_size))
+        if not backup_json_first:
+            _add_member(backup_file, "./backup.json", data)
+
+
+def _make_observer(backup_dir):
+    observer = BackupObserver(MagicMock(), str(backup_dir))
+    observer._index = {}
+    return observer
+
+
+def test_read_backups_uses_index(tmp_path):
+    _make_backup(tmp_path / "b1.tar", "slug1")
+    _make_backup(tmp_path / "b2.tar", "slug2")
+    (tmp_path / "other.txt").write_text("not a backup")
+    observer = _make_observer(tmp_path)
+
+    backups, index_changed = observer._read_backups()
+    assert set(backups.keys()) == {"slug1", "slug2"}
+    assert index_changed
+
+    with patch.object(BackupObserver, "_read_backup_info") as read_info:
+        backups, index_changed = observer._read_backups()
+        read_info.assert_not_called()
+    assert set(backups.keys()) == {"slug1", "slug2"}
+    assert not index_changed
+
+
+def test_read_backups_evicts_deleted_and_rereads_changed(tmp_path):
+    _make_backup(tmp_path / "b1.tar", "slug1")
+    _make_backup(tmp_path / "b2.tar", "slug2")
+    observer = _make_observer(tmp_path)
+    observer._read_backups()
+
+    (tmp_path / "b1.tar").unlink()
+    _make_backup(tmp_path / "b2.tar", "slug3", name="Changed backup with longer name")
+
+    backups, index_changed = observer._read_backups()
+    assert index_changed
+    assert set(backups.keys()) == {"slug3"}
+    assert list(observer._index.keys()) == [str(tmp_path / "b2.tar")]
+
+
+def test_read_backups_missing_dir(tmp_path):
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+    _make_backup(backup_dir / "b1.tar", "slug1")
+    observer = _make_observer(backup_dir)
+    observer._read_backups()
+
+    index = dict(observer._index)
+    backup_dir.rename(tmp_path / "unmounted")
+
+    backups, index_changed = observer._read_backups()
+    assert backups == {}
+    assert not index_changed
+    assert observer._index == index
+
+    # Directory back, backup not read again
+    (tmp_path / "unmounted").rename(backup_dir)
+    backups, index_changed = observer._read_backups()
+    assert list(backups) == ["slug1"]
+    assert not index_changed
+    assert observer._last_scan_bytes_read == 0
+
+    # File deleted from existing directory
+    (backup_dir / "b1.tar").unlink()
+    backups, index_changed = observer._read_backups()
+    assert backups == {}
+    assert index_changed
+    assert observer._index == {}
+
+
+def test_read_one_backup_uses_index(tmp_path):
+    _make_backup(tmp_path / "b1.tar", "slug1")
+    _make_backup(tmp_path / "b2.tar", "slug2")
+    observer = _make_observer(tmp_path)
+
+    backup, index_changed = observer._read_one_backup(tmp_path / "b1.tar")
+    assert backup.slug == "slug1"
+    assert index_changed
+    assert list(observer._index.keys()) == [str(tmp_path / "b1.tar")]
+
+    backup, index_changed = observer._read_one_backup(tmp_path / "b1.tar")
+    assert backup.slug == "slug1"
+    assert not index_changed
+
+    assert observer._read_one_backup(tmp_path / "deleted.tar") == (None, False)
+
+
+def test_read_backup_json_reads_headers_only(tmp_path):
+    _make_backup(tmp_path / "first.tar", "slug1", payload_size=5_000_000)
+    _make_backup(tmp_path / "last.tar", "slug2", payload_size=5_000_000, backup_json_first=False)
+
+    data, bytes_read = read_backup_json(tmp_path / "first.tar")
+    assert data["slug"] == "slug1"
+    assert bytes_read < 2048
+
+    data, bytes_read = read_backup_json(tmp_path / "last.tar")
+    assert data["slug"] == "slug2"
+    assert bytes_read < 2048
+
+
+def test_read_backup_json_long_name_and_missing(tmp_path):
+    with tarfile.open(tmp_path / "long.tar", "w:", format=tarfile.PAX_FORMAT) as backup_file:
+        _add_member(backup_file, "./" + "x" * 150, b"data")
+        _add_member(backup_file, "./backup.json", json.dumps({"slug": "slug1"}).encode())
+    with tarfile.open(tmp_path / "missing.tar", "w:") as backup_file:
+        _add_member(backup_file, "./other.json", b"{}")
+
+    assert read_backup_json(tmp_path / "long.tar")[0] == {"slug": "slug1"}
+    assert read_backup_json(tmp_path / "missing.tar")[0] is None
+
+
+def test_read_backup_json_falls_back_when_limit_exceeded(tmp_path):
+    _make_backup(tmp_path / "b1.tar", "slug1", payload_size=1000, backup_json_first=False)
+
+    data, bytes_read = read_backup_json(tmp_path / "b1.tar", max_bytes=512)
+    assert data["slug"] == "slug1"
+    assert bytes_read > 512
+
+
+async def test_concurrent_get_backups_share_one_scan(tmp_path, hass):
+    _make_backup(tmp_path / "b1.tar", "slug1")
+    observer = BackupObserver(hass, str(tmp_path))
+    observer._index = {}
+    observer._store = MagicMock(async_save=AsyncMock())
+
+    with patch.object(BackupObserver, "_read_backups", wraps=observer._read_backups) as read_backups:
+        results = await asyncio.gather(*[observer.get_backups() for _ in range(3)])
+        assert read_backups.call_count == 1
+        assert all(set(backups) == {"slug1"} for backups in results)
+
+        await observer.get_backups()
+        assert read_backups.call_count == 1
+
+        _make_backup(tmp_path / "b2.tar", "slug2")
+        assert set(await observer.get_backups()) == {"slug1", "slug2"}
+        assert read_backups.call_count == 2
+
+
+
+async def test_saved_index_is_copy(tmp_path, hass):
+    _make_backup(tmp_path / "b1.tar", "slug1")
+    observer = BackupObserver(hass, str(tmp_path))
+    observer._index = {}
+    observer._store = MagicMock(async_save=AsyncMock())
+
+    backups = await observer.get_backups()
+    await observer.get_backup_hashes(list(backups.values()))
+
+    path = str(tmp_path / "b1.tar")
+    saved = observer._store.async_save.call_args_list[0].args[0]["backups"]
+    assert list(saved) == [path]
+    # Later index changes do not change data being saved
+    assert saved is not observer._index
+    assert "md5" not in saved[path]
+    assert observer._index[path]["md5"] is not None
+
+
+def test_backup_observer_shared_by_entries():
+    hass = MagicMock()
+    hass.data = {DOMAIN: {}}
+
+    first = _acquire_backup_observer(hass, "/backup")
+    second = _acquire_backup_observer(hass, "/backup")
+    assert first is second
+
+    _release_backup_observer(hass, "/backup")
+    assert hass.data[DOMAIN][DATA_BACKUP_OBSERVERS]["/backup"] == (first, 1)
+    _release_backup_observer(hass, "/backup")
+    assert hass.data[DOMAIN][DATA_BACKUP_OBSERVERS] == {}
+
+
+async def test_setup_entry_failure_releases_backup_observer(hass):
+    hass.data = {DOMAIN: {}}
+    entry = MagicMock()
+    entry.data = {}
+
+    with patch.object(YaDsk, "__init__", side_effect=ValueError("wrong options")), pytest.raises(ValueError):
+        await async_setup_entry(hass, entry)
+
+    assert hass.data[DOMAIN][DATA_BACKUP_OBSERVERS] == {}
+    # Options listener removed on unload
+    entry.async_on_unload.assert_called_once_with(entry.add_update_listener.return_value)
@@ -0,0 +1,158 @@
+import asyncio
+import os
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+
+from custom_components.yabackup import yad
+from custom_components.yabackup.constants import CONF_PATH
+from custom_components.yabackup.yad import BackupWatcher, INOTIFY_EVENT, IN_CLOSE_WRITE, IN_MOVED_TO, IN_Q_OVERFLOW
+from fake_yandex_disk import FakeYandexDisk, API_PREFIX
+from helpers import CONFIG, make_backup, make_ya_dsk
+
+SETTLE_SEC = 0.01
+
+
+def _event(mask: int, name: str = "") -> bytes:
+    """ inotify event with name padded like kernel does """
+    encoded = name.encode()
+    length = (len(encoded) // 16 + 1) * 16 if encoded else 0
+    return INOTIFY_EVENT.pack(1, mask, 0, length) + encoded.ljust(length, b"\0")
+
+
+async def _wait_for(condition, timeout: float = 1):
+    """ Wait until condition is true """
+    for _ in range(int(timeout / SETTLE_SEC)):
+        if condition():
+            return
+        await asyncio.sleep(SETTLE_SEC)
+    assert condition()
+
+
+@pytest.fixture
+def settle():
+    with patch.object(yad, "WATCH_SETTLE_SEC", SETTLE_SEC):
+        yield
+
+
+async def test_read_events_reports_settled_backups(tmp_path, hass, settle):
+    found = []
+    watcher = BackupWatcher(hass, tmp_path, found.append)
+    read_fd, write_fd = os.pipe()
+    os.set_blocking(read_fd, False)
+    watcher._fd = read_fd
+    (tmp_path / "b1.tar").write_bytes(b"backup")
+    (tmp_path / "b2.tar").write_bytes(b"backup")
+    try:
+        os.write(write_fd, _event(IN_CLOSE_WRITE, "b1.tar") + _event(IN_Q_OVERFLOW)
+                 + _event(IN_CLOSE_WRITE, "other.txt") + _event(IN_CLOSE_WRITE, ".b3.tar")
+                 + _event(IN_MOVED_TO, "b2.tar") + _event(IN_CLOSE_WRITE, "b1.tar"))
+        watcher._read_events()
+        # Nothing to read
+        watcher._read_events()
+
+        assert set(watcher._pending) == {str(tmp_path / "b1.tar"), str(tmp_path / "b2.tar")}
+        await _wait_for(lambda: len(found) == 2)
+    finally:
+        watcher._fd = None
+        watcher.stop()
+        os.close(read_fd)
+        os.close(write_fd)
+
+    assert sorted(found) == [tmp_path / "b1.tar", tmp_path / "b2.tar"]
+    assert watcher._pending == {}
+
+
+async def test_check_waits_until_backup_not_changed(tmp_path, hass, settle):
+    found = []
+    watcher = BackupWatcher(hass, tmp_path, found.append)
+    path = tmp_path / "b1.tar"
+    path.write_bytes(b"backup")
+    stat = path.stat()
+
+    # Backup still written
+    await watcher._async_check(str(path), (stat.st_size - 1, stat.st_mtime_ns))
+    assert not found
+    assert str(path) in watcher._pending
+
+    await _wait_for(lambda: found)
+    assert found == [path]
+
+    # Deleted backup is not reported
+    found.clear()
+    await watcher._async_check(str(tmp_path / "deleted.tar"), None)
+    assert not found
+    assert watcher._pending == {}
+
+
+async def test_watcher_inotify(tmp_path, hass, settle):
+    found = []
+    watcher = BackupWatcher(hass, tmp_path, found.append)
+    if not watcher.start():
+        pytest.skip("inotify is not available")
+    try:
+        (tmp_path / "b1.tar").write_bytes(b"backup")
+        await _wait_for(lambda: found)
+    finally:
+        watcher.stop()
+
+    assert found == [tmp_path / "b1.tar"]
+    assert not watcher.is_started
+
+
+async def test_upload_pending_backups(tmp_path, hass, memory_store):
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+    make_backup(backup_dir / "b1.tar", "slug1")
+    server = FakeYandexDisk()
+    server.dirs.add(CONFIG[CONF_PATH])
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            ya_dsk = make_ya_dsk(hass, backup_dir, server, session)
+            observer = ya_dsk._backup_observer
+            await ya_dsk.upload_files()
+            server.requests.clear()
+
+            make_backup(backup_dir / "b2.tar", "slug2")
+            ya_dsk._pending_backups.add(backup_dir / "b2.tar")
+            with patch.object(observer, "get_backups", wraps=observer.get_backups) as get_backups:
+                await ya_dsk._upload_pending_backups()
+    finally:
+        await server.stop()
+
+    assert sorted(server.files) == ["/backup/Backup-slug1_slug1", "/backup/Backup-slug2_slug2"]
+    # Only new backup read, remote directory state kept
+    get_backups.assert_not_called()
+    assert server.requests["GET " + API_PREFIX + "/resources"] == 0
+    assert ya_dsk._pending_backups == set()
+    assert "Backup-slug2_slug2" in ya_dsk._file_list
+
+
+async def test_stop_cancels_running_check(tmp_path, hass, settle):
+    found = []
+    watcher = BackupWatcher(hass, tmp_path, found.append)
+    path = tmp_path / "b1.tar"
+    path.write_bytes(b"backup")
+    stat = path.stat()
+    stat_started = asyncio.Event()
+    stat_done = asyncio.Event()
+
+    async def slow_stat(func, *args):
+        stat_started.set()
+        await stat_done.wait()
+        return func(*args)
+
+    hass.async_add_executor_job = slow_stat
+    watcher._schedule_check(str(path), (stat.st_size, stat.st_mtime_ns))
+    await asyncio.wait_for(stat_started.wait(), 1)
+    assert watcher._checks
+
+    watcher.stop()
+    stat_done.set()
+    await asyncio.sleep(2 * SETTLE_SEC)
+
+    assert not found
+    assert watcher._checks == set()
+    assert watcher._pending == {}
@@ -0,0 +1,39 @@
+import asyncio
+import datetime
+
+import pytest
+
+from custom_components.yabackup.yad import BandwidthSchedule, TokenBucket
+
+
+def test_schedule_rate():
+    schedule = BandwidthSchedule(2048, "23:00-07:00=0; 12:00-13:00=512")
+
+    assert schedule.rate(datetime.time(2, 0)) == 0
+    assert schedule.rate(datetime.time(23, 30)) == 0
+    assert schedule.rate(datetime.time(12, 30)) == 512 * 1024
+    assert schedule.rate(datetime.time(9, 0)) == 2048 * 1024
+
+
+@pytest.mark.parametrize("windows", ["23:00-07:00", "25:00-07:00=0", "23:00-07:00=-1", "23:00=0"])
+def test_schedule_wrong_windows(windows):
+    with pytest.raises(ValueError):
+        BandwidthSchedule.parse_windows(windows)
+
+
+async def test_token_bucket_limits_throughput():
+    bucket = TokenBucket(BandwidthSchedule(100))
+    start = asyncio.get_running_loop().time()
+    for _ in range(3):
+        await bucket.async_consume(10 * 1024)
+
+    assert asyncio.get_running_loop().time() - start >= 0.29
+    assert bucket.effective_throughput <= 110 * 1024
+
+
+async def test_token_bucket_unlimited():
+    bucket = TokenBucket(BandwidthSchedule(0))
+    await bucket.async_consume(100 * 1024 * 1024)
+    await bucket.async_consume(100 * 1024 * 1024)
+
+    assert bucket.current_limit == 0
@@ -0,0 +1,192 @@
+""" Benchmarks of backup scan, directory listing and upload against local fake Yandex Disk.
+
+Sizes multiplied by YABACKUP_BENCHMARK_SCALE environment variable (default 1 - quick run).
+Results printed, run with `pytest test/test_benchmark.py -s`.
+"""
+import datetime
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import aiohttp
+from homeassistant.util import dt as dt_util
+
+from custom_components.yabackup import yad
+from custom_components.yabackup.constants import CONF_PATH, CONF_MAX_REMOTE_FILE, CONF_UPLOAD_PARALLELISM, \
+    CONF_KEEP_DAILY, CONF_PERMANENT_DELETE, CONF_UPLOAD_MEMORY_LIMIT, DEFAULT_UPLOAD_MEMORY_LIMIT, \
+    MAX_UPLOAD_PARALLELISM
+from custom_components.yabackup.yad import BackupObserver, YaDsk
+from fake_yandex_disk import FakeYandexDisk
+from helpers import CONFIG, make_backup, make_ya_dsk
+
+SCALE = int(os.environ.get("YABACKUP_BENCHMARK_SCALE", "1"))
+ROOT = Path(__file__).parent.parent
+MB = 1_048_576
+MAX_REMOTE_FILE = 1000
+
+
+def _report(name: str, **values):
+    print("\nBENCHMARK " + name + " " + " ".join(f"{key}={value}" for key, value in values.items()))
+
+
+def _make_backups(backup_dir, count: int, size: int):
+    for number in range(count):
+        make_backup(backup_dir / f"backup{number}.tar", f"slug{number}", size)
+
+
+def _make_ya_dsk(hass, backup_dir, server: FakeYandexDisk, session: aiohttp.ClientSession, **options) -> YaDsk:
+    return make_ya_dsk(hass, backup_dir, server, session, "benchmark",
+                       **dict({CONF_MAX_REMOTE_FILE: MAX_REMOTE_FILE}, **options))
+
+
+def test_benchmark_import():
+    code = ("import sys, time\n"
+            "import homeassistant.components.sensor, homeassistant.components.button\n"
+            "import homeassistant.helpers.update_coordinator, homeassistant.helpers.storage\n"
+            "started = time.perf_counter()\n"
+            "import custom_components.yabackup.sensor, custom_components.yabackup.button\n"
+            "print(time.perf_counter() - started, 'tarfile' in sys.modules, 'zstandard' in sys.modules)")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    elapsed, tarfile_loaded, zstandard_loaded = result.stdout.split()
+
+    _report("import", ms=round(float(elapsed) * 1000, 1), tarfile=tarfile_loaded, zstandard=zstandard_loaded)
+    assert tarfile_loaded == "False"
+    assert zstandard_loaded == "False"
+
+
+async def test_benchmark_setup(tmp_path, hass, memory_store):
+    server = FakeYandexDisk()
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            started = time.perf_counter()
+            ya_dsk = _make_ya_dsk(hass, tmp_path, server, session)
+            await ya_dsk.async_load()
+            elapsed = time.perf_counter() - started
+            await ya_dsk.async_close()
+    finally:
+        await server.stop()
+
+    _report("setup", ms=round(elapsed * 1000, 1), requests=sum(server.requests.values()))
+    # First listing deferred until Home Assistant started
+    assert not server.requests
+    hass.bus.async_listen_once.assert_called_once()
+
+
+async def test_benchmark_read_backups(tmp_path, hass, memory_store):
+    _make_backups(tmp_path, 50 * SCALE, 256 * 1024)
+    observer = BackupObserver(hass, str(tmp_path))
+    observer._index = {}
+
+    started = time.perf_counter()
+    backups, _ = observer._read_backups()
+    cold = time.perf_counter() - started
+    cold_bytes = observer.last_scan_bytes_read
+
+    started = time.perf_counter()
+    observer._read_backups()
+    warm = time.perf_counter() - started
+
+    _report("read_backups", files=len(backups), cold_ms=round(cold * 1000, 1), cold_bytes=cold_bytes,
+            warm_ms=round(warm * 1000, 1), warm_bytes=observer.last_scan_bytes_read)
+    assert len(backups) == 50 * SCALE
+    assert observer.last_scan_bytes_read == 0
+
+
+async def test_benchmark_list_yandex_disk(tmp_path, hass, memory_store):
+    server = FakeYandexDisk(latency=0.005)
+    file_count = 2000 * SCALE
+    first_modified = datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)
+    for number in range(file_count):
+        server.add_file(f"/backup/file{number}", b"x", first_modified + datetime.timedelta(minutes=number))
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            ya_dsk = _make_ya_dsk(hass, tmp_path, server, session)
+            started = time.perf_counter()
+            await ya_dsk.list_yandex_disk()
+            elapsed = time.perf_counter() - started
+    finally:
+        await server.stop()
+
+    _report("list_yandex_disk", files=file_count, ms=round(elapsed * 1000, 1),
+            requests=sum(server.requests.values()))
+    assert ya_dsk.file_amount == file_count
+    assert ya_dsk._file_list[0] == f"file{file_count - 1}"
+
+
+async def test_benchmark_prune(tmp_path, hass, memory_store):
+    server = FakeYandexDisk(latency=0.01)
+    server.async_deletes = True
+    file_count = 500 * SCALE
+    now = dt_util.start_of_local_day() + datetime.timedelta(hours=23)
+    for number in range(file_count):
+        server.add_file(f"/backup/file{number}", b"x", now - datetime.timedelta(hours=number))
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            with patch.object(yad, "OPERATION_POLL_INTERVAL_SEC", 0.01):
+                ya_dsk = _make_ya_dsk(hass, tmp_path, server, session,
+                                      **{CONF_MAX_REMOTE_FILE: 10, CONF_KEEP_DAILY: 7, CONF_PERMANENT_DELETE: True})
+                started = time.perf_counter()
+                await ya_dsk.upload_files()
+                elapsed = time.perf_counter() - started
+    finally:
+        await server.stop()
+
+    _report("prune", files=file_count, deleted=file_count - len(server.files), sec=round(elapsed, 2),
+            requests=sum(server.requests.values()))
+    # 10 newest files (same day) and newest file of 6 previous days
+    assert len(server.files) == 16
+    assert not server.trash
+
+
+async def _benchmark_upload(tmp_path, hass, name: str, server: FakeYandexDisk, count: int, size: int, **options):
+    _make_backups(tmp_path, count, size)
+    server.dirs.add(CONFIG[CONF_PATH])
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            with patch.object(yad, "REQUEST_RETRY_INTERVAL_SEC", 0):
+                ya_dsk = _make_ya_dsk(hass, tmp_path, server, session, **options)
+                started = time.perf_counter()
+                await ya_dsk.upload_files()
+                elapsed = time.perf_counter() - started
+    finally:
+        await server.stop()
+
+    uploaded = sum(len(file["data"]) for file in server.files.values())
+    _report(name, files=len(server.files), mb=round(uploaded / MB, 1), sec=round(elapsed, 2),
+            mb_s=round(uploaded / MB / elapsed, 1), requests=sum(server.requests.values()), errors=server.errors,
+            retries=ya_dsk.telemetry["retries"], spans=ya_dsk.telemetry["spans"],
+            buffer_peak_kb=ya_dsk.upload_progress["buffer_peak_kb"])
+    assert len(server.files) == count
+    assert ya_dsk.telemetry["bytes_sent"] >= uploaded
+    # Buffers within configured memory limit
+    assert ya_dsk.upload_progress["buffer_peak_kb"] <= ya_dsk.upload_progress["buffer_limit_kb"] <= \
+        options.get(CONF_UPLOAD_MEMORY_LIMIT, DEFAULT_UPLOAD_MEMORY_LIMIT) * 1024
+    return elapsed
+
+
+async def test_benchmark_upload_files(tmp_path, hass, memory_store):
+    await _benchmark_upload(tmp_path, hass, "upload_files", FakeYandexDisk(latency=0.01), 4 * SCALE, 4 * MB)
+
+
+async def test_benchmark_upload_files_limited_bandwidth_parallel(tmp_path, hass, memory_store):
+    await _benchmark_upload(tmp_path, hass, "upload_files_parallel",
+                            FakeYandexDisk(latency=0.01, bandwidth=20 * MB), 4 * SCALE, 2 * MB,
+                            **{CONF_UPLOAD_PARALLELISM: 4})
+
+
+async def test_benchmark_upload_files_memory_limit(tmp_path, hass, memory_store):
+    await _benchmark_upload(tmp_path, hass, "upload_files_memory_limit", FakeYandexDisk(latency=0.01),
+                            4 * SCALE, 4 * MB,
+                            **{CONF_UPLOAD_PARALLELISM: MAX_UPLOAD_PARALLELISM, CONF_UPLOAD_MEMORY_LIMIT: 1})
+
+
+async def test_benchmark_upload_files_with_errors(tmp_path, hass, memory_store):
+    await _benchmark_upload(tmp_path, hass, "upload_files_errors",
+                            FakeYandexDisk(latency=0.01, error_rate=0.1, seed=1), 4 * SCALE, 1 * MB)
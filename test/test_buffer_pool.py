@@ -0,0 +1,53 @@
+import asyncio
+import hashlib
+import os
+
+import aiohttp
+
+from custom_components.yabackup.constants import UPLOAD_CHUNK_SIZE, UPLOAD_BUFFER_MIN_SIZE
+from custom_components.yabackup.yad import BufferPool, YandexDiskClient
+from fake_yandex_disk import FakeYandexDisk
+
+
+def test_buffer_pool_size():
+    pool = BufferPool(8 * UPLOAD_CHUNK_SIZE, 2)
+    assert pool.buffer_size == UPLOAD_CHUNK_SIZE
+    assert pool.limit == 8 * UPLOAD_CHUNK_SIZE
+
+    # Two buffers for every reader fit into limit
+    pool = BufferPool(UPLOAD_CHUNK_SIZE, 4)
+    assert pool.buffer_size == UPLOAD_CHUNK_SIZE // 8
+    assert pool.limit == UPLOAD_CHUNK_SIZE
+    assert pool.readers == 4
+
+    # Readers reduced to fit limit with smallest buffers
+    pool = BufferPool(UPLOAD_CHUNK_SIZE, 10)
+    assert pool.buffer_size == UPLOAD_BUFFER_MIN_SIZE
+    assert pool.limit == UPLOAD_CHUNK_SIZE
+    assert pool.readers == UPLOAD_CHUNK_SIZE // (2 * UPLOAD_BUFFER_MIN_SIZE)
+
+    # At least two buffers
+    pool = BufferPool(0, 2)
+    assert pool.buffer_size == UPLOAD_BUFFER_MIN_SIZE
+    assert pool.limit == 2 * UPLOAD_BUFFER_MIN_SIZE
+    assert pool.readers == 1
+
+
+async def test_parallel_uploads_within_memory_limit(tmp_path, hass):
+    files = {f"/backup/file{number}": os.urandom(3 * UPLOAD_CHUNK_SIZE + number) for number in range(3)}
+    for name, data in files.items():
+        (tmp_path / name.rsplit("/", 1)[1]).write_bytes(data)
+    pool = BufferPool(UPLOAD_CHUNK_SIZE, 3)
+    server = FakeYandexDisk(bandwidth=20 * UPLOAD_CHUNK_SIZE)
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            client = YandexDiskClient(hass, session, "token", base_url=server.url, buffer_pool=pool)
+            await asyncio.gather(*[client.upload(str(tmp_path / name.rsplit("/", 1)[1]), name) for name in files])
+            await client.upload(str(tmp_path / "file0"), "/backup/file0_gz", compression="gzip")
+    finally:
+        await server.stop()
+
+    assert all(server.files[name]["md5"] == hashlib.md5(data).hexdigest() for name, data in files.items())
+    assert 0 < pool.peak_bytes <= UPLOAD_CHUNK_SIZE
+    assert pool.in_use_bytes == 0
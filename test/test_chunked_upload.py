@@ -0,0 +1,106 @@
+import datetime
+import hashlib
+import os
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+
+from custom_components.yabackup import yad
+from custom_components.yabackup.yad import YandexDiskClient, UploadJournal, YandexDiskApiError, \
+    UploadVerificationError, JOURNAL_FIELD_CHECKPOINTS, JOURNAL_FIELD_OFFSET, JOURNAL_FIELD_LINK_CREATED
+from fake_yandex_disk import FakeYandexDisk
+
+CHUNK_SIZE = 1_048_576
+FILE_SIZE = 3 * CHUNK_SIZE + 1000
+DESTINATION = "/backup/file.tar"
+
+
+async def _interrupted_upload(tmp_path, hass, server) -> tuple[str, bytes]:
+    """ Upload file to server, accepting ranges only before 2 chunks """
+    data = os.urandom(FILE_SIZE)
+    source_file = str(tmp_path / "file.tar")
+    (tmp_path / "file.tar").write_bytes(data)
+    server.upload_limit = 2 * CHUNK_SIZE
+    journal = UploadJournal(hass, "entry")
+    async with aiohttp.ClientSession() as session:
+        client = YandexDiskClient(hass, session, "token", base_url=server.url)
+        with pytest.raises(YandexDiskApiError):
+            await client.upload_chunked(source_file, DESTINATION, journal)
+    server.upload_limit = None
+    server.upload_ranges.clear()
+    return source_file, data
+
+
+async def _resume_upload(hass, server, source_file: str, md5: str | None = None) -> UploadJournal:
+    """ Upload file with new journal, like after restart """
+    journal = UploadJournal(hass, "entry")
+    async with aiohttp.ClientSession() as session:
+        client = YandexDiskClient(hass, session, "token", base_url=server.url)
+        await client.upload_chunked(source_file, DESTINATION, journal, md5=md5)
+    return journal
+
+
+def _checkpoint(memory_store) -> dict:
+    return memory_store.data[yad.STORAGE_UPLOAD_JOURNAL + ".entry"][JOURNAL_FIELD_CHECKPOINTS][DESTINATION]
+
+
+@pytest.fixture
+async def server():
+    server = FakeYandexDisk()
+    await server.start()
+    with patch.object(yad, "UPLOAD_RESUME_CHUNK_SIZE", CHUNK_SIZE), \
+            patch.object(yad, "REQUEST_RETRY_INTERVAL_SEC", 0):
+        yield server
+    await server.stop()
+
+
+async def test_upload_chunked_resume_after_restart(tmp_path, hass, memory_store, server):
+    source_file, data = await _interrupted_upload(tmp_path, hass, server)
+
+    assert DESTINATION not in server.files
+    assert _checkpoint(memory_store)[JOURNAL_FIELD_OFFSET] == 2 * CHUNK_SIZE
+
+    journal = await _resume_upload(hass, server, source_file)
+
+    assert server.upload_ranges == [(DESTINATION, 2 * CHUNK_SIZE), (DESTINATION, 3 * CHUNK_SIZE)]
+    assert hashlib.md5(server.files[DESTINATION]["data"]).hexdigest() == hashlib.md5(data).hexdigest()
+    assert not journal._checkpoints
+
+
+async def test_upload_chunked_restart_when_chunk_changed(tmp_path, hass, memory_store, server):
+    source_file, data = await _interrupted_upload(tmp_path, hass, server)
+    stat = os.stat(source_file)
+    changed = bytearray(data)
+    changed[CHUNK_SIZE + 10] ^= 1
+    with open(source_file, "r+b") as file:
+        file.write(changed)
+    os.utime(source_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    await _resume_upload(hass, server, source_file)
+
+    assert server.upload_ranges[0] == (DESTINATION, 0)
+    assert server.files[DESTINATION]["data"] == bytes(changed)
+
+
+async def test_upload_chunked_restart_when_link_expired(tmp_path, hass, memory_store, server):
+    source_file, data = await _interrupted_upload(tmp_path, hass, server)
+    link_created = datetime.datetime.now(datetime.timezone.utc) - yad.UPLOAD_LINK_LIFETIME - datetime.timedelta(1)
+    _checkpoint(memory_store)[JOURNAL_FIELD_LINK_CREATED] = link_created.isoformat()
+
+    await _resume_upload(hass, server, source_file)
+
+    assert server.upload_ranges[0] == (DESTINATION, 0)
+    assert len(server.upload_ranges) == 4
+    assert server.files[DESTINATION]["data"] == data
+
+
+async def test_upload_chunked_verify_result(tmp_path, hass, memory_store, server):
+    source_file, data = await _interrupted_upload(tmp_path, hass, server)
+    # Confirmed chunk damaged on server
+    server.partial_uploads[DESTINATION][10] ^= 1
+
+    with pytest.raises(UploadVerificationError, match="MD5"):
+        await _resume_upload(hass, server, source_file, hashlib.md5(data).hexdigest())
+
+    assert DESTINATION not in memory_store.data[yad.STORAGE_UPLOAD_JOURNAL + ".entry"][JOURNAL_FIELD_CHECKPOINTS]
@@ -0,0 +1,23 @@
+import gzip
+import os
+
+from custom_components.yabackup.yad import StreamCompressor, RemoteFile, PROPERTY_SOURCE_MD5
+
+
+def test_gzip_stream_compressor():
+    data = os.urandom(1000) + bytes(100000)
+    compressor = StreamCompressor('gzip')
+
+    result = compressor.compress(data[:50000]) + compressor.compress(data[50000:]) + compressor.flush()
+
+    assert gzip.decompress(result) == data
+    assert compressor.input_size == len(data)
+    assert compressor.output_size == len(result)
+    assert compressor.ratio < 0.1
+
+
+def test_remote_file_content_md5():
+    assert RemoteFile(name="a.tar", type="file", modified=None, md5="1").content_md5 == "1"
+    assert RemoteFile(name="a_gz", type="file", modified=None, md5="1").content_md5 is None
+    assert RemoteFile(name="a_gz", type="file", modified=None, md5="1",
+                      custom_properties={PROPERTY_SOURCE_MD5: "2"}).content_md5 == "2"
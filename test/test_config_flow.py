@@ -0,0 +1,12 @@
+from unittest.mock import MagicMock
+
+from custom_components.yabackup.config_flow import OptionsFlowHandler
+
+
+def test_options_flow_data_not_shared():
+    first = OptionsFlowHandler(MagicMock())
+    second = OptionsFlowHandler(MagicMock())
+
+    first._data["path"] = "/first"
+
+    assert second._data == {}
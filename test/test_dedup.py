@@ -0,0 +1,38 @@
+import io
+import os
+import tarfile
+
+from custom_components.yabackup.yad import split_backup_chunks
+
+
+def _make_tar(path, members):
+    with tarfile.open(path, "w:") as backup_file:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            backup_file.addfile(info, io.BytesIO(data))
+
+
+def test_split_backup_chunks(tmp_path):
+    addon = os.urandom(50000)
+    _make_tar(tmp_path / "1.tar", [("./backup.json", b'{"slug": "1"}'), ("./addon.tar.gz", addon),
+                                   ("./db.tar.gz", os.urandom(30000))])
+    _make_tar(tmp_path / "2.tar", [("./backup.json", b'{"slug": "22"}'), ("./addon.tar.gz", addon),
+                                   ("./db.tar.gz", os.urandom(40000))])
+
+    chunks1 = split_backup_chunks(tmp_path / "1.tar", max_size=20480)
+    chunks2 = split_backup_chunks(tmp_path / "2.tar", max_size=20480)
+
+    assert sum(size for _, size in chunks1) == (tmp_path / "1.tar").stat().st_size
+    assert max(size for _, size in chunks1) <= 20480
+    # Addon member chunks are same in both backups
+    shared = set(chunks1) & set(chunks2)
+    assert sum(size for _, size in shared) >= len(addon) - 20480
+
+
+def test_split_not_tar(tmp_path):
+    (tmp_path / "1.tar").write_bytes(os.urandom(5000))
+
+    chunks = split_backup_chunks(tmp_path / "1.tar", max_size=2048)
+
+    assert [size for _, size in chunks] == [2048, 2048, 904]
@@ -0,0 +1,77 @@
+import hashlib
+import os
+
+import aiohttp
+import pytest
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.yabackup.constants import ENCRYPTION_SEGMENT_SIZE
+from custom_components.yabackup.yad import StreamEncryptor, StreamDecryptor, YandexDiskClient, RemoteFile, \
+    ENCRYPTION_HEADER_SIZE, ENCRYPTION_TAG_SIZE
+from fake_yandex_disk import FakeYandexDisk
+
+
+def _encrypt(data: bytes, key: str = "key", chunk: int = 100_000) -> bytes:
+    encryptor = StreamEncryptor(key)
+    result = b"".join(encryptor.encrypt(data[start:start + chunk]) for start in range(0, len(data), chunk))
+    return result + encryptor.flush()
+
+
+def _decrypt(data: bytes, key: str = "key", chunk: int = 100_000) -> bytes:
+    decryptor = StreamDecryptor(key)
+    result = b"".join(decryptor.decrypt(data[start:start + chunk]) for start in range(0, len(data), chunk))
+    return result + decryptor.flush()
+
+
+@pytest.mark.parametrize("size", [0, 1000, ENCRYPTION_SEGMENT_SIZE, 2 * ENCRYPTION_SEGMENT_SIZE + 1])
+def test_stream_encryption_roundtrip(size):
+    data = os.urandom(size)
+
+    encrypted = _encrypt(data)
+
+    assert len(encrypted) == StreamEncryptor.encrypted_size(size)
+    assert _decrypt(encrypted, chunk=77_777) == data
+
+
+def test_stream_decryption_detects_damage():
+    data = os.urandom(2 * ENCRYPTION_SEGMENT_SIZE + 1)
+    encrypted = _encrypt(data)
+    damaged = bytearray(encrypted)
+    damaged[ENCRYPTION_SEGMENT_SIZE] ^= 1
+
+    with pytest.raises(HomeAssistantError):
+        _decrypt(bytes(damaged))
+    # Last segment dropped
+    with pytest.raises(HomeAssistantError):
+        _decrypt(encrypted[:ENCRYPTION_HEADER_SIZE + 2 * (ENCRYPTION_SEGMENT_SIZE + ENCRYPTION_TAG_SIZE)])
+    with pytest.raises(HomeAssistantError):
+        _decrypt(encrypted, key="other")
+
+
+def test_remote_file_content_md5_encrypted():
+    assert RemoteFile(name="a.tar_gz_enc", type="file", modified=None, md5="1").content_md5 is None
+
+
+async def test_client_upload_encrypted(tmp_path, hass):
+    data = os.urandom(ENCRYPTION_SEGMENT_SIZE + 100)
+    (tmp_path / "file.tar").write_bytes(data)
+    server = FakeYandexDisk()
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            client = YandexDiskClient(hass, session, "token", base_url=server.url)
+            compressor = await client.upload(str(tmp_path / "file.tar"), "/backup/file_enc", encryption_key="key")
+            gzip_compressor = await client.upload(str(tmp_path / "file.tar"), "/backup/file_gz_enc",
+                                                  compression="gzip", encryption_key="key")
+            decryptor = StreamDecryptor("key")
+            restored = b"".join([decryptor.decrypt(chunk) async for chunk in client.download("/backup/file_enc")])
+            restored += decryptor.flush()
+    finally:
+        await server.stop()
+
+    assert compressor is None
+    assert server.files["/backup/file_enc"]["data"] != data
+    assert hashlib.md5(restored).hexdigest() == hashlib.md5(data).hexdigest()
+    assert gzip_compressor.input_size == len(data)
+    assert len(server.files["/backup/file_gz_enc"]["data"]) == \
+        StreamEncryptor.encrypted_size(gzip_compressor.output_size)
@@ -0,0 +1,113 @@
+import os
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+
+from custom_components.yabackup import yad
+from custom_components.yabackup.constants import UPLOAD_BUFFER_MIN_SIZE
+from custom_components.yabackup.yad import BufferPool, StreamEncryptor, UploadProgress, YandexDiskClient
+from fake_yandex_disk import FakeYandexDisk
+
+DESTINATIONS = ["/backup/file", "/mirror1/file", "/mirror2/file"]
+
+
+async def _upload_fanout(tmp_path, hass, server: FakeYandexDisk, data: bytes, compression: str = "none",
+                         encryption_key: str = "", buffer_pool: BufferPool | None = None):
+    (tmp_path / "file.tar").write_bytes(data)
+    destinations = {destination: UploadProgress("file", len(data)) for destination in DESTINATIONS}
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            client = YandexDiskClient(hass, session, "token", base_url=server.url, buffer_pool=buffer_pool)
+            with patch.object(yad, "REQUEST_RETRY_INTERVAL_SEC", 0), \
+                    patch.object(client, "_read_file_chunks", wraps=client._read_file_chunks) as read_file_chunks:
+                compressor, failed = await client.upload_fanout(str(tmp_path / "file.tar"), destinations,
+                                                                compression=compression,
+                                                                encryption_key=encryption_key)
+    finally:
+        await server.stop()
+    return compressor, failed, destinations, read_file_chunks.call_count
+
+
+async def test_upload_fanout_reads_file_once(tmp_path, hass):
+    server = FakeYandexDisk()
+    data = os.urandom(5 * 1_048_576 + 100)
+
+    compressor, failed, destinations, reads = await _upload_fanout(tmp_path, hass, server, data)
+
+    assert compressor is None
+    assert failed == {}
+    assert reads == 1
+    assert all(server.files[destination]["data"] == data for destination in DESTINATIONS)
+    assert all(progress.sent == len(data) for progress in destinations.values())
+
+
+async def test_upload_fanout_failed_destination(tmp_path, hass):
+    server = FakeYandexDisk()
+    server.fail_uploads.add("/mirror1/file")
+    data = bytes(3 * 1_048_576)
+    pool = BufferPool(1_048_576)
+
+    compressor, failed, _, reads = await _upload_fanout(tmp_path, hass, server, data, "gzip", buffer_pool=pool)
+
+    assert list(failed) == ["/mirror1/file"]
+    assert compressor.input_size == len(data)
+    assert "/mirror1/file" not in server.files
+    assert server.files["/backup/file"]["data"] == server.files["/mirror2/file"]["data"]
+    # Failed destination uploaded again separately with retries
+    assert reads == 1 + yad.REQUEST_RETRIES + 1
+    # Pieces queued for failed destination returned to pool
+    assert pool.in_use_bytes == 0
+
+
+async def test_upload_fanout_without_upload_links(tmp_path, hass):
+    server = FakeYandexDisk(error_rate=1.0)
+    data = os.urandom(1000)
+
+    compressor, failed, _, reads = await _upload_fanout(tmp_path, hass, server, data)
+
+    assert compressor is None
+    assert set(failed) == set(DESTINATIONS)
+    # No shared read without upload links
+    assert reads == 0
+
+
+async def test_upload_fanout_stops_read_when_all_failed(tmp_path, hass):
+    data = os.urandom(5 * 1_048_576)
+    (tmp_path / "file.tar").write_bytes(data)
+    destinations = {destination: UploadProgress("file", len(data)) for destination in DESTINATIONS}
+    progress = UploadProgress("file", len(data))
+    server = FakeYandexDisk()
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            client = YandexDiskClient(hass, session, "token", base_url=server.url)
+            with patch.object(client, "_put", side_effect=yad.YandexDiskApiError(400, "Bad request")):
+                _, failed = await client.upload_fanout(str(tmp_path / "file.tar"), destinations, progress)
+    finally:
+        await server.stop()
+
+    assert set(failed) == set(DESTINATIONS)
+    assert progress.sent < len(data)
+    assert client._buffer_pool.in_use_bytes == 0
+
+
+@pytest.mark.parametrize("encryption_key", ["", "key"])
+async def test_upload_fanout_queues_within_memory_limit(tmp_path, hass, encryption_key):
+    # Smallest pool: two buffers, encrypted chunks larger than buffer
+    pool = BufferPool(2 * UPLOAD_BUFFER_MIN_SIZE)
+    server = FakeYandexDisk()
+    data = os.urandom(3 * 1_048_576 + 100)
+
+    _, failed, _, _ = await _upload_fanout(tmp_path, hass, server, data, encryption_key=encryption_key,
+                                           buffer_pool=pool)
+
+    assert failed == {}
+    uploaded = [server.files[destination]["data"] for destination in DESTINATIONS]
+    assert uploaded[0] == uploaded[1] == uploaded[2]
+    assert len(uploaded[0]) == (StreamEncryptor.encrypted_size(len(data)) if encryption_key else len(data))
+    if not encryption_key:
+        assert uploaded[0] == data
+    assert 0 < pool.peak_bytes <= pool.limit == 2 * UPLOAD_BUFFER_MIN_SIZE
+    assert pool.in_use_bytes == 0
@@ -1,16 +1,53 @@
+import asyncio
 import datetime
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from yadisk.objects import ResourceObject
+from custom_components.yabackup import yad
+from custom_components.yabackup.constants import CONF_TOKEN, CONF_REFRESH_TOKEN, CONF_TOKEN_EXPIRES, \
+    CONF_CLIENT_ID, CONF_CLIENT_SECRET
+from custom_components.yabackup.yad import TokenManager
 
 
-async def test_refresh_token_neeaded():
-    now_date = datetime.datetime.now();
+def _config(expires: datetime.datetime) -> dict:
+    return {CONF_TOKEN: "token",
+            CONF_REFRESH_TOKEN: "refresh_token",
+            CONF_TOKEN_EXPIRES: expires.isoformat(),
+            CONF_CLIENT_ID: "client_id",
+            CONF_CLIENT_SECRET: "client_secret"}
 
-    yadisk = MagicMock()
-    yadisk.listdir = AsyncMock(side_effect=[ResourceObject({"file": 'file1',
-                                                            "name": "file_name_1",
-                                                            "type": "file",
-                                                            "modified" : now_date })])
 
+def _refresh_result() -> dict:
+    return {CONF_TOKEN: "new_token",
+            CONF_REFRESH_TOKEN: "new_refresh_token",
+            CONF_TOKEN_EXPIRES: (datetime.datetime.now() + datetime.timedelta(days=365)).isoformat()}
 
+
+async def test_refresh_token_not_needed(hass):
+    on_refresh = AsyncMock()
+    manager = TokenManager(hass, MagicMock(), _config(datetime.datetime.now() + datetime.timedelta(days=365)),
+                           on_refresh)
+
+    with patch.object(yad, "async_refresh_token", AsyncMock()) as refresh_token:
+        await manager.async_ensure_valid()
+        await manager.async_refresh()
+
+    refresh_token.assert_not_called()
+    on_refresh.assert_not_called()
+    assert manager.token == "token"
+
+
+async def test_refresh_token_needed(hass):
+    on_refresh = AsyncMock()
+    manager = TokenManager(hass, MagicMock(), _config(datetime.datetime.now() - datetime.timedelta(minutes=1)),
+                           on_refresh)
+    result = _refresh_result()
+
+    with patch.object(yad, "async_refresh_token", AsyncMock(return_value=result)) as refresh_token:
+        # Concurrent callers wait for one refresh
+        await asyncio.gather(*[manager.async_ensure_valid() for _ in range(3)])
+
+    refresh_token.assert_called_once()
+    assert refresh_token.call_args.args[1:] == ("refresh_token", "client_id", "client_secret")
+    on_refresh.assert_called_once_with(result)
+    assert manager.token == "new_token"
+    assert not manager.needs_refresh()
@@ -0,0 +1,138 @@
+import datetime
+from unittest.mock import patch
+
+import aiohttp
+from homeassistant.util import dt as dt_util
+
+from custom_components.yabackup import yad
+from custom_components.yabackup.constants import CONF_PATH, CONF_MAX_REMOTE_FILE
+from custom_components.yabackup.yad import BackupObserver, RemoteFile, RemoteFolderState, YaDsk
+from fake_yandex_disk import FakeYandexDisk, API_PREFIX
+from helpers import CONFIG, make_backup, make_ya_dsk
+
+INTERVAL = datetime.timedelta(hours=1)
+LISTING = "GET " + API_PREFIX + "/resources"
+
+
+def _remote_file(name: str, days: int) -> RemoteFile:
+    return RemoteFile(name=name, type="file", modified=datetime.datetime(2023, 1, days, tzinfo=datetime.timezone.utc),
+                      size=days, md5=f"md5_{days}")
+
+
+async def test_remote_state_needs_reconcile(hass, memory_store):
+    state = RemoteFolderState(hass, "entry")
+    await state.async_load()
+    assert state.needs_reconcile("/backup", INTERVAL)
+
+    state.replace("/backup", [_remote_file("b1", 1)], [])
+    assert not state.needs_reconcile("/backup", INTERVAL)
+    # Another directory
+    assert state.needs_reconcile("/other", INTERVAL)
+    # Stale
+    with patch.object(yad.dt_util, "utcnow", return_value=dt_util.utcnow() + 2 * INTERVAL):
+        assert state.needs_reconcile("/backup", INTERVAL)
+
+    state.invalidate()
+    assert state.is_invalidated
+    assert state.needs_reconcile("/backup", INTERVAL)
+
+
+async def test_remote_state_persistence(hass, memory_store):
+    state = RemoteFolderState(hass, "entry")
+    await state.async_load()
+    state.replace("/backup", [_remote_file("b2", 2), _remote_file("b3", 3)], ["b1", "b0"])
+    state.add(_remote_file("b4", 4))
+    state.remove("b2")
+    state.remove("b0")
+
+    loaded = RemoteFolderState(hass, "entry")
+    await loaded.async_load()
+
+    assert loaded.names == ["b4", "b3", "b1"]
+    assert loaded.file_amount == 3
+    assert loaded.overflow == ["b1"]
+    assert loaded.get("b3") == state.get("b3")
+    assert not loaded.needs_reconcile("/backup", INTERVAL)
+    # Other entry has own state
+    other = RemoteFolderState(hass, "other")
+    await other.async_load()
+    assert other.file_amount == 0
+
+
+async def test_upload_files_uses_remote_state(tmp_path, hass, memory_store):
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+    make_backup(backup_dir / "b1.tar", "slug1")
+    server = FakeYandexDisk()
+    server.dirs.add(CONFIG[CONF_PATH])
+    listings = []
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            ya_dsk = make_ya_dsk(hass, backup_dir, server, session)
+            await ya_dsk.upload_files()
+            listings.append(server.requests[LISTING])
+
+            make_backup(backup_dir / "b2.tar", "slug2")
+            await ya_dsk.upload_files()
+            listings.append(server.requests[LISTING])
+
+            # Mismatch found, next upload lists directory
+            ya_dsk._remote_state.invalidate()
+            await ya_dsk.upload_files()
+            listings.append(server.requests[LISTING])
+    finally:
+        await server.stop()
+
+    assert listings[0] > 0
+    # Second upload uses remote directory state updated by first upload
+    assert listings[1] == listings[0]
+    assert listings[2] > listings[1]
+    assert sorted(ya_dsk._file_list) == ["Backup-slug1_slug1", "Backup-slug2_slug2"]
+    assert len(server.files) == 2
+
+
+async def test_remote_state_load_invalidated(hass, memory_store):
+    state = RemoteFolderState(hass, "entry")
+    await state.async_load()
+    state.replace("/backup", [_remote_file("b1", 1), _remote_file("b2", 2)], [])
+    state.invalidate()
+    state.remove("b1")
+
+    loaded = RemoteFolderState(hass, "entry")
+    await loaded.async_load()
+
+    assert loaded.names == ["b2"]
+    assert loaded.needs_reconcile("/backup", INTERVAL)
+
+    # Damaged state ignored
+    memory_store.data[yad.STORAGE_REMOTE_STATE + ".entry"] = {"path": "/backup"}
+    damaged = RemoteFolderState(hass, "entry")
+    await damaged.async_load()
+    assert damaged.file_amount == 0
+    assert damaged.needs_reconcile("/backup", INTERVAL)
+
+
+async def test_remote_state_add_overflow_file(hass, memory_store):
+    state = RemoteFolderState(hass, "entry")
+    await state.async_load()
+    state.replace("/backup", [_remote_file("b2", 2)], ["b1"])
+
+    state.add(_remote_file("b1", 3))
+
+    assert state.names == ["b1", "b2"]
+    assert state.file_amount == 2
+    assert state.overflow == []
+
+
+async def test_update_config_invalidates_remote_state(tmp_path, hass, memory_store):
+    ya_dsk = YaDsk(hass, BackupObserver(hass, str(tmp_path)), CONFIG, "entry")
+    await ya_dsk._remote_state.async_load()
+    ya_dsk._remote_state.replace("/backup", [_remote_file("b1", 1)], [])
+
+    ya_dsk.update_config(dict(CONFIG))
+    assert not ya_dsk._remote_state.is_invalidated
+
+    # More newest files needed, than kept in state
+    ya_dsk.update_config(dict(CONFIG, **{CONF_MAX_REMOTE_FILE: 20}))
+    assert ya_dsk._remote_state.is_invalidated
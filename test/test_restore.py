@@ -0,0 +1,70 @@
+import hashlib
+import os
+
+import aiohttp
+import pytest
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.yabackup.constants import CONF_PATH, CONF_DEDUP_UPLOAD, DEDUP_CHUNK_DIR, MANIFEST_SUFFIX
+from custom_components.yabackup.yad import BackupObserver, YaDsk
+from fake_yandex_disk import FakeYandexDisk
+from helpers import CONFIG, make_backup, make_ya_dsk
+
+
+async def _upload_and_restore(tmp_path, hass, server: FakeYandexDisk, damage=None, **options):
+    """ Upload backup, delete it locally and restore it. Return MD5 of source backup and restored path """
+    backup_dir = tmp_path / "backup"
+    backup_dir.mkdir()
+    md5 = make_backup(backup_dir / "backup.tar", "slug1", 3 * 1_048_576 + 100)
+    server.dirs.add(CONFIG[CONF_PATH])
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            ya_dsk = make_ya_dsk(hass, backup_dir, server, session, **options)
+            await ya_dsk.upload_files()
+            (backup_dir / "backup.tar").unlink()
+            remote_file = next(path for path in server.files if path.rsplit("/", 1)[0] == CONFIG[CONF_PATH])
+            if damage is not None:
+                damage(server.files[remote_file])
+            path = await ya_dsk.restore_backup(remote_file.rsplit("/", 1)[1])
+    finally:
+        await server.stop()
+    return md5, path
+
+
+async def test_restore_backup(tmp_path, hass, memory_store):
+    md5, path = await _upload_and_restore(tmp_path, hass, FakeYandexDisk())
+
+    assert hashlib.md5(path.read_bytes()).hexdigest() == md5
+    assert os.listdir(path.parent) == [path.name]
+
+
+async def test_restore_dedup_backup(tmp_path, hass, memory_store):
+    server = FakeYandexDisk()
+
+    md5, path = await _upload_and_restore(tmp_path, hass, server, **{CONF_DEDUP_UPLOAD: True})
+
+    assert any(name.endswith(MANIFEST_SUFFIX) for name in server.files)
+    assert any(name.startswith(CONFIG[CONF_PATH] + "/" + DEDUP_CHUNK_DIR + "/") for name in server.files)
+    assert hashlib.md5(path.read_bytes()).hexdigest() == md5
+    assert os.listdir(path.parent) == [path.name]
+
+
+async def test_restore_backup_md5_mismatch(tmp_path, hass, memory_store):
+    def damage(file: dict):
+        # Stored MD5 kept, content changed
+        file["data"] = bytes(len(file["data"]))
+
+    with pytest.raises(HomeAssistantError, match="MD5"):
+        await _upload_and_restore(tmp_path, hass, FakeYandexDisk(), damage)
+
+    # Temporary file removed
+    assert os.listdir(tmp_path / "backup") == []
+
+
+@pytest.mark.parametrize("file", ["../secret.tar", "dir/backup.tar", "..", ""])
+async def test_restore_backup_wrong_file_name(tmp_path, hass, memory_store, file):
+    ya_dsk = YaDsk(hass, BackupObserver(hass, str(tmp_path)), CONFIG, "entry")
+
+    with pytest.raises(HomeAssistantError, match="Wrong backup file name"):
+        await ya_dsk.restore_backup(file)
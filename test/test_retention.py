@@ -0,0 +1,67 @@
+import datetime
+from unittest.mock import patch
+
+import aiohttp
+from homeassistant.util import dt as dt_util
+
+from custom_components.yabackup import yad
+from custom_components.yabackup.constants import DELETE_PARALLELISM
+from custom_components.yabackup.yad import RemoteFile, RetentionPolicy, YandexDiskClient
+from fake_yandex_disk import FakeYandexDisk
+
+NOW = datetime.datetime(2024, 3, 31, 12, 0, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+
+
+def _files(hours: list[int]) -> list[RemoteFile]:
+    """ Files made given hours before now, sorted from newest to oldest """
+    return [RemoteFile(name=f"file{hour}", type="file", modified=NOW - datetime.timedelta(hours=hour))
+            for hour in sorted(hours)]
+
+
+def test_retention_keep_last():
+    files = _files([0, 1, 2, 3])
+
+    assert RetentionPolicy(2).plan(files, ["old1", "old2"]) == ["file2", "file3", "old1", "old2"]
+    # Files without dates are not ordered, they are not deleted while kept files are not all known
+    assert RetentionPolicy(5).plan(files, ["old1", "old2"]) == []
+    assert RetentionPolicy(4).plan(files, ["old1", "old2"], {"old1"}) == ["old2"]
+    # Just uploaded files are not deleted
+    assert RetentionPolicy(1).plan(files, [], {"file0", "file1"}) == ["file2", "file3"]
+
+
+def test_retention_calendar_rules():
+    # Every 6 hours during 70 days
+    files = _files(list(range(0, 70 * 24, 6)))
+
+    daily = RetentionPolicy(1, keep_daily=3)
+    kept = [file.name for file in files if file.name not in daily.plan(files, [])]
+    assert kept == ["file0", "file18", "file42"]
+
+    gfs = RetentionPolicy(0, keep_daily=2, keep_weekly=2, keep_monthly=3)
+    kept = [file for file in files if file.name not in gfs.plan(files, [])]
+    # Newest of 2 days (March 31, 30), of 2 weeks (week of March 31, of March 24) and of 3 months
+    assert [file.name for file in kept] == ["file0", "file18", "file162", "file738", "file1434"]
+    assert dt_util.as_local(kept[-1].modified).month == 1
+
+    # Files without dates are not deleted by calendar rules
+    assert "old" not in gfs.plan(files, ["old"])
+
+
+async def test_wait_operations_bounded(hass):
+    server = FakeYandexDisk(latency=0.01)
+    server.async_deletes = True
+    for number in range(3 * DELETE_PARALLELISM):
+        server.add_file(f"/backup/file{number}", b"data")
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            client = YandexDiskClient(hass, session, "token", base_url=server.url)
+            hrefs = [await client.remove(f"/backup/file{number}") for number in range(3 * DELETE_PARALLELISM)]
+            with patch.object(yad, "OPERATION_POLL_INTERVAL_SEC", 0):
+                errors = await client.wait_operations(hrefs)
+    finally:
+        await server.stop()
+
+    assert errors == {}
+    assert not server.files
+    assert 1 < server.max_active_polls <= DELETE_PARALLELISM
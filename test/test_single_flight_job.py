@@ -0,0 +1,42 @@
+import asyncio
+
+from custom_components.yabackup.yad import SingleFlightJob
+
+
+async def test_concurrent_runs_merged():
+    calls = []
+    release = asyncio.Event()
+
+    async def job_func():
+        calls.append(len(calls))
+        await release.wait()
+        return len(calls)
+
+    job = SingleFlightJob(job_func)
+    first = asyncio.create_task(job.async_run())
+    await asyncio.sleep(0)
+    assert job.state == "running"
+
+    followers = [asyncio.create_task(job.async_run()) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert job.state == "queued"
+
+    release.set()
+    assert await first == 1
+    assert await asyncio.gather(*followers) == [2, 2, 2]
+    assert calls == [0, 1]
+    assert job.state == "idle"
+
+
+async def test_error_stored():
+    async def job_func():
+        raise ValueError("upload failed")
+
+    job = SingleFlightJob(job_func)
+    try:
+        await job.async_run()
+    except ValueError:
+        pass
+
+    assert job.info["last_error"] == "upload failed"
+    assert job.state == "idle"
@@ -0,0 +1,24 @@
+from custom_components.yabackup.yad import SyncTelemetry
+
+
+def test_telemetry_run():
+    telemetry = SyncTelemetry()
+    telemetry.count_api_call()
+
+    with telemetry.run():
+        with telemetry.span("upload"):
+            telemetry.count_api_call()
+            telemetry.count_retry()
+            telemetry.bytes_sent += 1_048_576
+
+    assert telemetry.last_run["api_calls"] == 1
+    assert telemetry.last_run["retries"] == 1
+    assert telemetry.last_run["bytes_sent"] == 1_048_576
+    assert set(telemetry.last_run["spans"]) == {"upload"}
+    assert telemetry.api_calls_total == 2
+
+    with telemetry.run():
+        pass
+
+    assert telemetry.last_run["bytes_sent"] == 0
+    assert telemetry.last_run["speed_mb_s"] == 0.0
@@ -0,0 +1,62 @@
+import asyncio
+import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from custom_components.yabackup import yad
+from custom_components.yabackup.constants import CONF_TOKEN, CONF_REFRESH_TOKEN, CONF_TOKEN_EXPIRES, \
+    CONF_CLIENT_ID, CONF_CLIENT_SECRET
+from custom_components.yabackup.yad import TokenManager
+
+
+def _config(expires: datetime.datetime) -> dict:
+    return {CONF_TOKEN: "token",
+            CONF_REFRESH_TOKEN: "refresh_token",
+            CONF_TOKEN_EXPIRES: expires.isoformat(),
+            CONF_CLIENT_ID: "client_id",
+            CONF_CLIENT_SECRET: "client_secret"}
+
+
+def _new_token() -> dict:
+    return {CONF_TOKEN: "new_token",
+            CONF_REFRESH_TOKEN: "new_refresh_token",
+            CONF_TOKEN_EXPIRES: (datetime.datetime.now() + datetime.timedelta(days=365)).isoformat()}
+
+
+async def test_concurrent_refreshes_serialized():
+    on_refresh = AsyncMock()
+    manager = TokenManager(MagicMock(), MagicMock(), _config(datetime.datetime.now()), on_refresh)
+
+    with patch.object(yad, "async_refresh_token", AsyncMock(return_value=_new_token())) as refresh_token:
+        await asyncio.gather(*[manager.async_ensure_valid() for _ in range(3)])
+
+    refresh_token.assert_called_once()
+    on_refresh.assert_called_once()
+    assert manager.token == "new_token"
+    assert not manager.needs_refresh()
+
+
+async def test_token_due_for_refresh_returned_without_waiting():
+    expires = datetime.datetime.now() + datetime.timedelta(days=10)
+    manager = TokenManager(MagicMock(), MagicMock(), _config(expires), AsyncMock())
+
+    with patch.object(yad, "async_refresh_token", AsyncMock()) as refresh_token, \
+            patch.object(yad, "async_call_later") as call_later:
+        await manager.async_ensure_valid()
+        manager.start()
+
+    refresh_token.assert_not_called()
+    assert manager.needs_refresh()
+    # Background refresh scheduled immediately
+    assert call_later.call_args[0][1] == 0
+
+
+async def test_background_refresh_scheduled_before_expiry():
+    expires = datetime.datetime.now() + datetime.timedelta(days=100)
+    manager = TokenManager(MagicMock(), MagicMock(), _config(expires), AsyncMock())
+
+    with patch.object(yad, "async_call_later") as call_later:
+        manager.start()
+        manager.set_config(_config(expires))
+
+    call_later.assert_called_once()
+    assert abs(call_later.call_args[0][1] - datetime.timedelta(days=70).total_seconds()) < 10
@@ -0,0 +1,139 @@
+import datetime
+from unittest.mock import MagicMock, patch
+
+import aiohttp
+
+from custom_components.yabackup.constants import CONF_TOKEN, CONF_REFRESH_TOKEN, CONF_PATH, CONF_MAX_REMOTE_FILE, \
+    CONF_CLIENT_ID, CONF_CLIENT_SECRET, CONF_REFRESH_INTERVAL, CONF_BANDWIDTH_LIMIT, CONF_UPLOAD_MEMORY_LIMIT
+from custom_components.yabackup.yad import YaDsk, RemoteFile, UPLOAD_STATE_DONE, UPLOAD_STATE_FAILED
+from fake_yandex_disk import FakeYandexDisk
+from helpers import make_backup, make_ya_dsk
+
+CONFIG = {CONF_TOKEN: "token",
+          CONF_REFRESH_TOKEN: "refresh_token",
+          CONF_PATH: "/backup",
+          CONF_MAX_REMOTE_FILE: 5,
+          CONF_CLIENT_ID: "client_id",
+          CONF_CLIENT_SECRET: "client_secret"}
+
+
+def _make_ya_dsk(remote_hashes: dict):
+    ya_dsk = YaDsk(MagicMock(), MagicMock(), CONFIG, "entry_id")
+    ya_dsk._file_list = list(remote_hashes.keys())
+    ya_dsk._file_hashes = remote_hashes
+    return ya_dsk
+
+
+def test_compare_files():
+    ya_dsk = _make_ya_dsk({"same": "md5_1", "changed": "md5_2", "renamed_old": "md5_3"})
+
+    new_files, copied_files = ya_dsk._compare_files({"same": "md5_1",
+                                                     "changed": "md5_changed",
+                                                     "renamed_new": "md5_3",
+                                                     "new": "md5_new",
+                                                     "not_hashed": None})
+
+    assert new_files == ["changed", "new", "not_hashed"]
+    assert copied_files == {"renamed_new": "renamed_old"}
+
+
+async def _iterate(items):
+    for item in items:
+        yield item
+
+
+async def test_file_list_processing_keeps_newest():
+    now_date = datetime.datetime.now()
+    files = [RemoteFile(name=f"file_{i}", type="file", modified=now_date + datetime.timedelta(minutes=i))
+             for i in (3, 1, 4, 0, 2)]
+    files.append(RemoteFile(name="dir", type="dir", modified=now_date))
+
+    newest, overflow = await YaDsk._file_list_processing(_iterate(files), 2)
+
+    assert [file.name for file in newest] == ["file_4", "file_3"]
+    assert sorted(overflow) == ["file_0", "file_1", "file_2"]
+
+
+def test_get_local_file_name():
+    assert YaDsk._get_local_file_name("Backup_1a2b") == "Backup_1a2b.tar"
+    assert YaDsk._get_local_file_name("Backup_1a2b.tar") == "Backup_1a2b.tar"
+    assert YaDsk._get_local_file_name("Backup_1a2b_gz") == "Backup_1a2b.tar"
+
+
+async def test_coordinator_notifies_only_on_change():
+    ya_dsk = YaDsk(MagicMock(), MagicMock(), CONFIG, "entry_id")
+    updates = []
+    ya_dsk.coordinator.async_add_listener(lambda: updates.append(ya_dsk.coordinator.data["file_amount"]))
+
+    ya_dsk._publish()
+    ya_dsk._publish()
+    ya_dsk._file_amount = 3
+    ya_dsk._publish()
+
+    assert updates == [0, 3]
+
+
+async def test_refresh_interval_adapts_to_changes():
+    ya_dsk = YaDsk(MagicMock(), MagicMock(), dict(CONFIG, **{CONF_REFRESH_INTERVAL: 10}), "entry_id")
+    listings = [["a"], ["a"], ["b", "a"]]
+
+    async def list_yandex_disk():
+        ya_dsk._file_list = listings.pop(0)
+
+    with patch.object(ya_dsk, "list_yandex_disk", list_yandex_disk), \
+            patch.object(ya_dsk._remote_state, "needs_reconcile", return_value=True):
+        await ya_dsk._async_update_data()
+        assert ya_dsk.coordinator.update_interval == datetime.timedelta(minutes=10)
+        await ya_dsk._async_update_data()
+        assert ya_dsk.coordinator.update_interval == datetime.timedelta(minutes=20)
+        await ya_dsk._async_update_data()
+        assert ya_dsk.coordinator.update_interval == datetime.timedelta(minutes=10)
+
+
+def test_update_config_keeps_transfer_limits():
+    ya_dsk = YaDsk(MagicMock(), MagicMock(), CONFIG, "entry_id")
+    ya_dsk._session = MagicMock()
+    buffer_pool = ya_dsk._buffer_pool
+    rate_limiter = ya_dsk._rate_limiter
+    client = ya_dsk._get_client()
+
+    # Token refreshed in background during upload
+    config = dict(CONFIG, **{CONF_TOKEN: "new_token"})
+    ya_dsk.update_config(config)
+    assert ya_dsk._buffer_pool is buffer_pool
+    assert ya_dsk._rate_limiter is rate_limiter
+    new_client = ya_dsk._get_client()
+    assert new_client is not client
+    assert new_client.token == "new_token"
+    assert new_client._buffer_pool is buffer_pool
+
+    ya_dsk.update_config(dict(config, **{CONF_BANDWIDTH_LIMIT: 100}))
+    assert ya_dsk._rate_limiter is rate_limiter
+    assert rate_limiter.current_limit == 100 * 1024
+    assert ya_dsk._get_client() is new_client
+
+    ya_dsk.update_config(dict(config, **{CONF_UPLOAD_MEMORY_LIMIT: 16}))
+    assert ya_dsk._buffer_pool is not buffer_pool
+    assert ya_dsk._buffer_pool.memory_limit == 16 * 1_048_576
+    assert ya_dsk._get_client()._buffer_pool is ya_dsk._buffer_pool
+
+
+async def test_upload_new_files_deleted_file(tmp_path, hass, memory_store):
+    make_backup(tmp_path / "b1.tar", "slug1")
+    server = FakeYandexDisk()
+    server.dirs.add(CONFIG[CONF_PATH])
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            ya_dsk = make_ya_dsk(hass, tmp_path, server, session)
+            uploaded = await ya_dsk._upload_new_files(ya_dsk._client, {"b1": tmp_path / "b1.tar",
+                                                                       "deleted": tmp_path / "deleted.tar"}, {})
+    finally:
+        await server.stop()
+
+    # Deleted file does not abort upload of other files
+    assert uploaded == ["b1"]
+    assert ya_dsk._upload_progress["b1"].state == UPLOAD_STATE_DONE
+    assert ya_dsk._upload_progress["b1"].size == (tmp_path / "b1.tar").stat().st_size
+    assert ya_dsk._upload_progress["deleted"].state == UPLOAD_STATE_FAILED
+    assert ya_dsk._upload_progress["deleted"].error